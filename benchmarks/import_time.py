@@ -0,0 +1,81 @@
+"""Import-time benchmark for the package and its entry points.
+
+Runs each import in a fresh interpreter under ``-X importtime`` and compares
+the cumulative time against ``import_budget.json``. Exits non-zero when a
+budget is exceeded or a heavy dependency leaks into a lightweight import.
+
+    python benchmarks/import_time.py [--runs 5] [--json results.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from statistics import median
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "import_budget.json"
+HEAVY_MODULES = ["PyQt5", "anchorpy", "solana", "numpy", "redis", "aiohttp", "dotenv"]
+
+
+def measure(module: str) -> Dict:
+    """Import ``module`` in a fresh interpreter; return its cumulative time and loaded heavy deps"""
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() == module:
+            cumulative_us = int(cumulative)
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return {"cumulative_ms": cumulative_us / 1000, "heavy_modules": loaded}
+
+
+def run(budget: Dict, runs: int) -> List[Dict]:
+    results = []
+    for module, limits in budget.items():
+        samples = [measure(module) for _ in range(runs)]
+        result = {
+            "module": module,
+            "median_ms": median(s["cumulative_ms"] for s in samples),
+            "budget_ms": limits["max_ms"],
+            "heavy_modules": samples[0]["heavy_modules"],
+            "forbidden": limits.get("forbid", []),
+        }
+        result["leaked"] = [m for m in result["heavy_modules"] if m in result["forbidden"]]
+        result["ok"] = result["median_ms"] <= result["budget_ms"] and not result["leaked"]
+        results.append(result)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=Path, default=BUDGET_FILE)
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    budget = json.loads(args.budget.read_text())
+    results = run(budget, args.runs)
+    for r in results:
+        status = "ok" if r["ok"] else "FAIL"
+        leaked = f"  leaked: {', '.join(r['leaked'])}" if r["leaked"] else ""
+        print(f"{status:4} {r['module']:32} {r['median_ms']:8.1f} ms (budget {r['budget_ms']} ms){leaked}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
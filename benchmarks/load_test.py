@@ -0,0 +1,373 @@
+"""Open-loop load test of the trading path against the local stand-ins.
+
+    python -m benchmarks.load_test                               # default rate sweep
+    python -m benchmarks.load_test --rates 25 50 100 200 --duration 10 --json report.json
+    python -m benchmarks.load_test --compare report.json         # fail if worse than a previous run
+
+Requests arrive as a Poisson process at each offered rate whether or not
+earlier ones have finished (open loop), so when ``NFTTradeManager`` falls
+behind, the backlog shows up as latency instead of quietly lowering the
+arrival rate. Latency is measured from the scheduled arrival time. Each
+request is a buy order, a sell order or a market read, mixed by ``--mix``.
+
+Per-stage latency comes from the trace spans of each request:
+
+* ``queue``: time inside ``place_*_order`` not spent in a child span, which
+  is mostly waiting for a ``max_concurrent_trades`` slot
+* ``validation``: the floor-price check (``analyze_market``)
+* ``http``: the Tensor bid/listing call, or every Tensor call of a read
+* ``cache``: ``update_price`` after a fill
+
+A step is saturated when it completes fewer than ``1 - tolerance`` of the
+offered requests per second, or when its p99 exceeds ``latency_factor``
+times the first step's. The sweep stops at the first saturated step. The
+stand-ins run in a child process so they do not compete for this
+process's event loop.
+"""
+from typing import Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from loguru import logger
+
+import numpy as np
+
+from src.core.instrumentation import Span, tracer
+from src.core.nft_cache import NFTCacheManager, NFTMetadata
+from .run import compare, host_info
+from .stubs import FaultProfile, StubRpcServer, StubTensorServer, fake_address
+
+REPORT_VERSION = 1
+
+_ROOT_OPS = {
+    'trading.place_buy_order': 'buy',
+    'trading.place_sell_order': 'sell',
+    'trading.analyze_market': 'read',
+}
+_ORDER_STAGES = {
+    'trading.analyze_market': 'validation',
+    'tensor.place_bid': 'http',
+    'tensor.create_listing': 'http',
+    'cache.update_price': 'cache',
+}
+
+
+@dataclass
+class LoadProfile:
+    rates: List[float] = field(default_factory=lambda: [25, 50, 100, 200, 400])
+    duration: float = 5.0  # seconds of arrivals per rate
+    mix: Dict[str, float] = field(default_factory=lambda: {'buy': 0.4, 'sell': 0.2, 'read': 0.4})
+    max_concurrent_trades: int = 5
+    rtt: float = 0.01  # stand-in latency per request
+    collections: int = 10
+    seed: int = 0
+    drain_timeout: float = 30.0  # seconds to wait for the backlog after arrivals stop
+    tolerance: float = 0.1
+    latency_factor: float = 5.0
+
+
+class StageRecorder:
+    """Trace exporter that keeps per-operation, per-stage durations of finished requests"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def export(self, span: Span):
+        op = _ROOT_OPS.get(span.name)
+        if op is None:
+            return
+        if op == 'read':
+            self._add('read.http', sum(c.duration for c in span.children if c.name.startswith('tensor.')))
+            return
+        in_children = 0.0
+        for child in span.children:
+            stage = _ORDER_STAGES.get(child.name)
+            if stage:
+                self._add(f"{op}.{stage}", child.duration)
+            in_children += child.duration
+        self._add(f"{op}.queue", max(span.duration - in_children, 0.0))
+
+    def _add(self, key: str, seconds: float):
+        self.samples.setdefault(key, []).append(seconds)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return {'count': len(samples), 'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+
+def _serve_stubs(conn, rtt: float, seed: int):
+    async def serve():
+        async with StubTensorServer(FaultProfile(latency=rtt, seed=seed)) as tensor, StubRpcServer() as rpc:
+            conn.send((tensor.url, rpc.url))
+            await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+            conn.send(dict(tensor.requests))
+
+    logger.remove()
+    asyncio.run(serve())
+
+
+@contextmanager
+def stub_process(rtt: float, seed: int):
+    """Run the Tensor and RPC stand-ins in a child process; yields ``(tensor_url, rpc_url, requests)``
+
+    ``requests`` is filled with the stand-in's per-endpoint counts on exit.
+    """
+    parent, child = multiprocessing.get_context('spawn').Pipe()
+    process = multiprocessing.get_context('spawn').Process(target=_serve_stubs, args=(child, rtt, seed), daemon=True)
+    process.start()
+    requests: Dict[str, int] = {}
+    try:
+        tensor_url, rpc_url = parent.recv()
+        yield tensor_url, rpc_url, requests
+        parent.send('stop')
+        requests.update(parent.recv())
+    finally:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+
+def _make_nft(i: int, collection: str) -> NFTMetadata:
+    return NFTMetadata(
+        mint=fake_address(f"load:{i}"), name=f"Load #{i}", symbol="LOAD", uri="", seller_fee_basis_points=500,
+        creators=[], collection={"address": collection}, attributes=[], last_updated=datetime.now(),
+    )
+
+
+async def run_step(profile: LoadProfile, rate: float, tensor_url: str, rpc_url: str) -> Dict:
+    """Offer ``rate`` requests/s for ``profile.duration`` seconds and summarize what happened"""
+    from src.trading.trade_manager import NFTTradeManager
+
+    rng = random.Random(f"{profile.seed}:{rate}")
+    collections = [fake_address(f"collection:{i}") for i in range(profile.collections)]
+    ops, weights = zip(*profile.mix.items())
+    recorder = StageRecorder()
+    totals: Dict[str, List[float]] = {op: [] for op in ops}
+    failed = 0
+    in_flight = 0
+    max_in_flight = 0
+    completed_in_window = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = NFTTradeManager(None, NFTCacheManager(tmp), rpc_endpoint=rpc_url,
+                                  max_concurrent_trades=profile.max_concurrent_trades)
+        manager.tensor_client.api_endpoint = tensor_url
+        tracer.add_exporter(recorder)
+        log_slow, tracer.log_slow = tracer.log_slow, False
+        start = time.perf_counter()
+        window_end = start + profile.duration
+
+        async def request(i: int, op: str, scheduled: float):
+            nonlocal failed, in_flight, max_in_flight, completed_in_window
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            collection = collections[i % len(collections)]
+            floor = StubTensorServer.floor_lamports(collection) / 1e9
+            try:
+                if op == 'buy':
+                    ok = await manager.place_buy_order(_make_nft(i, collection), floor)
+                elif op == 'sell':
+                    ok = await manager.place_sell_order(_make_nft(i, collection), floor)
+                else:
+                    ok = await manager.analyze_market(collection) is not None
+            finally:
+                in_flight -= 1
+            finished = time.perf_counter()
+            totals[op].append(finished - scheduled)
+            failed += not ok
+            completed_in_window += finished <= window_end
+
+        try:
+            tasks = []
+            scheduled = start
+            i = 0
+            while True:
+                scheduled += rng.expovariate(rate)
+                if scheduled >= window_end:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                op = rng.choices(ops, weights)[0]
+                tasks.append(asyncio.ensure_future(request(i, op, scheduled)))
+                i += 1
+            _, pending = await asyncio.wait(tasks, timeout=profile.drain_timeout) if tasks else (set(), set())
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            tracer.remove_exporter(recorder)
+            tracer.log_slow = log_slow
+            if manager.tensor_client.session:
+                await manager.tensor_client.session.close()
+            await manager.metadata_resolver.close()
+            await manager.client.close()
+
+    stages = {f"{op}.total": percentiles(samples) for op, samples in totals.items() if samples}
+    stages.update({key: percentiles(samples) for key, samples in sorted(recorder.samples.items())})
+    return {
+        'offered_rate': rate,
+        'arrivals': len(tasks),
+        'completed': len(tasks) - len(pending),
+        'failed': failed,
+        'timed_out': len(pending),
+        'achieved_rate': completed_in_window / profile.duration,
+        'max_in_flight': max_in_flight,
+        'stages': stages,
+    }
+
+
+def _p99(step: Dict) -> float:
+    return max((s['p99_ms'] for key, s in step['stages'].items() if key.endswith('.total')), default=0.0)
+
+
+def check_saturation(step: Dict, first: Optional[Dict], profile: LoadProfile) -> Optional[str]:
+    """Why ``step`` counts as saturated, or None"""
+    if step['timed_out']:
+        return f"{step['timed_out']} requests still running {profile.drain_timeout:.0f}s after arrivals stopped"
+    if step['achieved_rate'] < step['offered_rate'] * (1 - profile.tolerance):
+        return f"completed {step['achieved_rate']:.1f}/s of {step['offered_rate']:.1f}/s offered"
+    if first is not None and first is not step and _p99(step) > profile.latency_factor * _p99(first):
+        return f"p99 {_p99(step):.1f}ms is over {profile.latency_factor:g}x the {_p99(first):.1f}ms at the first rate"
+    return None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_sweep(profile: LoadProfile, stop_at_saturation: bool = True) -> Dict:
+    """Run every rate in ``profile.rates`` and build the report"""
+    steps: List[Dict] = []
+    saturated_at: Optional[Tuple[float, str]] = None
+    with stub_process(profile.rtt, profile.seed) as (tensor_url, rpc_url, requests):
+        for rate in profile.rates:
+            step = asyncio.run(run_step(profile, rate, tensor_url, rpc_url))
+            reason = check_saturation(step, steps[0] if steps else step, profile)
+            step['saturated'] = reason is not None
+            step['reason'] = reason
+            steps.append(step)
+            print(format_step(step))
+            if reason and saturated_at is None:
+                saturated_at = (rate, reason)
+                if stop_at_saturation:
+                    break
+
+    sustained = [s['offered_rate'] for s in steps if not s['saturated']]
+    return {
+        'version': REPORT_VERSION,
+        'timestamp': datetime.now().isoformat(),
+        'commit': _git_commit(),
+        'host': host_info(),
+        'profile': asdict(profile),
+        'steps': steps,
+        'saturation': {
+            'max_sustained_rate': max(sustained) if sustained else None,
+            'saturated_at': saturated_at[0] if saturated_at else None,
+            'reason': saturated_at[1] if saturated_at else None,
+        },
+        'upstream_requests': requests,
+    }
+
+
+def format_step(step: Dict) -> str:
+    lines = [f"rate {step['offered_rate']:>7.1f}/s  achieved {step['achieved_rate']:>7.1f}/s  "
+             f"failed {step['failed']}  max in flight {step['max_in_flight']}"
+             + (f"  SATURATED: {step['reason']}" if step['reason'] else "")]
+    for key, s in step['stages'].items():
+        lines.append(f"    {key:18} p50 {s['p50_ms']:>9.2f}ms  p95 {s['p95_ms']:>9.2f}ms  p99 {s['p99_ms']:>9.2f}ms")
+    return "\n".join(lines)
+
+
+def flatten(report: Dict) -> Dict[str, Dict[str, float]]:
+    """Steps as ``benchmarks.run`` results, so two reports can be compared with ``compare``
+
+    Only end-to-end latencies are compared; sub-millisecond stages are too noisy.
+    """
+    return {
+        f"rate_{step['offered_rate']:g}": {
+            'achieved_per_sec': step['achieved_rate'],
+            **{f"{key}_p99_ms": s['p99_ms'] for key, s in step['stages'].items() if key.endswith('.total')},
+        }
+        for step in report['steps']
+    }
+
+
+def _parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(','):
+        op, _, weight = part.partition('=')
+        if op not in ('buy', 'sell', 'read'):
+            raise argparse.ArgumentTypeError(f"unknown operation {op!r}")
+        mix[op] = float(weight)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = LoadProfile()
+    parser = argparse.ArgumentParser(description="Open-loop load test of NFTTradeManager")
+    parser.add_argument("--rates", type=float, nargs="+", default=defaults.rates, help="offered requests/s per step")
+    parser.add_argument("--duration", type=float, default=defaults.duration, help="seconds of arrivals per step")
+    parser.add_argument("--mix", type=_parse_mix, default=defaults.mix, help="e.g. buy=0.4,sell=0.2,read=0.4")
+    parser.add_argument("--concurrency", type=int, default=defaults.max_concurrent_trades,
+                        help="NFTTradeManager max_concurrent_trades")
+    parser.add_argument("--rtt", type=float, default=defaults.rtt, help="stand-in latency per request (s)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--tolerance", type=float, default=defaults.tolerance,
+                        help="shortfall of achieved vs offered rate that counts as saturated")
+    parser.add_argument("--latency-factor", type=float, default=defaults.latency_factor,
+                        help="p99 growth over the first step that counts as saturated")
+    parser.add_argument("--full", action="store_true", help="keep going after the first saturated step")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    parser.add_argument("--compare", type=Path, help="previous report; exit non-zero on regressions")
+    parser.add_argument("--compare-tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    profile = LoadProfile(rates=args.rates, duration=args.duration, mix=args.mix,
+                          max_concurrent_trades=args.concurrency, rtt=args.rtt, seed=args.seed,
+                          tolerance=args.tolerance, latency_factor=args.latency_factor)
+    report = run_sweep(profile, stop_at_saturation=not args.full)
+    saturation = report['saturation']
+    if saturation['saturated_at'] is None:
+        print(f"not saturated up to {saturation['max_sustained_rate']:g}/s")
+    else:
+        print(f"max sustained rate: {saturation['max_sustained_rate']}/s; "
+              f"saturated at {saturation['saturated_at']:g}/s: {saturation['reason']}")
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text())
+        if previous.get('profile', {}) != report['profile']:
+            print(f"{args.compare} used a different profile; skipping comparison")
+            return 0
+        if previous.get('host') != report['host']:
+            print(f"{args.compare} was recorded on a different host; skipping comparison")
+            return 0
+        regressions = compare(flatten(report), flatten(previous), args.compare_tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
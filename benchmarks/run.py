@@ -0,0 +1,552 @@
+"""Benchmark suite for the cache, Tensor client and trading paths.
+
+Network-facing benchmarks run against the local stand-ins in
+``benchmarks.stubs``, so results are reproducible offline. Results are
+written as JSON and compared against a stored baseline:
+
+    python -m benchmarks.run                          # run all, compare to baseline
+    python -m benchmarks.run --only cache_get_hot --json out.json
+    python -m benchmarks.run --update-baseline        # record a new baseline
+
+Metric names encode their direction: ``*_per_sec`` is higher-is-better and
+``*_ms`` is lower-is-better. Other metrics (counts) are reported but not
+compared. Absolute numbers are only compared against a baseline recorded on
+the same kind of host (``host_info()``), and never for p99 latencies or the
+disk-write benchmarks in ``UNGATED``, which swing with scheduler and writeback
+noise. The ratios in ``RATIOS``, such as batched over single reads, are
+compared everywhere and must also stay above their floor. Exits non-zero when
+any compared metric regresses by more than ``--tolerance``.
+"""
+from typing import Callable, Dict, List, Optional
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from loguru import logger
+
+import numpy as np
+
+from src.core.nft_cache import NFTCacheManager, NFTMetadata
+from src.trading.tensor_client import TensorClient
+from .stubs import FaultProfile, StubRpcServer, StubTensorServer, fake_address
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+
+BENCHMARKS: Dict[str, Callable] = {}
+
+# (benchmark, metric, reference metric, floor) from one run; their ratio holds across machines
+# and may never drop below the floor. Disk-write benchmarks are left out: their ratios follow the
+# filesystem's writeback state.
+RATIOS = [
+    ("cache_collection_walk", "batched_reads_per_sec", "single_reads_per_sec", 1.0),
+]
+
+# Reported but never gated on absolute numbers: timing is dominated by page-cache writeback
+UNGATED = {"cache_put", "cache_cold_disk"}
+
+
+def benchmark(fn: Callable) -> Callable:
+    """Register ``fn(scale) -> Dict[str, float]`` under its name"""
+    BENCHMARKS[fn.__name__] = fn
+    return fn
+
+
+def latency_summary(samples: List[float], prefix: str = "latency") -> Dict[str, float]:
+    """p50/p95/p99 of per-call durations (seconds) as ``<prefix>_p50_ms`` etc."""
+    if not samples:
+        return {}
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return {f"{prefix}_p50_ms": float(p50), f"{prefix}_p95_ms": float(p95), f"{prefix}_p99_ms": float(p99)}
+
+
+def make_nft(i: int, collection: str = "") -> NFTMetadata:
+    return NFTMetadata(
+        mint=fake_address(f"mint:{i}"), name=f"NFT #{i}", symbol="BNCH", uri="", seller_fee_basis_points=500,
+        creators=[], collection={"address": collection} if collection else None,
+        attributes=[{"trait_type": "Background", "value": "Blue"}], last_updated=datetime.now(),
+    )
+
+
+async def _timed(coro, samples: List[float]):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        samples.append(time.perf_counter() - start)
+
+
+@benchmark
+def cache_put(scale: float) -> Dict[str, float]:
+    n = int(2000 * scale)
+    nfts = [make_nft(i) for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = NFTCacheManager(tmp)
+        start = time.perf_counter()
+        for nft in nfts:
+            cache.cache_nft(nft)
+        elapsed = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = NFTCacheManager(tmp)
+        start = time.perf_counter()
+        for i in range(0, n, 100):
+            cache.put_many(nfts[i:i + 100])
+        batched = time.perf_counter() - start
+    return {"puts_per_sec": n / elapsed, "batched_puts_per_sec": n / batched}
+
+
+@benchmark
+def cache_get_hot(scale: float) -> Dict[str, float]:
+    n = int(200_000 * scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = NFTCacheManager(tmp)
+        mints = []
+        for i in range(1000):
+            nft = make_nft(i)
+            cache.cache_nft(nft)
+            mints.append(nft.mint)
+        start = time.perf_counter()
+        for i in range(n):
+            cache.get_nft(mints[i % 1000])
+        elapsed = time.perf_counter() - start
+    return {"gets_per_sec": n / elapsed}
+
+
+@benchmark
+def cache_cold_disk(scale: float) -> Dict[str, float]:
+    n = int(2000 * scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = NFTCacheManager(tmp)
+        mints = []
+        for i in range(n):
+            nft = make_nft(i)
+            writer.cache_nft(nft)
+            mints.append(nft.mint)
+        reader = NFTCacheManager(tmp)
+        start = time.perf_counter()
+        found = sum(reader.get_nft(mint) is not None for mint in mints)
+        elapsed = time.perf_counter() - start
+    return {"reads_per_sec": n / elapsed, "found": found}
+
+
+@benchmark
+def cache_miss(scale: float) -> Dict[str, float]:
+    """Lookups of mints that are not cached, over a 2000-NFT disk store"""
+    n = int(20000 * scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = NFTCacheManager(tmp)
+        for i in range(2000):
+            writer.cache_nft(make_nft(i))
+        reader = NFTCacheManager(tmp)
+        mints = [fake_address(f"unknown:{i}") for i in range(n)]
+        start = time.perf_counter()
+        found = sum(reader.get_nft(mint) is not None for mint in mints)
+        elapsed = time.perf_counter() - start
+    return {"misses_per_sec": n / elapsed, "found": found}
+
+
+@benchmark
+def cache_collection_walk(scale: float) -> Dict[str, float]:
+    """Cold reads of whole collections from disk: per-mint get_nft vs get_many, then
+    per-read latency of a reader browsing with think time, without and with sibling prefetch"""
+    from src.core.prefetch import CollectionPrefetcher
+
+    think_time = 0.0005
+    collections = [fake_address(f"collection:{i}") for i in range(int(20 * scale))]
+    members = {c: [make_nft(i * 1000 + j, c) for j in range(100)] for i, c in enumerate(collections)}
+    n = sum(len(nfts) for nfts in members.values())
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = NFTCacheManager(tmp)
+        for nfts in members.values():
+            writer.put_many(nfts)
+        writer.save_index()
+
+        def walk(read) -> float:
+            start = time.perf_counter()
+            for nfts in members.values():
+                read([nft.mint for nft in nfts])
+            return n / (time.perf_counter() - start)
+
+        def browse(cache: NFTCacheManager) -> List[float]:
+            # One NFT at a time with a pause between them, so a prefetch can run ahead of the reader
+            samples: List[float] = []
+            for nfts in members.values():
+                for nft in nfts:
+                    start = time.perf_counter()
+                    cache.get_nft(nft.mint)
+                    samples.append(time.perf_counter() - start)
+                    time.sleep(think_time)
+            return samples
+
+        # Alternate the two, each on a fresh cache, so host noise hits both alike; keep the best pass
+        single_rate = batched_rate = 0.0
+        for _ in range(5):
+            single = NFTCacheManager(tmp)
+            single_rate = max(single_rate, walk(lambda mints: [single.get_nft(m) for m in mints]))
+            batched_rate = max(batched_rate, walk(NFTCacheManager(tmp).get_many))
+
+        browsed = browse(NFTCacheManager(tmp))
+        prefetched = NFTCacheManager(tmp)
+        prefetcher = CollectionPrefetcher(prefetched)
+        prefetched_browsed = browse(prefetched)
+        prefetcher.close()
+    return {
+        "single_reads_per_sec": single_rate,
+        "batched_reads_per_sec": batched_rate,
+        **latency_summary(browsed, "browse"),
+        **latency_summary(prefetched_browsed, "prefetched_browse"),
+        "prefetch_accuracy": prefetcher.accuracy,
+    }
+
+
+@benchmark
+def cache_snapshot_restore(scale: float) -> Dict[str, float]:
+    """Warm restart: restore a 100k-NFT metadata snapshot into an empty cache"""
+    from src.core.snapshot import CacheSnapshotter
+
+    n = int(100_000 * scale)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = NFTCacheManager(os.path.join(tmp, "source"))
+        source.load_metadata([make_nft(i) for i in range(n)])
+        CacheSnapshotter(source, os.path.join(tmp, "backups")).snapshot()
+        target = NFTCacheManager(os.path.join(tmp, "target"))
+        start = time.perf_counter()
+        CacheSnapshotter(target, os.path.join(tmp, "backups")).restore()
+        elapsed = time.perf_counter() - start
+        restored = len(target.metadata_cache)
+    return {"restored_per_sec": restored / elapsed, "restored": restored}
+
+
+@benchmark
+def tensor_fanout(scale: float) -> Dict[str, float]:
+    """Concurrent stats/listings fetches over many collections with 20ms RTT and 5% faults"""
+    collections = [fake_address(f"collection:{i}") for i in range(int(200 * scale))]
+
+    async def run():
+        faults = FaultProfile(latency=0.02, jitter=0.005, error_rate=0.02, rate_limit_rate=0.03, seed=1)
+        async with StubTensorServer(faults) as server:
+            samples: List[float] = []
+            async with TensorClient(server.url) as client:
+                start = time.perf_counter()
+                results = await asyncio.gather(*(
+                    _timed(call(c), samples)
+                    for c in collections
+                    for call in (client.get_collection_stats, client.get_nft_listings)
+                ))
+                elapsed = time.perf_counter() - start
+            failed = sum(1 for r in results if not r)
+            return {
+                "requests_per_sec": len(results) / elapsed,
+                **latency_summary(samples),
+                "failed": failed,
+                "rate_limited": server.responses[429],
+            }
+
+    return asyncio.run(run())
+
+
+def _trade_manager(tensor_url: str, rpc_url: str, tmp: str, max_concurrent_trades: int = 5):
+    from src.trading.trade_manager import NFTTradeManager
+
+    manager = NFTTradeManager(None, NFTCacheManager(tmp), rpc_endpoint=rpc_url,
+                              max_concurrent_trades=max_concurrent_trades)
+    manager.tensor_client.api_endpoint = tensor_url
+    return manager
+
+
+async def _close(manager):
+    if manager.tensor_client.session:
+        await manager.tensor_client.session.close()
+    await manager.metadata_resolver.close()
+    await manager.client.close()
+
+
+@benchmark
+def order_throughput(scale: float) -> Dict[str, float]:
+    """Buy orders (floor check + bid) through NFTTradeManager with 10ms RTT"""
+    n = int(200 * scale)
+    collection = fake_address("collection:0")
+    nfts = [make_nft(i, collection) for i in range(n)]
+
+    async def run():
+        faults = FaultProfile(latency=0.01, seed=2)
+        async with StubTensorServer(faults) as tensor, StubRpcServer() as rpc:
+            with tempfile.TemporaryDirectory() as tmp:
+                manager = _trade_manager(tensor.url, rpc.url, tmp)
+                price = tensor.floor_lamports(collection) / 1e9
+                samples: List[float] = []
+                start = time.perf_counter()
+                results = await asyncio.gather(*(_timed(manager.place_buy_order(nft, price), samples) for nft in nfts))
+                elapsed = time.perf_counter() - start
+                await _close(manager)
+        return {"orders_per_sec": n / elapsed, **latency_summary(samples), "filled": sum(results)}
+
+    return asyncio.run(run())
+
+
+@benchmark
+def market_analysis(scale: float) -> Dict[str, float]:
+    """Sequential analyze_market calls (stats + 24h trades) with 5ms RTT"""
+    collections = [fake_address(f"collection:{i}") for i in range(int(100 * scale))]
+
+    async def run():
+        async with StubTensorServer(FaultProfile(latency=0.005, seed=3), trades_per_collection=500) as tensor, \
+                StubRpcServer() as rpc:
+            with tempfile.TemporaryDirectory() as tmp:
+                manager = _trade_manager(tensor.url, rpc.url, tmp)
+                samples: List[float] = []
+                start = time.perf_counter()
+                for collection in collections:
+                    await _timed(manager.analyze_market(collection), samples)
+                elapsed = time.perf_counter() - start
+                await _close(manager)
+        return {"analyses_per_sec": len(collections) / elapsed, **latency_summary(samples)}
+
+    return asyncio.run(run())
+
+
+@benchmark
+def tx_pipeline(scale: float) -> Dict[str, float]:
+    """Sign, send and confirm transfers through TransactionPipeline; 1% of sends are dropped"""
+    from solana.rpc.async_api import AsyncClient
+    from solders.keypair import Keypair
+    from solders.system_program import TransferParams, transfer
+    from src.trading.tx_pipeline import TransactionPipeline
+
+    n = int(500 * scale)
+
+    async def run():
+        async with StubRpcServer(FaultProfile(latency=0.005, seed=4), confirmation_delay=0.4, slot_time=0.01) as rpc:
+            rpc.drop_first = max(1, n // 100)
+            client = AsyncClient(rpc.url)
+            payer, dest = Keypair(), Keypair().pubkey()
+            pipeline = TransactionPipeline(client, [payer], poll_interval=0.1, rebroadcast_interval=0.5,
+                                           blockhash_refresh_interval=0.5)
+            start = time.perf_counter()
+            futures = await pipeline.submit_many([
+                [transfer(TransferParams(from_pubkey=payer.pubkey(), to_pubkey=dest, lamports=i + 1))]
+                for i in range(n)
+            ])
+            results = await asyncio.gather(*futures, return_exceptions=True)
+            elapsed = time.perf_counter() - start
+            await pipeline.stop()
+            await client.close()
+        confirmed = [r for r in results if not isinstance(r, Exception)]
+        return {
+            "tx_per_sec": n / elapsed,
+            **latency_summary([r.latency for r in confirmed], "confirm"),
+            "confirmed": len(confirmed),
+            "status_calls": rpc.requests["getSignatureStatuses"],
+        }
+
+    return asyncio.run(run())
+
+
+@benchmark
+def service_reads(scale: float) -> Dict[str, float]:
+    """Read load on NFTService: 50 concurrent clients over 60 endpoints, half revalidating with ETags"""
+    import aiohttp
+    from src.service import NFTService
+
+    n = int(5000 * scale)
+    clients = 50
+    paths = [f"/api/collections/{fake_address(f'collection:{i}')}/{kind}"
+             for i in range(20) for kind in ("stats", "listings", "trades")]
+
+    async def run():
+        async with StubTensorServer(FaultProfile(latency=0.02, seed=5)) as tensor, StubRpcServer() as rpc:
+            with tempfile.TemporaryDirectory() as tmp:
+                manager = _trade_manager(tensor.url, rpc.url, tmp)
+                samples: List[float] = []
+                etags: Dict[str, str] = {}
+                not_modified = 0
+                async with NFTService(manager.cache_manager, manager) as service, \
+                        aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=clients)) as http:
+
+                    async def client(k: int):
+                        nonlocal not_modified
+                        for i in range(n // clients):
+                            path = paths[(k * 7 + i * 13) % len(paths)]
+                            headers = {"If-None-Match": etags[path]} if k % 2 and path in etags else {}
+                            start = time.perf_counter()
+                            async with http.get(service.url + path, headers=headers) as response:
+                                await response.read()
+                                if response.status == 304:
+                                    not_modified += 1
+                                elif "ETag" in response.headers:
+                                    etags[path] = response.headers["ETag"]
+                            samples.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    await asyncio.gather(*(client(k) for k in range(clients)))
+                    elapsed = time.perf_counter() - start
+        return {
+            "requests_per_sec": len(samples) / elapsed,
+            **latency_summary(samples),
+            "not_modified": not_modified,
+            "upstream_requests": sum(tensor.requests.values()),
+        }
+
+    return asyncio.run(run())
+
+
+@benchmark
+def multi_wallet_orders(scale: float) -> Dict[str, float]:
+    """Buy orders from 8 wallets over 5 shared collections through MultiWalletManager with 10ms RTT"""
+    from anchorpy import Wallet
+    from solders.keypair import Keypair
+    from src.trading.multi_wallet import MultiWalletManager
+    from src.trading.rpc_router import RpcRouter
+    from src.trading.tensor_client import SharedTensorClient
+
+    n = int(400 * scale)
+    collections = [fake_address(f"collection:{i}") for i in range(5)]
+    nfts = [make_nft(i, collections[i % len(collections)]) for i in range(n)]
+
+    async def run():
+        async with StubTensorServer(FaultProfile(latency=0.01, seed=6)) as tensor, StubRpcServer() as rpc:
+            with tempfile.TemporaryDirectory() as tmp:
+                manager = MultiWalletManager(NFTCacheManager(tmp), RpcRouter.from_endpoints([rpc.url]),
+                                             tensor_client=SharedTensorClient(tensor.url), per_wallet_concurrency=4,
+                                             max_concurrent_orders=32)
+                async with manager:
+                    names = [manager.add_wallet(Wallet(Keypair())).name for _ in range(8)]
+                    samples: List[float] = []
+                    start = time.perf_counter()
+                    futures = [await manager.submit_order(names[i % len(names)], "buy", nft,
+                                                          tensor.floor_lamports(nft.collection["address"]) / 1e9)
+                               for i, nft in enumerate(nfts)]
+                    results = await asyncio.gather(*(_timed(future, samples) for future in futures))
+                    elapsed = time.perf_counter() - start
+        return {
+            "orders_per_sec": n / elapsed,
+            **latency_summary(samples),
+            "filled": sum(results),
+            "upstream_reads": tensor.requests["stats"] + tensor.requests["trades"],
+        }
+
+    return asyncio.run(run())
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """Describe every metric that regressed by more than ``tolerance`` (a fraction)"""
+    regressions = []
+    for name, metrics in results.items():
+        if name in UNGATED:
+            continue
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if not base or metric.endswith("_p99_ms"):
+                continue
+            if metric.endswith("_per_sec") and value < base * (1 - tolerance):
+                regressions.append(f"{name}.{metric}: {value:.1f} < baseline {base:.1f}")
+            elif metric.endswith("_ms") and value > base * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {value:.2f} > baseline {base:.2f}")
+    return regressions
+
+
+def compare_ratios(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                   tolerance: float) -> List[str]:
+    """Describe every ``RATIOS`` entry below its floor or shrunk by more than ``tolerance`` (a fraction)"""
+    regressions = []
+    for name, metric, reference, floor in RATIOS:
+        current, base = results.get(name, {}), baseline.get(name, {})
+        if not (current.get(metric) and current.get(reference)):
+            continue
+        ratio = current[metric] / current[reference]
+        if ratio < floor:
+            regressions.append(f"{name}.{metric}/{reference}: {ratio:.2f}x < floor {floor:.2f}x")
+        elif base.get(metric) and base.get(reference):
+            base_ratio = base[metric] / base[reference]
+            if ratio < base_ratio * (1 - tolerance):
+                regressions.append(f"{name}.{metric}/{reference}: {ratio:.2f}x < baseline {base_ratio:.2f}x")
+    return regressions
+
+
+def host_info() -> Dict:
+    """What absolute results depend on; they are only compared between equal hosts"""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return {
+        "python": ".".join(platform.python_version_tuple()[:2]),
+        "machine": platform.machine(),
+        "cpu": cpu,
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(names: List[str], scale: float, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Run each benchmark ``repeat`` times and keep the best run per metric direction"""
+    results = {}
+    for name in names:
+        runs = [BENCHMARKS[name](scale) for _ in range(repeat)]
+        merged = {}
+        for metric in runs[0]:
+            values = [r[metric] for r in runs]
+            merged[metric] = min(values) if metric.endswith("_ms") else max(values)
+        results[name] = merged
+        print(f"{name:20} " + "  ".join(f"{k}={v:,.2f}" for k, v in merged.items()))
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the NFT manager benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply workload sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the best is kept")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression as a fraction")
+    parser.add_argument("--update-baseline", action="store_true", help="overwrite the baseline with these results")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    results = run(args.only or list(BENCHMARKS), args.scale, args.repeat)
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "host": host_info(),
+        "scale": args.scale,
+        "results": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        previous = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else {}
+        baseline = {**report, "results": {**previous, **results}}
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("scale", 1.0) != args.scale:
+        print(f"Baseline was recorded at scale {baseline.get('scale')}; skipping comparison")
+        return 0
+    regressions = compare_ratios(results, baseline["results"], args.tolerance)
+    if baseline.get("host") == report["host"]:
+        regressions += compare(results, baseline["results"], args.tolerance)
+    else:
+        print(f"Baseline was recorded on {baseline.get('host')}, this is {report['host']}; "
+              f"comparing only within-run ratios")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
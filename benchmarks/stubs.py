@@ -0,0 +1,362 @@
+"""Local stand-ins for the Tensor API, Solana JSON-RPC and IPFS/Arweave gateways.
+
+All servers run on 127.0.0.1 with an ephemeral port, serve deterministic
+data, and apply a :class:`FaultProfile` to every request so benchmarks and
+tests can inject latency, server errors and 429 rate limiting.
+"""
+from typing import Dict, List, Optional
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
+import asyncio
+import base64
+import hashlib
+import random
+import time
+from aiohttp import web
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def b58encode(data: bytes) -> str:
+    """Base58 (Bitcoin alphabet) encoding, as used for Solana keys and signatures"""
+    n = int.from_bytes(data, "big")
+    out = ""
+    while n:
+        n, r = divmod(n, 58)
+        out = _B58_ALPHABET[r] + out
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + out
+
+
+def fake_address(seed: str) -> str:
+    """Deterministic 32-byte base58 address for ``seed``"""
+    return b58encode(hashlib.sha256(seed.encode()).digest())
+
+
+@dataclass
+class FaultProfile:
+    """Per-request latency and failure injection
+
+    ``latency`` plus uniform ``jitter`` is added to every request; then the
+    request fails with HTTP 429 with probability ``rate_limit_rate`` or with
+    HTTP 500 with probability ``error_rate``.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    seed: int = 0
+
+
+class _StubServer(ABC):
+    """Shared aiohttp plumbing: fault injection, request accounting, start/stop"""
+
+    def __init__(self, faults: Optional[FaultProfile] = None):
+        self.faults = faults or FaultProfile()
+        self.requests: Counter = Counter()
+        self.responses: Counter = Counter()
+        self._rng = random.Random(self.faults.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    @abstractmethod
+    def _build_app(self) -> web.Application:
+        """The routes this stand-in serves"""
+
+    @web.middleware
+    async def _fault_middleware(self, request: web.Request, handler):
+        faults = self.faults
+        delay = faults.latency + (self._rng.uniform(0, faults.jitter) if faults.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self._rng.random()
+        if roll < faults.rate_limit_rate:
+            response = web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": "1"})
+        elif roll < faults.rate_limit_rate + faults.error_rate:
+            response = web.json_response({"error": "internal error"}, status=500)
+        else:
+            response = await handler(request)
+        self.responses[response.status] += 1
+        return response
+
+    async def start(self) -> "_StubServer":
+        app = self._build_app()
+        app.middlewares.append(self._fault_middleware)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+
+class StubTensorServer(_StubServer):
+    """Serves the Tensor endpoints used by :class:`TensorClient`
+
+    Every collection has ``listings_per_collection`` listings and
+    ``trades_per_collection`` trades with prices around a floor derived from
+    the collection address, so repeated runs see identical data. Mints in
+    ``missing_mints`` answer 404.
+    """
+
+    def __init__(self, faults: Optional[FaultProfile] = None,
+                 listings_per_collection: int = 50, trades_per_collection: int = 100):
+        super().__init__(faults)
+        self.listings_per_collection = listings_per_collection
+        self.trades_per_collection = trades_per_collection
+        self.bids: List[Dict] = []
+        self.listings: Dict[str, int] = {}
+        self.missing_mints: set = set()
+
+    @staticmethod
+    def floor_lamports(collection: str) -> int:
+        return int.from_bytes(hashlib.sha256(collection.encode()).digest()[:2], "big") * 100_000 + 100_000_000
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v1/collections/{collection}/stats", self._stats)
+        app.router.add_get("/v1/collections/{collection}/listings", self._listings)
+        app.router.add_get("/v1/collections/{collection}/trades", self._trades)
+        app.router.add_get("/v1/nfts/{mint}", self._nft)
+        app.router.add_post("/v1/nfts/{mint}/bids", self._bid)
+        app.router.add_post("/v1/nfts/{mint}/listings", self._create_listing)
+        app.router.add_post("/v1/nfts/{mint}/listings/cancel", self._cancel_listing)
+        return app
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        self.requests["stats"] += 1
+        floor = self.floor_lamports(request.match_info["collection"])
+        return web.json_response({
+            "floor_price": floor,
+            "volume_24h": floor * self.trades_per_collection,
+            "listed_count": self.listings_per_collection,
+            "avg_price_24h": int(floor * 1.05),
+            "market_cap": floor * 10_000,
+        })
+
+    async def _listings(self, request: web.Request) -> web.Response:
+        self.requests["listings"] += 1
+        collection = request.match_info["collection"]
+        floor = self.floor_lamports(collection)
+        now = int(time.time())
+        return web.json_response({"listings": [{
+            "mint": fake_address(f"{collection}:{i}"),
+            "price": floor + i * 1_000_000,
+            "seller": fake_address(f"seller:{i}"),
+            "attributes": {"rank": i},
+            "rarity_rank": i + 1,
+            "listed_at": now - i * 60,
+        } for i in range(self.listings_per_collection)]})
+
+    async def _trades(self, request: web.Request) -> web.Response:
+        self.requests["trades"] += 1
+        collection = request.match_info["collection"]
+        floor = self.floor_lamports(collection)
+        end = int(request.query.get("to", time.time()))
+        return web.json_response({"trades": [{
+            "mint": fake_address(f"{collection}:{i}"),
+            "price": floor + (i % 10) * 2_000_000,
+            "buyer": fake_address(f"buyer:{i}"),
+            "seller": fake_address(f"seller:{i}"),
+            "timestamp": end - i * 30,
+            "signature": b58encode(hashlib.sha512(f"{collection}:trade:{i}".encode()).digest()),
+        } for i in range(self.trades_per_collection)]})
+
+    async def _nft(self, request: web.Request) -> web.Response:
+        self.requests["nft"] += 1
+        mint = request.match_info["mint"]
+        if mint in self.missing_mints:
+            return web.json_response({"error": "NFT not found"}, status=404)
+        return web.json_response({
+            "mint": mint,
+            "name": f"NFT {mint[:6]}",
+            "collection": {"address": fake_address("collection:0")},
+            "attributes": [{"trait_type": "Background", "value": "Blue"}],
+            "rarity_rank": 1,
+            "image_url": f"https://example.invalid/{mint}.png",
+            "last_sale": {"price": 1_000_000_000},
+        })
+
+    async def _bid(self, request: web.Request) -> web.Response:
+        self.requests["bid"] += 1
+        payload = await request.json()
+        mint = request.match_info["mint"]
+        self.bids.append({"mint": mint, **payload})
+        digest = hashlib.sha512(f"bid:{mint}:{len(self.bids)}".encode()).digest()
+        return web.json_response({"signature": b58encode(digest)})
+
+    async def _create_listing(self, request: web.Request) -> web.Response:
+        self.requests["create_listing"] += 1
+        payload = await request.json()
+        mint = request.match_info["mint"]
+        self.listings[mint] = payload["price"]
+        return web.json_response({"signature": b58encode(hashlib.sha512(f"list:{mint}".encode()).digest())})
+
+    async def _cancel_listing(self, request: web.Request) -> web.Response:
+        self.requests["cancel_listing"] += 1
+        self.listings.pop(request.match_info["mint"], None)
+        return web.json_response({})
+
+
+class StubRpcServer(_StubServer):
+    """Minimal Solana JSON-RPC endpoint, including batch requests
+
+    ``sendTransaction`` records the transaction's first signature; that
+    signature reports ``confirmed`` from ``getSignatureStatuses`` once
+    ``confirmation_delay`` seconds have passed, and ``finalized`` after twice
+    that. Signatures listed in ``dropped`` are never seen by the cluster, and
+    the first ``drop_first`` distinct signatures sent are added to it.
+    Blockhashes stay valid for 150 slots of ``slot_time`` seconds. Every
+    owner holds ``nfts_per_owner`` NFTs plus one fungible token account.
+    """
+
+    def __init__(self, faults: Optional[FaultProfile] = None, confirmation_delay: float = 0.0,
+                 slot_time: float = 0.4, nfts_per_owner: int = 4):
+        super().__init__(faults)
+        self.confirmation_delay = confirmation_delay
+        self.slot_time = slot_time
+        self.nfts_per_owner = nfts_per_owner
+        self.transactions: Dict[str, float] = {}
+        self.dropped: set = set()
+        self.drop_first = 0
+        self._started_at = time.monotonic()
+
+    @property
+    def slot(self) -> int:
+        return 1_000 + int((time.monotonic() - self._started_at) / self.slot_time)
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/", self._handle)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if isinstance(body, list):
+            return web.json_response([self._dispatch(call) for call in body])
+        return web.json_response(self._dispatch(body))
+
+    def _dispatch(self, call: Dict) -> Dict:
+        method = call.get("method", "")
+        self.requests[method] += 1
+        handler = getattr(self, f"_rpc_{method}", None)
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": call.get("id"),
+                    "error": {"code": -32601, "message": f"Method not found: {method}"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": handler(call.get("params") or [])}
+
+    def _context(self, value):
+        return {"context": {"slot": self.slot}, "value": value}
+
+    def _rpc_getSlot(self, params):
+        return self.slot
+
+    def _rpc_getBlockHeight(self, params):
+        return self.slot
+
+    def _rpc_getLatestBlockhash(self, params):
+        slot = self.slot
+        return self._context({
+            "blockhash": b58encode(hashlib.sha256(f"blockhash:{slot // 4}".encode()).digest()),
+            "lastValidBlockHeight": slot + 150,
+        })
+
+    def _rpc_getBalance(self, params):
+        return self._context(1_000_000_000)
+
+    def _rpc_getAccountInfo(self, params):
+        return self._context(None)
+
+    def _rpc_getTokenAccountsByOwner(self, params):
+        owner = params[0]
+        holdings = [(fake_address(f"{owner}:nft:{i}"), "1", 0) for i in range(self.nfts_per_owner)]
+        holdings.append((fake_address("usdc"), "2500000", 6))
+        return self._context([{
+            "pubkey": fake_address(f"{owner}:account:{mint}"),
+            "account": {
+                "data": {
+                    "program": "spl-token",
+                    "parsed": {"type": "account", "info": {
+                        "mint": mint, "owner": owner, "isNative": False, "state": "initialized",
+                        "tokenAmount": {"amount": amount, "decimals": decimals,
+                                        "uiAmount": int(amount) / 10 ** decimals,
+                                        "uiAmountString": str(int(amount) / 10 ** decimals)},
+                    }},
+                    "space": 165,
+                },
+                "executable": False,
+                "lamports": 2_039_280,
+                "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+                "rentEpoch": 0,
+            },
+        } for mint, amount, decimals in holdings])
+
+    def _rpc_sendTransaction(self, params):
+        raw = base64.b64decode(params[0])
+        signature = b58encode(raw[1:65])
+        if self.drop_first > 0 and signature not in self.transactions and signature not in self.dropped:
+            self.dropped.add(signature)
+            self.drop_first -= 1
+        if signature not in self.dropped:
+            self.transactions.setdefault(signature, time.monotonic())
+        return signature
+
+    def _rpc_getSignatureStatuses(self, params):
+        now = time.monotonic()
+        statuses = []
+        for signature in params[0]:
+            sent = self.transactions.get(signature)
+            if sent is None:
+                statuses.append(None)
+                continue
+            age = now - sent
+            if age >= 2 * self.confirmation_delay and self.confirmation_delay:
+                status, confirmations = "finalized", None
+            elif age >= self.confirmation_delay:
+                status, confirmations = "confirmed", 1
+            else:
+                status, confirmations = "processed", 0
+            statuses.append({"slot": self.slot, "confirmations": confirmations, "err": None,
+                             "status": {"Ok": None}, "confirmationStatus": status})
+        return self._context(statuses)
+
+
+class StubGatewayServer(_StubServer):
+    """An IPFS/Arweave-style gateway serving documents by path
+
+    ``documents`` maps a path such as ``ipfs/<cid>/meta.json`` or ``<txid>``
+    to the body: ``bytes`` are served as-is, anything else as JSON. Other
+    paths are a 404.
+    """
+
+    def __init__(self, documents: Dict[str, object], faults: Optional[FaultProfile] = None):
+        super().__init__(faults)
+        self.documents = documents
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/{path:.*}", self._get)
+        return app
+
+    async def _get(self, request: web.Request) -> web.Response:
+        path = request.match_info["path"]
+        self.requests[path] += 1
+        if path not in self.documents:
+            return web.json_response({"error": "not found"}, status=404)
+        document = self.documents[path]
+        if isinstance(document, bytes):
+            return web.Response(body=document, content_type="application/octet-stream")
+        return web.json_response(document)
@@ -1,20 +1,36 @@
 """Solana NFT Manager package for managing and tracking NFTs on Solana."""
 
+import importlib
+
 __version__ = "0.1.0"
 __author__ = "manokai"
 __license__ = "MIT"
 
-from .core.nft_cache import NFTCacheManager, NFTMetadata
-from .trading.trade_manager import NFTTradeManager, MarketMetrics
-from .gui.main_window import launch_gui
-from .main import main, NFTManager
-
-__all__ = [
-    "NFTCacheManager",
-    "NFTMetadata",
-    "NFTTradeManager",
-    "MarketMetrics",
-    "launch_gui",
-    "main",
-    "NFTManager",
-]
+# Public names are resolved on first access so that importing the package (or a
+# headless submodule) does not pull in PyQt5, solana, anchorpy or numpy.
+_LAZY_IMPORTS = {
+    "NFTCacheManager": ".core.nft_cache",
+    "NFTMetadata": ".core.nft_cache",
+    "TradeStore": ".core.trade_store",
+    "AnalyticsExecutor": ".core.executor",
+    "NFTTradeManager": ".trading.trade_manager",
+    "MarketMetrics": ".trading.trade_manager",
+    "launch_gui": ".gui.main_window",
+    "main": ".main",
+    "NFTManager": ".main",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -7,10 +7,6 @@ import json
 from pathlib import Path
 from typing import Dict, Optional, List
 from dataclasses import dataclass, field
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 # Base directory for the application
 BASE_DIR = Path(__file__).parent.parent.absolute()
@@ -18,15 +14,41 @@ CACHE_DIR = BASE_DIR / "cache"
 LOG_DIR = BASE_DIR / "logs"
 DATA_DIR = BASE_DIR / "data"
 
-# Create necessary directories
-for directory in [CACHE_DIR, LOG_DIR, DATA_DIR]:
-    directory.mkdir(parents=True, exist_ok=True)
+_env_loaded = False
+_directories_created = False
+
+
+def load_environment():
+    """Load variables from .env once; safe to call repeatedly"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def ensure_directories():
+    """Create the cache, log and data directories once"""
+    global _directories_created
+    if not _directories_created:
+        for directory in [CACHE_DIR, LOG_DIR, DATA_DIR]:
+            directory.mkdir(parents=True, exist_ok=True)
+        _directories_created = True
+
+
+def _env(name: str, default: Optional[str] = None):
+    """Default factory reading an environment variable when a section is built"""
+    def factory():
+        load_environment()
+        return os.getenv(name, default)
+    return factory
+
 
 @dataclass
 class SolanaConfig:
     RPC_ENDPOINTS: List[str] = field(default_factory=lambda: [
-        os.getenv('SOLANA_RPC_ENDPOINT', 'https://api.mainnet-beta.solana.com'),
-        os.getenv('SOLANA_BACKUP_RPC', 'https://solana-api.projectserum.com'),
+        _env('SOLANA_RPC_ENDPOINT', 'https://api.mainnet-beta.solana.com')(),
+        _env('SOLANA_BACKUP_RPC', 'https://solana-api.projectserum.com')(),
     ])
     COMMITMENT: str = 'confirmed'
     TIMEOUT: int = 30
@@ -34,10 +56,10 @@ class SolanaConfig:
     RETRY_DELAY: int = 1
     PREFLIGHT_COMMITMENT: str = 'processed'
     TRANSACTION_TIMEOUT: int = 60
-    WEBSOCKET_ENDPOINT: str = os.getenv(
+    WEBSOCKET_ENDPOINT: str = field(default_factory=_env(
         'SOLANA_WS_ENDPOINT',
         'wss://api.mainnet-beta.solana.com'
-    )
+    ))
 
 @dataclass
 class TensorConfig:
@@ -50,19 +72,27 @@ class TensorConfig:
         "get_collections": "collections/",
         "get_activities": "activities/"
     })
-    API_KEY: Optional[str] = os.getenv('TENSOR_API_KEY')
+    API_KEY: Optional[str] = field(default_factory=_env('TENSOR_API_KEY'))
     RATE_LIMIT: int = 100  # requests per minute
     CACHE_TTL: int = 300  # 5 minutes
 
 @dataclass
 class WalletConfig:
-    ADDRESS: str = os.getenv(
+    ADDRESS: str = field(default_factory=_env(
         'WALLET_ADDRESS',
         "5DoTMq5ZLhfUUeJKdfwMGGTzaLUhog5UJHQpq2TqsRyu"
-    )
-    KEY_PATH: Optional[str] = os.getenv('WALLET_KEY_PATH')
-    AUTO_APPROVE_BELOW: float = float(os.getenv('AUTO_APPROVE_BELOW', '0.1'))
-    TRANSACTION_SIGNING_MODE: str = os.getenv('SIGNING_MODE', 'local')
+    ))
+    KEY_PATH: Optional[str] = field(default_factory=_env('WALLET_KEY_PATH'))
+    AUTO_APPROVE_BELOW: float = field(default_factory=lambda: float(_env('AUTO_APPROVE_BELOW', '0.1')()))
+    TRANSACTION_SIGNING_MODE: str = field(default_factory=_env('SIGNING_MODE', 'local'))
+    # Additional keypairs for multi-wallet trading, comma separated
+    KEY_PATHS: List[str] = field(default_factory=lambda: [
+        path for path in _env('WALLET_KEY_PATHS', '')().split(',') if path
+    ])
+    ORDERS_PER_WALLET: int = 2  # concurrent orders one wallet may have in progress
+    MAX_CONCURRENT_ORDERS: int = 16  # across all wallets
+    SYNC_CONCURRENCY: int = 8  # NFT lookups in flight during portfolio syncs
+    SHARED_READ_TTL: float = 2.0  # seconds wallets reuse each other's collection reads
 
 @dataclass
 class PerformanceConfig:
@@ -81,10 +111,14 @@ class PerformanceConfig:
 class GUIConfig:
     ITEMS_PER_PAGE: int = 50
     REFRESH_INTERVAL: int = 30000  # 30 seconds in milliseconds
-    THEME: str = os.getenv('GUI_THEME', 'dark')
+    THEME: str = field(default_factory=_env('GUI_THEME', 'dark'))
     WINDOW_SIZE: tuple = (1024, 768)
     FONT_SIZE: int = 10
     TABLE_ROW_HEIGHT: int = 30
+    THUMBNAIL_SIZE: int = 64  # pixels; thumbnails are square and padded
+    THUMBNAIL_CACHE_MB: int = 256
+    THUMBNAIL_DOWNLOADS: int = 16  # concurrent image downloads
+    THUMBNAIL_WORKERS: int = 4  # decode/resize threads
     ENABLE_ANIMATIONS: bool = True
     CUSTOM_STYLES: Dict = field(default_factory=lambda: {
         'dark': {
@@ -105,19 +139,55 @@ class MonitoringConfig:
     PROMETHEUS_PORT: int = 9090
     ENABLE_OPENTELEMETRY: bool = True
     METRICS_INTERVAL: int = 60  # seconds
-    LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_LEVEL: str = field(default_factory=_env('LOG_LEVEL', 'INFO'))
     ENABLE_PERFORMANCE_LOGGING: bool = True
     TRACE_SLOW_OPERATIONS: bool = True
     SLOW_OPERATION_THRESHOLD: float = 1.0  # seconds
 
 @dataclass
 class CacheConfig:
-    ENABLE_REDIS: bool = bool(os.getenv('ENABLE_REDIS', 'false').lower() == 'true')
-    REDIS_URL: str = os.getenv('REDIS_URL', 'redis://localhost:6379')
+    ENABLE_REDIS: bool = field(default_factory=lambda: _env('ENABLE_REDIS', 'false')().lower() == 'true')
+    REDIS_URL: str = field(default_factory=_env('REDIS_URL', 'redis://localhost:6379'))
     LOCAL_CACHE_SIZE: int = 10000
     METADATA_CACHE_TTL: int = 3600  # 1 hour
     MARKET_DATA_CACHE_TTL: int = 300  # 5 minutes
     COLLECTION_CACHE_TTL: int = 1800  # 30 minutes
+    PRICE_HISTORY_LENGTH: int = 64  # price points kept per mint
+    PRICE_HISTORY_MAX_MINTS: int = 100000  # rows grow on demand; ~150 MB when full at 64 points per mint
+    NEGATIVE_CACHE_TTL: int = 300  # seconds a mint Tensor reported missing is not re-fetched
+    PRESENCE_FILTER_ERROR_RATE: float = 0.01  # false positives cost one failed disk open
+    PREFETCH_SIBLINGS: int = 200  # cached NFTs of the same collection loaded when one is read
+    PREFETCH_COOLDOWN: int = 60  # seconds between prefetches of one collection
+
+@dataclass
+class MetadataConfig:
+    IPFS_GATEWAYS: List[str] = field(default_factory=lambda: [
+        'https://ipfs.io/ipfs/',
+        'https://cloudflare-ipfs.com/ipfs/',
+        'https://nftstorage.link/ipfs/',
+    ])
+    ARWEAVE_GATEWAYS: List[str] = field(default_factory=lambda: [
+        'https://arweave.net/',
+        'https://ar-io.net/',
+    ])
+    MAX_CONCURRENT_FETCHES: int = 32
+    FETCH_TIMEOUT: float = 10.0  # seconds per gateway request
+    HEDGE_DELAY: float = 0.25  # seconds before racing the next gateway
+    NEGATIVE_CACHE_TTL: int = 21600  # 6 hours for dead links
+    HTTP_CACHE_TTL: int = 604800  # 7 days for plain http(s) URIs; IPFS/Arweave never expire
+    MAX_DOCUMENT_BYTES: int = 1024 * 1024
+
+@dataclass
+class ServiceConfig:
+    HOST: str = field(default_factory=_env('SERVICE_HOST', '127.0.0.1'))
+    PORT: int = field(default_factory=lambda: int(_env('SERVICE_PORT', '8700')()))
+    RESPONSE_CACHE_SIZE: int = 4096  # cached response bodies
+    NFT_TTL: float = 60.0  # seconds responses may be reused
+    MARKET_TTL: float = 5.0
+    PRICE_TTL: float = 2.0
+    POLL_INTERVAL: float = 30.0  # market poller interval for watched collections
+    STREAM_MIN_INTERVAL: float = 0.1  # per-client WebSocket delivery rate limit
+    STREAM_QUEUE_SIZE: int = 1000  # events buffered per slow WebSocket client
 
 @dataclass
 class BackupConfig:
@@ -136,6 +206,8 @@ class Config:
         self.GUI = GUIConfig()
         self.MONITORING = MonitoringConfig()
         self.CACHE = CacheConfig()
+        self.METADATA = MetadataConfig()
+        self.SERVICE = ServiceConfig()
         self.BACKUP = BackupConfig()
 
     def save_to_file(self, filepath: str):
@@ -162,31 +234,52 @@ class Config:
                         setattr(section_instance, key, value)
         return config
 
-# Create global configuration instance
-config = Config()
-
-# Logging configuration
-LOG_CONFIG = {
-    "handlers": [
-        {
-            "sink": LOG_DIR / "app.log",
-            "rotation": "100 MB",
-            "compression": "zip",
-            "retention": "1 week",
-            "level": config.MONITORING.LOG_LEVEL,
-            "format": "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} | {message}"
-        },
-        {
-            "sink": LOG_DIR / "error.log",
-            "rotation": "50 MB",
-            "compression": "zip",
-            "retention": "2 weeks",
-            "level": "ERROR",
-            "format": "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} | {message}\n{exception}"
+_config: Optional[Config] = None
+
+
+def get_config() -> Config:
+    """Return the global configuration, loading .env and creating directories on first use"""
+    global _config
+    if _config is None:
+        load_environment()
+        ensure_directories()
+        _config = Config()
+    return _config
+
+
+def get_log_config() -> Dict:
+    """Build the loguru configuration from the current settings"""
+    return {
+        "handlers": [
+            {
+                "sink": LOG_DIR / "app.log",
+                "rotation": "100 MB",
+                "compression": "zip",
+                "retention": "1 week",
+                "level": get_config().MONITORING.LOG_LEVEL,
+                "format": "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} | {message}"
+            },
+            {
+                "sink": LOG_DIR / "error.log",
+                "rotation": "50 MB",
+                "compression": "zip",
+                "retention": "2 weeks",
+                "level": "ERROR",
+                "format": "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} | {message}\n{exception}"
+            }
+        ],
+        "extra": {
+            "app_name": "solana_nft_manager",
+            "version": "1.0.0"
         }
-    ],
-    "extra": {
-        "app_name": "solana_nft_manager",
-        "version": "1.0.0"
     }
-} 
\ No newline at end of file
+
+
+def __getattr__(name):
+    # ``config`` and ``LOG_CONFIG`` are built on first access so that importing
+    # this module has no side effects (no .env parsing, no mkdir)
+    if name == "config":
+        return get_config()
+    if name == "LOG_CONFIG":
+        return get_log_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,152 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+import asyncio
+import threading
+import time
+from loguru import logger
+
+# Runs fn after `delay` seconds on the consumer's own thread or loop
+Scheduler = Callable[[float, Callable[[], None]], None]
+
+
+def thread_scheduler(delay: float, fn: Callable[[], None]):
+    """Deliver inline on the publishing thread, or from a timer thread when throttled"""
+    if delay <= 0:
+        fn()
+    else:
+        timer = threading.Timer(delay, fn)
+        timer.daemon = True
+        timer.start()
+
+
+def asyncio_scheduler(loop: asyncio.AbstractEventLoop) -> Scheduler:
+    """Deliver on an asyncio loop, safe to call from any thread"""
+    def schedule(delay: float, fn: Callable[[], None]):
+        loop.call_soon_threadsafe(loop.call_later, max(delay, 0), fn)
+    return schedule
+
+
+class Subscription:
+    """One consumer's view of the bus: its topics, queue and delivery rate
+
+    While a delivery is pending, further events are queued; with ``coalesce``
+    only the newest payload per topic (and key) is kept, so a burst of updates
+    collapses into one callback per topic. Deliveries are at least
+    ``min_interval`` seconds apart.
+    """
+
+    def __init__(self,
+                 bus: 'EventBus',
+                 topics: List[str],
+                 callback: Callable[[str, Any], None],
+                 min_interval: float = 0.0,
+                 coalesce: bool = True,
+                 scheduler: Optional[Scheduler] = None):
+        self.bus = bus
+        self.topics = topics
+        self.callback = callback
+        self.min_interval = min_interval
+        self.coalesce = coalesce
+        self.scheduler = scheduler or thread_scheduler
+
+        self._lock = threading.Lock()
+        self._pending: Union[Dict[Tuple[str, Hashable], Any], List[Tuple[str, Any]]] = {} if coalesce else []
+        self._scheduled = False
+        self._last_delivery = 0.0
+        self.delivered = 0
+        self.coalesced = 0
+
+    def matches(self, topic: str) -> bool:
+        return any(
+            topic.startswith(t[:-1]) if t.endswith('*') else topic == t
+            for t in self.topics
+        )
+
+    def offer(self, topic: str, payload: Any, key: Hashable = None):
+        with self._lock:
+            if self.coalesce:
+                if (topic, key) in self._pending:
+                    self.coalesced += 1
+                self._pending[(topic, key)] = payload
+            else:
+                self._pending.append((topic, payload))
+
+            if self._scheduled:
+                return
+            self._scheduled = True
+            delay = self._last_delivery + self.min_interval - time.monotonic()
+
+        self.scheduler(delay, self._flush)
+
+    def _flush(self):
+        with self._lock:
+            pending = self._pending
+            self._pending = {} if self.coalesce else []
+            self._scheduled = False
+            self._last_delivery = time.monotonic()
+
+        items = [(topic, payload) for (topic, _), payload in pending.items()] if self.coalesce else pending
+        for topic, payload in items:
+            try:
+                self.callback(topic, payload)
+                self.delivered += 1
+            except Exception as e:
+                logger.error(f"Error delivering {topic} event: {e}")
+
+    def cancel(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Thread-safe publish/subscribe hub for state changes
+
+    Unkeyed topics describe current state (e.g. ``trading.stats``): publishing
+    a payload equal to the last one is dropped, and new subscribers receive the
+    last value immediately. Keyed events (e.g. a price update per mint) are
+    always delivered and coalesce per key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: List[Subscription] = []
+        self._last: Dict[str, Any] = {}
+
+    def publish(self, topic: str, payload: Any, key: Hashable = None):
+        with self._lock:
+            if key is None:
+                if topic in self._last and self._last[topic] == payload:
+                    return
+                self._last[topic] = payload
+            subscribers = [s for s in self._subscriptions if s.matches(topic)]
+
+        for subscription in subscribers:
+            subscription.offer(topic, payload, key)
+
+    def subscribe(self,
+                  topics: Union[str, List[str]],
+                  callback: Callable[[str, Any], None],
+                  min_interval: float = 0.0,
+                  coalesce: bool = True,
+                  scheduler: Optional[Scheduler] = None,
+                  replay_last: bool = True) -> Subscription:
+        """Subscribe to topics; a trailing ``*`` matches any topic with that prefix"""
+        subscription = Subscription(
+            self, [topics] if isinstance(topics, str) else list(topics),
+            callback, min_interval, coalesce, scheduler,
+        )
+        with self._lock:
+            self._subscriptions.append(subscription)
+            current = [(t, p) for t, p in self._last.items() if subscription.matches(t)] if replay_last else []
+
+        for topic, payload in current:
+            subscription.offer(topic, payload)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def last(self, topic: str) -> Optional[Any]:
+        """Most recent payload published on an unkeyed topic"""
+        with self._lock:
+            return self._last.get(topic)
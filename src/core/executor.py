@@ -0,0 +1,192 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram
+
+JOBS_PENDING = Gauge('nft_analytics_jobs_pending', 'Analytics jobs submitted and not yet finished')
+JOBS_CANCELLED = Counter('nft_analytics_jobs_cancelled', 'Analytics jobs cancelled before completion')
+JOBS_FAILED = Counter('nft_analytics_jobs_failed', 'Analytics jobs that raised in a worker')
+QUEUE_WAIT = Histogram('nft_analytics_queue_wait_seconds', 'Time analytics jobs wait for a worker')
+RUN_TIME = Histogram('nft_analytics_run_seconds', 'Time analytics jobs spend running in a worker')
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Handle to a NumPy array living in a named shared-memory block"""
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> Tuple['SharedArray', shared_memory.SharedMemory]:
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        return cls(shm.name, array.shape, array.dtype.str), shm
+
+    def attach(self) -> Tuple[np.ndarray, shared_memory.SharedMemory]:
+        shm = shared_memory.SharedMemory(name=self.name)
+        return np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf), shm
+
+
+def _invoke(fn: Callable, args: tuple, kwargs: dict, shm_threshold: int) -> Tuple[Any, float, float]:
+    # Worker side: map shared arrays back to ndarrays, run, and ship large results back the same way
+    started = time.time()
+    attached: List[shared_memory.SharedMemory] = []
+    views: List[np.ndarray] = []
+
+    def unwrap(value):
+        if isinstance(value, SharedArray):
+            array, shm = value.attach()
+            attached.append(shm)
+            views.append(array)
+            return array
+        return value
+
+    try:
+        result = fn(*[unwrap(a) for a in args], **{k: unwrap(v) for k, v in kwargs.items()})
+        if isinstance(result, np.ndarray):
+            if result.nbytes >= shm_threshold:
+                handle, shm = SharedArray.create(result)
+                shm.close()
+                result = handle
+            elif any(np.shares_memory(result, view) for view in views):
+                # A view into an input block would dangle once the block is closed
+                result = result.copy()
+        return result, started, time.time()
+    finally:
+        for shm in attached:
+            shm.close()
+
+
+class AnalyticsExecutor:
+    """Runs CPU-bound analytics in a process pool so the asyncio loop stays free
+
+    NumPy arguments at or above ``shm_threshold`` bytes are copied once into
+    shared memory and mapped by the worker instead of being pickled through the
+    pool's pipe; large array results come back the same way. Awaiting callers
+    may be cancelled: queued jobs are dropped, running jobs finish in the
+    worker but their result is discarded.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, shm_threshold: int = 1024 * 1024):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Spawned workers avoid forking a process that already runs event-loop threads
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+        self.shm_threshold = shm_threshold
+        # _on_done runs on the pool's management thread, so the counter needs a lock
+        self._pending_lock = threading.Lock()
+        self._pending = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.queue_wait = 0.0
+        self.run_time = 0.0
+        logger.info(f"Analytics executor started with {self.max_workers} workers")
+
+    async def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` in a worker process and await the result"""
+        blocks: List[shared_memory.SharedMemory] = []
+
+        def wrap(value):
+            if isinstance(value, np.ndarray) and value.nbytes >= self.shm_threshold:
+                handle, shm = SharedArray.create(value)
+                blocks.append(shm)
+                return handle
+            return value
+
+        submitted = time.time()
+        try:
+            future = self.pool.submit(
+                _invoke, fn,
+                tuple(wrap(a) for a in args),
+                {k: wrap(v) for k, v in kwargs.items()},
+                self.shm_threshold,
+            )
+        except Exception:
+            self._release(blocks)
+            raise
+
+        with self._pending_lock:
+            self._pending += 1
+        JOBS_PENDING.inc()
+        # Input blocks live until the worker is done with them, even if the caller goes away
+        future.add_done_callback(functools.partial(self._on_done, blocks))
+        try:
+            result, started, finished = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancel():
+                future.add_done_callback(self._discard_result)
+            self.cancelled += 1
+            JOBS_CANCELLED.inc()
+            raise
+        except Exception:
+            self.failed += 1
+            JOBS_FAILED.inc()
+            raise
+
+        self.queue_wait += max(0.0, started - submitted)
+        self.run_time += finished - started
+        QUEUE_WAIT.observe(max(0.0, started - submitted))
+        RUN_TIME.observe(finished - started)
+
+        if isinstance(result, SharedArray):
+            array, shm = result.attach()
+            result = array.copy()
+            shm.close()
+            shm.unlink()
+        return result
+
+    def _on_done(self, blocks: List[shared_memory.SharedMemory], future):
+        with self._pending_lock:
+            self._pending -= 1
+        JOBS_PENDING.dec()
+        self._release(blocks)
+
+    def _discard_result(self, future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()[0]
+        if isinstance(result, SharedArray):
+            self._release([shared_memory.SharedMemory(name=result.name)])
+
+    @staticmethod
+    def _release(blocks: List[shared_memory.SharedMemory]):
+        for shm in blocks:
+            try:
+                shm.close()
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    @property
+    def pending(self) -> int:
+        """Jobs submitted and not yet finished"""
+        with self._pending_lock:
+            return self._pending
+
+    def get_stats(self) -> Dict:
+        """Get current queue and latency statistics"""
+        return {
+            'workers': self.max_workers,
+            'pending_jobs': self.pending,
+            'cancelled_jobs': self.cancelled,
+            'failed_jobs': self.failed,
+            'queue_wait_sum': self.queue_wait,
+            'run_time_sum': self.run_time,
+        }
+
+    def shutdown(self, cancel_pending: bool = True):
+        """Stop the worker pool, dropping jobs that have not started"""
+        self.pool.shutdown(wait=True, cancel_futures=cancel_pending)
@@ -0,0 +1,353 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+import asyncio
+import contextvars
+import functools
+import time
+from loguru import logger
+from prometheus_client import Histogram, start_http_server
+
+LATENCY_BUCKETS = (.0001, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+TENSOR_LATENCY = Histogram('nft_tensor_call_seconds', 'Tensor API client call latency',
+                           ['method'], buckets=LATENCY_BUCKETS)
+HTTP_LATENCY = Histogram('nft_http_request_seconds', 'Outgoing HTTP request latency',
+                         ['method', 'host', 'status'], buckets=LATENCY_BUCKETS)
+RPC_LATENCY = Histogram('nft_rpc_call_seconds', 'Solana JSON-RPC call latency',
+                        ['method'], buckets=LATENCY_BUCKETS)
+CACHE_LATENCY = Histogram('nft_cache_op_seconds', 'NFT cache operation latency',
+                          ['op'], buckets=LATENCY_BUCKETS)
+
+# Offset from the monotonic clock spans are timed with to wall-clock time
+_EPOCH_OFFSET = time.time() - time.perf_counter()
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation in a trace, with its nested child operations"""
+
+    __slots__ = ('name', 'attributes', 'parent', 'children', 'dropped', 'start', 'end', 'error')
+
+    def __init__(self, name: str, parent: Optional['Span'] = None, attributes: Optional[Dict] = None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.parent = parent
+        self.children: List['Span'] = []
+        self.dropped = 0
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    @property
+    def start_time(self) -> float:
+        """Wall-clock start as a Unix timestamp"""
+        return self.start + _EPOCH_OFFSET
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def walk(self, depth: int = 0) -> Iterator[Tuple[int, 'Span']]:
+        """Yield ``(depth, span)`` for this span and all descendants, depth first"""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def breakdown(self, max_depth: int = 6) -> str:
+        """Indented timing tree; repeated sibling operations are folded into one line"""
+        lines = [self._describe(1, self.duration)]
+        self._breakdown(lines, 1, max_depth)
+        return "\n".join(lines)
+
+    def _breakdown(self, lines: List[str], depth: int, max_depth: int):
+        if depth > max_depth:
+            return
+        groups: Dict[str, List['Span']] = {}
+        for child in self.children:
+            groups.setdefault(child.name, []).append(child)
+        for spans in groups.values():
+            if len(spans) == 1:
+                lines.append("  " * depth + spans[0]._describe(1, spans[0].duration))
+                spans[0]._breakdown(lines, depth + 1, max_depth)
+            else:
+                total = sum(s.duration for s in spans)
+                lines.append("  " * depth + spans[0]._describe(len(spans), total))
+        if self.dropped:
+            lines.append("  " * depth + f"... {self.dropped} more")
+
+    def _describe(self, count: int, duration: float) -> str:
+        label = self.name if count == 1 else f"{self.name} x{count}"
+        attrs = " ".join(f"{k}={v}" for k, v in self.attributes.items()) if count == 1 else ""
+        error = f" error={self.error}" if self.error and count == 1 else ""
+        return f"{label} {duration * 1000:.1f}ms" + (f" [{attrs}]" if attrs else "") + error
+
+
+class InMemoryExporter:
+    """Keeps finished root spans in a list; meant for tests and debugging"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def find(self, name: str) -> List[Span]:
+        """All finished spans with this name, at any depth"""
+        return [s for root in self.spans for _, s in root.walk() if s.name == name]
+
+    def clear(self):
+        self.spans.clear()
+
+
+class OpenTelemetryExporter:
+    """Replays finished traces into OpenTelemetry (requires ``opentelemetry-api``)
+
+    Spans are recorded locally and only handed to OpenTelemetry once the root
+    finishes, so the hot path never touches the OpenTelemetry SDK.
+    """
+
+    def __init__(self, tracer_name: str = "solana_nft_manager"):
+        from opentelemetry import trace
+        from opentelemetry.trace import Status, StatusCode
+
+        self._trace = trace
+        self._error_status = lambda message: Status(StatusCode.ERROR, message)
+        self._tracer = trace.get_tracer(tracer_name)
+
+    def export(self, span: Span):
+        self._replay(span, None)
+
+    def _replay(self, span: Span, parent):
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self._tracer.start_span(
+            span.name,
+            context=context,
+            start_time=int(span.start_time * 1e9),
+            attributes={k: v if isinstance(v, (str, bool, int, float)) else str(v)
+                        for k, v in span.attributes.items()},
+        )
+        if span.error:
+            otel_span.set_status(self._error_status(span.error))
+        for child in span.children:
+            self._replay(child, otel_span)
+        otel_span.end(end_time=int((span.end + _EPOCH_OFFSET) * 1e9))
+
+
+class Tracer:
+    """Records nested spans per task/thread and reports finished traces
+
+    The active span lives in a context variable, so spans opened inside a
+    coroutine nest under the span of the code that awaited it, including across
+    ``asyncio.gather``. When a root span finishes it is passed to every
+    exporter, and logged with its timing breakdown if it took longer than
+    ``slow_threshold`` seconds.
+    """
+
+    def __init__(self, slow_threshold: float = 1.0, log_slow: bool = True, max_children: int = 256):
+        self.slow_threshold = slow_threshold
+        self.log_slow = log_slow
+        self.max_children = max_children
+        self.exporters: List = []
+
+    def configure(self, monitoring_config):
+        self.slow_threshold = monitoring_config.SLOW_OPERATION_THRESHOLD
+        self.log_slow = monitoring_config.TRACE_SLOW_OPERATIONS
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter):
+        if exporter in self.exporters:
+            self.exporters.remove(exporter)
+
+    def start_span(self, name: str, root: bool = True, activate: bool = True,
+                   **attributes) -> Tuple[Optional[Span], Optional[contextvars.Token]]:
+        """Open a span under the current one
+
+        With ``root=False`` nothing is recorded unless a trace is already
+        active, which keeps hot paths (cache lookups) cheap outside of traces.
+        Pass the returned token back to :meth:`finish_span`.
+        """
+        parent = _current_span.get()
+        if parent is None and not root:
+            return None, None
+        span = Span(name, parent, attributes)
+        if parent is not None:
+            if len(parent.children) < self.max_children:
+                parent.children.append(span)
+            else:
+                parent.dropped += 1
+        token = _current_span.set(span) if activate else None
+        return span, token
+
+    def finish_span(self, span: Span, token: Optional[contextvars.Token] = None):
+        span.end = time.perf_counter()
+        if token is not None:
+            _current_span.reset(token)
+        if span.parent is None:
+            self._report(span)
+
+    @contextmanager
+    def span(self, name: str, root: bool = True, **attributes):
+        span, token = self.start_span(name, root, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            if span:
+                span.error = repr(e)
+            raise
+        finally:
+            if span:
+                self.finish_span(span, token)
+
+    def _report(self, span: Span):
+        if self.log_slow and span.duration >= self.slow_threshold:
+            logger.warning(f"Slow operation {span.name} took {span.duration:.3f}s\n{span.breakdown()}")
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.error(f"Error exporting trace {span.name}: {e}")
+
+
+tracer = Tracer()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def traced(name: str, histogram: Optional[Histogram] = None, root: bool = True, **labels):
+    """Decorator timing a function (sync or async) as a span and a histogram sample
+
+    ``labels`` are bound to ``histogram`` once at decoration time.
+    """
+    def decorate(fn: Callable) -> Callable:
+        metric = histogram.labels(**labels) if histogram is not None and labels else histogram
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                span, token = tracer.start_span(name, root)
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                except BaseException as e:
+                    if span:
+                        span.error = repr(e)
+                    raise
+                finally:
+                    if metric is not None:
+                        metric.observe(time.perf_counter() - start)
+                    if span:
+                        tracer.finish_span(span, token)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            span, token = tracer.start_span(name, root)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except BaseException as e:
+                if span:
+                    span.error = repr(e)
+                raise
+            finally:
+                if metric is not None:
+                    metric.observe(time.perf_counter() - start)
+                if span:
+                    tracer.finish_span(span, token)
+        return wrapper
+
+    return decorate
+
+
+def http_trace_config():
+    """aiohttp ``TraceConfig`` recording each request as a leaf span and histogram sample"""
+    import aiohttp
+
+    async def on_request_start(session, ctx, params):
+        ctx.span, _ = tracer.start_span(f"http {params.method}", root=False, activate=False,
+                                        host=params.url.host, path=params.url.path)
+        ctx.start = time.perf_counter()
+
+    def finish(ctx, params, status: str, error: Optional[BaseException] = None):
+        HTTP_LATENCY.labels(method=params.method, host=params.url.host or "", status=status).observe(
+            time.perf_counter() - ctx.start)
+        if ctx.span:
+            ctx.span.set_attribute('status', status)
+            if error is not None:
+                ctx.span.error = repr(error)
+            tracer.finish_span(ctx.span)
+
+    async def on_request_end(session, ctx, params):
+        finish(ctx, params, str(params.response.status))
+
+    async def on_request_exception(session, ctx, params):
+        finish(ctx, params, "error", params.exception)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+class InstrumentedClient:
+    """Proxy that times every coroutine method of a wrapped RPC client
+
+    Each call becomes a ``rpc.<method>`` span and an ``nft_rpc_call_seconds``
+    sample labelled with the method name; other attributes pass through.
+    """
+
+    def __init__(self, client, prefix: str = "rpc", histogram: Histogram = RPC_LATENCY):
+        self._client = client
+        self._prefix = prefix
+        self._histogram = histogram
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+        wrapped = traced(f"{self._prefix}.{name}", self._histogram, method=name)(attr)
+        setattr(self, name, wrapped)
+        return wrapped
+
+
+_prometheus_port: Optional[int] = None
+_otel_exporter: Optional[OpenTelemetryExporter] = None
+
+
+def start_monitoring(monitoring_config=None) -> bool:
+    """Apply ``MonitoringConfig`` and start the configured exporters; safe to call repeatedly
+
+    Returns False if the Prometheus endpoint could not be started.
+    """
+    global _prometheus_port, _otel_exporter
+    if monitoring_config is None:
+        from ..config import get_config
+        monitoring_config = get_config().MONITORING
+
+    tracer.configure(monitoring_config)
+
+    if monitoring_config.ENABLE_OPENTELEMETRY and _otel_exporter is None:
+        try:
+            _otel_exporter = OpenTelemetryExporter()
+            tracer.add_exporter(_otel_exporter)
+        except ImportError:
+            logger.debug("opentelemetry-api not installed; OpenTelemetry export disabled")
+
+    if monitoring_config.ENABLE_PROMETHEUS and _prometheus_port is None:
+        try:
+            start_http_server(monitoring_config.PROMETHEUS_PORT)
+            _prometheus_port = monitoring_config.PROMETHEUS_PORT
+            logger.info(f"Prometheus metrics served on port {_prometheus_port}")
+        except OSError as e:
+            logger.error(f"Error starting Prometheus exporter on port {monitoring_config.PROMETHEUS_PORT}: {e}")
+            return False
+    return True
@@ -0,0 +1,571 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set, Union
+from collections import OrderedDict
+from pathlib import Path
+import argparse
+import asyncio
+import fcntl
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from loguru import logger
+
+
+class L2Cache:
+    """Shared second-level cache reached over the Redis protocol
+
+    Works against a real Redis (``redis://``) or the bundled
+    :class:`LocalCacheServer` on a unix socket (``unix://``). Every process
+    tags its invalidation messages with its own origin id, so a writer never
+    evicts its own freshly written L1 entries. Network errors are logged and
+    treated as misses; the L1 and disk tiers keep working without L2. When
+    ``local_socket`` is set, an error also re-elects a local server on that
+    socket (at most every ``REELECT_INTERVAL`` seconds), so peers recover if
+    the server process goes away.
+    """
+
+    REELECT_INTERVAL = 5.0
+
+    def __init__(self,
+                 url: str,
+                 namespace: str = "nft",
+                 metadata_ttl: int = 3600,
+                 price_ttl: int = 300,
+                 timeout: float = 1.0,
+                 local_socket: Optional[str] = None):
+        try:
+            import redis  # optional and slow to import: only needed when L2 is enabled
+        except ImportError:
+            raise ImportError("The shared L2 cache requires the 'redis' package") from None
+
+        self.url = url
+        self.namespace = namespace
+        self.metadata_ttl = metadata_ttl
+        self.price_ttl = price_ttl
+        self.local_socket = local_socket
+        self.origin = uuid.uuid4().hex
+        self.channel = f"{namespace}:invalidate"
+        self.client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._pubsub = None
+        self._pubsub_thread = None
+        self._invalidation_callback = None
+        self._last_election = 0.0
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, cache_config, socket_path: str) -> Optional['L2Cache']:
+        """Connect to ``REDIS_URL``, falling back to a local socket server shared by this host"""
+        ttls = dict(
+            metadata_ttl=cache_config.METADATA_CACHE_TTL,
+            price_ttl=cache_config.MARKET_DATA_CACHE_TTL,
+        )
+        if not cache_config.ENABLE_REDIS:
+            return None
+
+        l2 = cls(cache_config.REDIS_URL, **ttls)
+        if l2.ping():
+            logger.info(f"Using shared L2 cache at {cache_config.REDIS_URL}")
+            return l2
+        logger.warning(f"Redis unavailable at {cache_config.REDIS_URL}, falling back to local socket")
+        l2.close()
+
+        LocalCacheServer.ensure_running(socket_path)
+        logger.info(f"Using local L2 cache socket at {socket_path}")
+        return cls(f"unix://{socket_path}", local_socket=socket_path, **ttls)
+
+    @staticmethod
+    def nft_key(mint_address: str) -> str:
+        return f"nft:{mint_address}"
+
+    @staticmethod
+    def price_key(mint_address: str) -> str:
+        return f"price:{mint_address}"
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def ping(self) -> bool:
+        try:
+            return bool(self.client.ping())
+        except Exception:
+            return False
+
+    def _failed(self, action: str, error: Exception):
+        logger.warning(f"L2 {action} failed: {error}")
+        if self.local_socket and time.monotonic() - self._last_election >= self.REELECT_INTERVAL:
+            self._reelect()
+
+    def _reelect(self):
+        if self._closed:
+            return
+        self._last_election = time.monotonic()
+        if LocalCacheServer.ensure_running(self.local_socket):
+            logger.info(f"Restarted local L2 cache server at {self.local_socket}")
+        if self._invalidation_callback and not (self._pubsub_thread and self._pubsub_thread.is_alive()):
+            self.subscribe_invalidations(self._invalidation_callback)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get(self._key(key))
+        except Exception as e:
+            self._failed("get", e)
+            return None
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Fetch many keys in one round trip; missing keys are left out"""
+        if not keys:
+            return {}
+        try:
+            values = self.client.mget([self._key(k) for k in keys])
+        except Exception as e:
+            self._failed("multi-get", e)
+            return {}
+        return {k: v for k, v in zip(keys, values) if v is not None}
+
+    def set(self, key: str, value: Union[str, bytes], ttl: int):
+        try:
+            self.client.set(self._key(key), value, ex=ttl)
+        except Exception as e:
+            self._failed("set", e)
+
+    def set_many(self, items: Dict[str, Union[str, bytes]], ttl: int):
+        """Write many keys with one pipelined round trip"""
+        if not items:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(self._key(key), value, ex=ttl)
+            pipe.execute()
+        except Exception as e:
+            self._failed("multi-set", e)
+
+    def delete_many(self, keys: Iterable[str]):
+        keys = [self._key(k) for k in keys]
+        if not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except Exception as e:
+            self._failed("delete", e)
+
+    def publish_invalidation(self, keys: List[str]):
+        """Tell other processes to drop their L1 copies of ``keys``"""
+        try:
+            self.client.publish(self.channel, json.dumps({'origin': self.origin, 'keys': keys}))
+        except Exception as e:
+            self._failed("invalidation publish", e)
+
+    def subscribe_invalidations(self, callback: Callable[[List[str]], None]):
+        """Call ``callback(keys)`` from a background thread when a peer invalidates keys"""
+        self._invalidation_callback = callback
+
+        def handler(message):
+            try:
+                data = json.loads(message['data'])
+                if data.get('origin') != self.origin:
+                    callback(data.get('keys', []))
+            except Exception as e:
+                logger.error(f"Error handling L2 invalidation: {e}")
+
+        def on_error(e, pubsub, thread):
+            logger.warning(f"L2 invalidation listener stopped: {e}")
+            thread.stop()
+            if self.local_socket:
+                # The local server may have gone away; look again once the listener has exited
+                timer = threading.Timer(self.REELECT_INTERVAL, self._reelect)
+                timer.daemon = True
+                timer.start()
+
+        try:
+            self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self.channel: handler})
+            self._pubsub_thread = self._pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=on_error
+            )
+        except Exception as e:
+            logger.warning(f"L2 invalidation subscribe failed: {e}")
+
+    def close(self):
+        self._closed = True
+        if self._pubsub_thread:
+            # Stopping the worker thread also closes its pubsub connection
+            self._pubsub_thread.stop()
+            self._pubsub_thread.join(timeout=2)
+            self._pubsub_thread = None
+        elif self._pubsub:
+            self._pubsub.close()
+        self._pubsub = None
+        self.client.close()
+
+
+class _Status(bytes):
+    pass
+
+
+class _Error(str):
+    pass
+
+
+class _Push(list):
+    # Out-of-band pub/sub frame: '>' in RESP3, a plain array in RESP2
+    pass
+
+
+OK = _Status(b"OK")
+
+
+class LocalCacheServer:
+    """Small Redis-protocol server for a single host or for tests
+
+    Implements the subset of commands :class:`L2Cache` uses (strings with
+    TTLs, multi-get/set, pub/sub) over RESP2, or RESP3 after ``HELLO 3``.
+    Keys are evicted least-recently-used once ``max_keys`` is reached. Listens
+    on a unix socket when ``path`` is given, otherwise on TCP ``host:port``
+    (port 0 picks a free one).
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 max_keys: int = 1_000_000):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.max_keys = max_keys
+
+        self._data: 'OrderedDict[bytes, bytes]' = OrderedDict()
+        self._expires: Dict[bytes, float] = {}
+        self._channels: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self._resp3: Set[asyncio.StreamWriter] = set()
+        self._clients: Set[asyncio.Task] = set()
+        self._server = None
+        self._sweeper = None
+        self._loop = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"unix://{self.path}" if self.path else f"redis://{self.host}:{self.port}"
+
+    async def start(self):
+        if self.path:
+            self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+        self._sweeper = asyncio.get_running_loop().create_task(self._sweep_expired())
+
+    async def close(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+        if self._server:
+            self._server.close()
+        for task in list(self._clients):
+            task.cancel()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        if self._server:
+            await self._server.wait_closed()
+        self._channels.clear()
+
+    def start_in_thread(self) -> 'LocalCacheServer':
+        """Serve from a daemon thread with its own event loop"""
+        ready = threading.Event()
+        errors: List[BaseException] = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.start())
+            except BaseException as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="l2-cache-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop_thread(self):
+        if self._loop and self._thread:
+            asyncio.run_coroutine_threadsafe(self.close(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    async def serve(self, idle_timeout: Optional[float] = None):
+        """Serve until cancelled, or until no client has been connected for ``idle_timeout`` seconds"""
+        await self.start()
+        try:
+            idle_since = time.monotonic()
+            while True:
+                await asyncio.sleep(1.0)
+                if self._clients:
+                    idle_since = time.monotonic()
+                elif idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                    logger.info(f"Local L2 server idle for {idle_timeout:.0f}s, exiting")
+                    return
+        finally:
+            await self.close()
+            if self.path:
+                try:
+                    os.unlink(self.path)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def is_serving(path: str) -> bool:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            return True
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+    @classmethod
+    def ensure_running(cls, path: str, idle_timeout: float = 300.0, timeout: float = 5.0) -> bool:
+        """Start a server process on ``path`` unless one already serves it
+
+        The server runs in its own session rather than inside the caller, so
+        it outlives whichever process started it and exits on its own once no
+        peer has been connected for ``idle_timeout`` seconds. A lock file next
+        to the socket makes sure racing peers start only one. Returns True if
+        this call started the server.
+        """
+        with open(f"{path}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if cls.is_serving(path):
+                return False
+            # Nobody is listening: clear a stale socket file and take over
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+            env = dict(os.environ)
+            root = str(Path(__file__).resolve().parents[2])
+            env['PYTHONPATH'] = os.pathsep.join(p for p in (root, env.get('PYTHONPATH')) if p)
+            process = subprocess.Popen(
+                [sys.executable, '-m', __name__, path, '--idle-timeout', str(idle_timeout)],
+                env=env, stdin=subprocess.DEVNULL, start_new_session=True,
+            )
+            deadline = time.monotonic() + timeout
+            while not cls.is_serving(path):
+                if process.poll() is not None or time.monotonic() > deadline:
+                    logger.error(f"Local L2 server did not start on {path}")
+                    return False
+                time.sleep(0.02)
+            return True
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscriptions: Set[bytes] = set()
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                name = args[0].upper()
+                if name == b'QUIT':
+                    writer.write(self._encode(OK))
+                    break
+                if name == b'HELLO':
+                    writer.write(self._hello(args[1:], writer))
+                elif name in (b'SUBSCRIBE', b'UNSUBSCRIBE'):
+                    self._pubsub(name, args[1:], subscriptions, writer)
+                else:
+                    writer.write(self._encode(self._dispatch(name, args[1:]), writer in self._resp3))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in subscriptions:
+                self._channels.get(channel, set()).discard(writer)
+            self._resp3.discard(writer)
+            self._clients.discard(task)
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if line[:1] != b'*':
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            header = await reader.readline()
+            size = int(header[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    def _hello(self, args: List[bytes], writer: asyncio.StreamWriter) -> bytes:
+        version = int(args[0]) if args else 2
+        if version not in (2, 3):
+            return self._encode(_Error("NOPROTO unsupported protocol version"))
+        if version == 3:
+            self._resp3.add(writer)
+        else:
+            self._resp3.discard(writer)
+        info = [b'server', b'redis', b'version', b'7.0.0', b'proto', version,
+                b'id', id(writer), b'mode', b'standalone', b'role', b'master', b'modules', []]
+        if version == 3:
+            return b'%%%d\r\n' % (len(info) // 2) + b''.join(self._encode(v, True) for v in info)
+        return self._encode(info)
+
+    @classmethod
+    def _encode(cls, value, resp3: bool = False) -> bytes:
+        if value is None:
+            return b'_\r\n' if resp3 else b'$-1\r\n'
+        if isinstance(value, _Status):
+            return b'+' + bytes(value) + b'\r\n'
+        if isinstance(value, _Error):
+            return f"-ERR {value}\r\n".encode()
+        if isinstance(value, int):
+            return b':%d\r\n' % value
+        if isinstance(value, bytes):
+            return b'$%d\r\n%s\r\n' % (len(value), value)
+        if isinstance(value, list):
+            prefix = b'>' if resp3 and isinstance(value, _Push) else b'*'
+            return prefix + b'%d\r\n' % len(value) + b''.join(cls._encode(v, resp3) for v in value)
+        raise TypeError(f"Cannot encode {type(value)}")
+
+    def _dispatch(self, name: bytes, args: List[bytes]):
+        try:
+            if name == b'PING':
+                return args[0] if args else _Status(b"PONG")
+            if name == b'GET':
+                return self._get(args[0])
+            if name == b'MGET':
+                return [self._get(k) for k in args]
+            if name == b'SET':
+                return self._set_command(args)
+            if name == b'MSET':
+                for key, value in zip(args[::2], args[1::2]):
+                    self._set(key, value, None)
+                return OK
+            if name == b'DEL':
+                return sum(self._delete(k) for k in args)
+            if name == b'EXISTS':
+                return sum(1 for k in args if self._get(k) is not None)
+            if name in (b'EXPIRE', b'PEXPIRE'):
+                if self._get(args[0]) is None:
+                    return 0
+                seconds = int(args[1]) / (1000 if name == b'PEXPIRE' else 1)
+                self._expires[args[0]] = time.monotonic() + seconds
+                return 1
+            if name == b'TTL':
+                if self._get(args[0]) is None:
+                    return -2
+                deadline = self._expires.get(args[0])
+                return -1 if deadline is None else max(0, int(deadline - time.monotonic()))
+            if name == b'DBSIZE':
+                return len(self._data)
+            if name in (b'FLUSHALL', b'FLUSHDB'):
+                self._data.clear()
+                self._expires.clear()
+                return OK
+            if name == b'PUBLISH':
+                return self._publish(args[0], args[1])
+            if name in (b'CLIENT', b'SELECT'):
+                return OK
+            return _Error(f"unknown command '{name.decode(errors='replace')}'")
+        except (IndexError, ValueError):
+            return _Error(f"wrong arguments for '{name.decode(errors='replace')}'")
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._delete(key)
+            return None
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def _set_command(self, args: List[bytes]):
+        key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+        ttl = None
+        if b'EX' in options:
+            ttl = int(args[2 + options.index(b'EX') + 1])
+        elif b'PX' in options:
+            ttl = int(args[2 + options.index(b'PX') + 1]) / 1000
+        exists = self._get(key) is not None
+        if (b'NX' in options and exists) or (b'XX' in options and not exists):
+            return None
+        self._set(key, value, ttl)
+        return OK
+
+    def _set(self, key: bytes, value: bytes, ttl: Optional[float]):
+        # Re-inserting moves the key to the end, keeping expiry order roughly FIFO for the sweeper
+        self._data.pop(key, None)
+        self._expires.pop(key, None)
+        self._data[key] = value
+        if ttl is not None:
+            self._expires[key] = time.monotonic() + ttl
+        while len(self._data) > self.max_keys:
+            oldest, _ = self._data.popitem(last=False)
+            self._expires.pop(oldest, None)
+
+    def _delete(self, key: bytes) -> int:
+        self._expires.pop(key, None)
+        return 1 if self._data.pop(key, None) is not None else 0
+
+    def _publish(self, channel: bytes, message: bytes) -> int:
+        writers = self._channels.get(channel, set())
+        frame = _Push([b'message', channel, message])
+        for writer in list(writers):
+            writer.write(self._encode(frame, writer in self._resp3))
+        return len(writers)
+
+    def _pubsub(self, name: bytes, channels: List[bytes], subscriptions: Set[bytes],
+                writer: asyncio.StreamWriter):
+        if name == b'UNSUBSCRIBE' and not channels:
+            channels = list(subscriptions)
+        for channel in channels:
+            if name == b'SUBSCRIBE':
+                subscriptions.add(channel)
+                self._channels.setdefault(channel, set()).add(writer)
+            else:
+                subscriptions.discard(channel)
+                self._channels.get(channel, set()).discard(writer)
+            kind = b'subscribe' if name == b'SUBSCRIBE' else b'unsubscribe'
+            writer.write(self._encode(_Push([kind, channel, len(subscriptions)]), writer in self._resp3))
+
+    async def _sweep_expired(self):
+        while True:
+            await asyncio.sleep(1.0)
+            now = time.monotonic()
+            # Sample from the oldest keys, like Redis' active expiry
+            for key, deadline in list(itertools.islice(self._expires.items(), 1000)):
+                if deadline <= now:
+                    self._delete(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the local L2 cache on a unix socket")
+    parser.add_argument('path')
+    parser.add_argument('--idle-timeout', type=float, default=300.0)
+    args = parser.parse_args()
+    asyncio.run(LocalCacheServer(path=args.path).serve(args.idle_timeout))
+
+
+if __name__ == '__main__':
+    main()
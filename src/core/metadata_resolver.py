@@ -0,0 +1,326 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+import aiohttp
+from loguru import logger
+from prometheus_client import Counter, Gauge
+from .instrumentation import http_trace_config, traced
+from .nft_cache import NFTMetadata
+
+RESOLVES = Counter('nft_metadata_resolves', 'Off-chain metadata lookups by outcome', ['result'])
+GATEWAY_WINS = Counter('nft_metadata_gateway_wins', 'Metadata races won per gateway', ['gateway'])
+GATEWAY_REQUESTS = Gauge('nft_metadata_requests_in_flight', 'Gateway requests currently in flight')
+
+# Responses that mean the document does not exist (or is not metadata), as
+# opposed to a gateway being slow, rate limited or down
+DEAD_STATUSES = frozenset({400, 404, 410, 'invalid', 'too_large'})
+
+DEFAULT_IPFS_GATEWAYS = ['https://ipfs.io/ipfs/', 'https://cloudflare-ipfs.com/ipfs/', 'https://nftstorage.link/ipfs/']
+DEFAULT_ARWEAVE_GATEWAYS = ['https://arweave.net/', 'https://ar-io.net/']
+
+# Subdomain gateways need a case-insensitive CID, i.e. CIDv1 in base32 ("bafy...")
+_SUBDOMAIN_CID = re.compile(r'b[a-z2-7]{50,}')
+
+
+def content_address(uri: str) -> Optional[Tuple[str, str]]:
+    """``('ipfs', '<cid>[/path]')`` or ``('ar', '<tx id>[/path]')`` for content-addressed URIs, else None
+
+    Recognizes ``ipfs://`` and ``ar://`` URIs, path gateways
+    (``https://<host>/ipfs/<cid>/...``), subdomain gateways
+    (``https://<base32 CIDv1>.ipfs.<host>/...``) and arweave.net-style hosts.
+    """
+    parts = urlsplit(uri.strip())
+    scheme = parts.scheme.lower()
+    if scheme == 'ipfs':
+        path = (parts.netloc + parts.path).lstrip('/')
+        if path.startswith('ipfs/'):
+            path = path[5:]
+        return ('ipfs', path) if path else None
+    if scheme == 'ar':
+        path = (parts.netloc + parts.path).lstrip('/')
+        return ('ar', path) if path else None
+    if scheme not in ('http', 'https'):
+        return None
+
+    host = parts.hostname or ''
+    if parts.path.startswith('/ipfs/') and len(parts.path) > 6:
+        return 'ipfs', parts.path[6:]
+    if '.ipfs.' in host:
+        label = host.split('.ipfs.', 1)[0]
+        if _SUBDOMAIN_CID.fullmatch(label):
+            return 'ipfs', label + parts.path.rstrip('/')
+    if host == 'arweave.net' or host.endswith('.arweave.net') or host == 'ar-io.net':
+        path = parts.path.lstrip('/')
+        return ('ar', path) if path else None
+    return None
+
+
+class MetadataResolver:
+    """Bulk resolver for off-chain NFT metadata (the JSON behind ``NFTMetadata.uri``)
+
+    Content-addressed URIs (IPFS, Arweave) are raced across the configured
+    gateways: the first gateway is asked straight away, and another joins the
+    race every ``hedge_delay`` seconds or as soon as one fails. The first
+    valid JSON document wins and the remaining requests are cancelled. Plain
+    http(s) URIs are fetched from their own host.
+
+    Documents are cached on disk under the SHA-256 of their content address,
+    so the same document reached through different gateways is fetched once.
+    IPFS and Arweave entries never expire; plain URLs are refetched after
+    ``http_cache_ttl``. Links that every gateway reports as missing (or that
+    are not JSON objects) are negatively cached for ``negative_ttl`` seconds;
+    timeouts and server errors are not cached. At most ``max_concurrent`` URIs
+    are resolved at once, and concurrent lookups of one URI share a fetch.
+    """
+
+    def __init__(self,
+                 cache_dir: str,
+                 ipfs_gateways: Optional[List[str]] = None,
+                 arweave_gateways: Optional[List[str]] = None,
+                 max_concurrent: int = 32,
+                 timeout: float = 10.0,
+                 hedge_delay: float = 0.25,
+                 negative_ttl: float = 21600,
+                 http_cache_ttl: float = 604800,
+                 max_document_bytes: int = 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.ipfs_gateways = [self._slash(g) for g in (ipfs_gateways or DEFAULT_IPFS_GATEWAYS)]
+        self.arweave_gateways = [self._slash(g) for g in (arweave_gateways or DEFAULT_ARWEAVE_GATEWAYS)]
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.negative_ttl = negative_ttl
+        self.http_cache_ttl = http_cache_ttl
+        self.max_document_bytes = max_document_bytes
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def from_config(cls, metadata_config, cache_dir: str) -> 'MetadataResolver':
+        return cls(
+            cache_dir,
+            ipfs_gateways=metadata_config.IPFS_GATEWAYS,
+            arweave_gateways=metadata_config.ARWEAVE_GATEWAYS,
+            max_concurrent=metadata_config.MAX_CONCURRENT_FETCHES,
+            timeout=metadata_config.FETCH_TIMEOUT,
+            hedge_delay=metadata_config.HEDGE_DELAY,
+            negative_ttl=metadata_config.NEGATIVE_CACHE_TTL,
+            http_cache_ttl=metadata_config.HTTP_CACHE_TTL,
+            max_document_bytes=metadata_config.MAX_DOCUMENT_BYTES,
+        )
+
+    @staticmethod
+    def _slash(gateway: str) -> str:
+        return gateway if gateway.endswith('/') else gateway + '/'
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.max_concurrent * 2),
+            trace_configs=[http_trace_config()],
+        )
+
+    async def __aenter__(self):
+        self.session = self._create_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    def candidates(self, uri: str) -> Tuple[str, List[str], bool]:
+        """``(cache key, gateway URLs in race order, immutable)`` for ``uri``"""
+        address = content_address(uri)
+        if address is None:
+            return hashlib.sha256(uri.encode()).hexdigest(), [uri], False
+        kind, path = address
+        gateways = self.ipfs_gateways if kind == 'ipfs' else self.arweave_gateways
+        urls = [gateway + path for gateway in gateways]
+        # The URI's own gateway goes last so a slow pinning service never leads the race
+        if uri.startswith(('http://', 'https://')) and uri not in urls:
+            urls.append(uri)
+        return hashlib.sha256(f"{kind}/{path}".encode()).hexdigest(), urls, True
+
+    @traced('metadata.resolve_many')
+    async def resolve_many(self, uris: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """Resolve many URIs concurrently; maps each URI to its document, or None"""
+        unique = list(dict.fromkeys(u for u in uris if u))
+        results = await asyncio.gather(*(self.resolve(uri) for uri in unique))
+        return dict(zip(unique, results))
+
+    async def resolve(self, uri: str) -> Optional[Dict]:
+        """The JSON document behind ``uri``, or None if it is dead or unreachable"""
+        if not uri:
+            return None
+        try:
+            key, urls, immutable = self.candidates(uri)
+            hit, cached = self._read_cache(key, immutable)
+            if hit:
+                RESOLVES.labels(result='cache_hit' if cached is not None else 'negative_hit').inc()
+                return cached
+
+            future = self._inflight.get(key)
+            if future is not None:
+                RESOLVES.labels(result='shared').inc()
+                return await asyncio.shield(future)
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                document = await self._fetch_and_store(uri, key, urls)
+            except asyncio.CancelledError:
+                # Callers sharing this fetch were not cancelled; they just get nothing
+                future.set_result(None)
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # retrieved, so an unshared failure is not reported twice
+                raise
+            else:
+                future.set_result(document)
+                return document
+            finally:
+                del self._inflight[key]
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error resolving metadata {uri}: {e}")
+            RESOLVES.labels(result='failed').inc()
+            return None
+
+    async def fill_attributes(self, nfts: List[NFTMetadata]) -> int:
+        """Fill empty ``attributes`` (and ``image_url``) from each NFT's off-chain metadata
+
+        Returns how many NFTs got attributes.
+        """
+        missing = [nft for nft in nfts if not nft.attributes and nft.uri]
+        if not missing:
+            return 0
+        documents = await self.resolve_many(nft.uri for nft in missing)
+        filled = 0
+        for nft in missing:
+            document = documents.get(nft.uri) or {}
+            attributes = document.get('attributes')
+            if isinstance(attributes, list) and attributes:
+                nft.attributes = attributes
+                filled += 1
+            if not nft.image_url and isinstance(document.get('image'), str):
+                nft.image_url = document['image']
+        return filled
+
+    async def _fetch_and_store(self, uri: str, key: str, urls: List[str]) -> Optional[Dict]:
+        async with self._semaphore:
+            if not self.session:
+                self.session = self._create_session()
+            document, statuses = await self._race(urls)
+
+        if document is not None:
+            RESOLVES.labels(result='fetched').inc()
+            self._write_cache(key, {'uri': uri, 'fetched_at': time.time(), 'document': document})
+            return document
+        if statuses and all(status in DEAD_STATUSES for status in statuses):
+            RESOLVES.labels(result='dead').inc()
+            self._write_cache(key, {'uri': uri, 'fetched_at': time.time(), 'dead': statuses})
+            logger.debug(f"Dead metadata link {uri}: {statuses}")
+        else:
+            RESOLVES.labels(result='unreachable').inc()
+            logger.warning(f"Metadata {uri} unreachable on {len(urls)} gateway(s): {statuses}")
+        return None
+
+    async def _race(self, urls: List[str]) -> Tuple[Optional[Dict], List]:
+        """Hedged race over ``urls``; returns the winning document and the losers' statuses"""
+        remaining = list(urls)
+        pending = set()
+        statuses = []
+        try:
+            while remaining or pending:
+                if remaining:
+                    pending.add(asyncio.ensure_future(self._fetch(remaining.pop(0))))
+                done, pending = await asyncio.wait(
+                    pending, timeout=self.hedge_delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url, status, document = task.result()
+                    if document is not None:
+                        GATEWAY_WINS.labels(gateway=urlsplit(url).netloc).inc()
+                        return document, statuses
+                    statuses.append(status)
+            return None, statuses
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _fetch(self, url: str) -> Tuple[str, object, Optional[Dict]]:
+        """``(url, status, document)``; status is the HTTP status, 'invalid', 'too_large' or 'error'"""
+        GATEWAY_REQUESTS.inc()
+        try:
+            async with self.session.get(url) as response:
+                if response.status != 200:
+                    return url, response.status, None
+                if (response.content_length or 0) > self.max_document_bytes:
+                    return url, 'too_large', None
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(65536):
+                    body += chunk
+                    if len(body) > self.max_document_bytes:
+                        return url, 'too_large', None
+            try:
+                document = json.loads(body)
+            except ValueError:
+                return url, 'invalid', None
+            if not isinstance(document, dict):
+                return url, 'invalid', None
+            return url, 200, document
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Gateway request {url} failed: {e!r}")
+            return url, 'error', None
+        finally:
+            GATEWAY_REQUESTS.dec()
+
+    def _cache_file(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _read_cache(self, key: str, immutable: bool) -> Tuple[bool, Optional[Dict]]:
+        """``(hit, document)``; a live negative entry is a hit with no document"""
+        path = self._cache_file(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return False, None
+        except ValueError:
+            logger.warning(f"Discarding corrupt metadata cache entry {path}")
+            path.unlink(missing_ok=True)
+            return False, None
+
+        age = time.time() - entry.get('fetched_at', 0)
+        if 'dead' in entry:
+            return age < self.negative_ttl, None
+        if not immutable and age >= self.http_cache_ttl:
+            return False, None
+        return True, entry['document']
+
+    def _write_cache(self, key: str, entry: Dict):
+        path = self._cache_file(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"Error caching metadata {entry.get('uri')}: {e}")
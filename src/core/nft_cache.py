@@ -1,13 +1,31 @@
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
 from dataclasses import dataclass
 from datetime import datetime
 import json
+import os
 from pathlib import Path
 import threading
+import time
 from cachetools import LRUCache, TTLCache
 from loguru import logger
 import psutil
 from prometheus_client import Counter, Gauge
+from .events import EventBus
+from .instrumentation import CACHE_LATENCY, traced
+from .l2_cache import L2Cache
+from .presence_filter import PresenceFilter
+
+if TYPE_CHECKING:
+    from .prefetch import CollectionPrefetcher
+    from .price_history import PriceHistoryStore
+
+# Module-level so several cache managers can share one process
+CACHE_HITS = Counter('nft_cache_hits', 'Number of cache hits')
+CACHE_MISSES = Counter('nft_cache_misses', 'Number of cache misses')
+L2_HITS = Counter('nft_cache_l2_hits', 'Number of L1 misses served by the shared L2 cache')
+NEGATIVE_HITS = Counter('nft_cache_negative_hits', 'Lookups answered by the negative cache of absent mints')
+DISK_PROBES_SKIPPED = Counter('nft_cache_disk_probes_skipped', 'Disk lookups skipped by the presence filter')
+MEMORY_USAGE = Gauge('nft_cache_memory_mb', 'Memory usage in MB')
 
 @dataclass
 class NFTMetadata:
@@ -22,16 +40,38 @@ class NFTMetadata:
     last_updated: datetime
     floor_price: float = 0.0
     last_sale_price: float = 0.0
+    image_url: str = ""
+    
+    def to_dict(self) -> Dict:
+        data = dict(vars(self))
+        if isinstance(self.last_updated, datetime):
+            data['last_updated'] = self.last_updated.isoformat()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'NFTMetadata':
+        data = dict(data)
+        if isinstance(data.get('last_updated'), str):
+            data['last_updated'] = datetime.fromisoformat(data['last_updated'])
+        return cls(**data)
 
 class NFTCacheManager:
-    def __init__(self, cache_dir: str = "cache", max_memory_percent: float = 75.0):
+    PRESENCE_FILE = 'presence.bloom'
+    COLLECTIONS_FILE = 'collections.index'
+    
+    def __init__(self, cache_dir: str = "cache", max_memory_percent: float = 75.0,
+                 event_bus: Optional[EventBus] = None, l2_cache: Optional[L2Cache] = None,
+                 price_history: Optional['PriceHistoryStore'] = None, price_ttl: int = 300,
+                 negative_ttl: float = 300.0, negative_cache_size: int = 100_000,
+                 presence_error_rate: float = 0.01):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        self.event_bus = event_bus or EventBus()
         
         # Metrics
-        self.cache_hits = Counter('nft_cache_hits', 'Number of cache hits')
-        self.cache_misses = Counter('nft_cache_misses', 'Number of cache misses')
-        self.memory_usage = Gauge('nft_cache_memory_mb', 'Memory usage in MB')
+        self.cache_hits = CACHE_HITS
+        self.cache_misses = CACHE_MISSES
+        self.memory_usage = MEMORY_USAGE
         
         # Calculate cache size based on available memory
         available_memory = psutil.virtual_memory().available
@@ -39,70 +79,426 @@ class NFTCacheManager:
         
         # Initialize caches
         self.metadata_cache = LRUCache(maxsize=max_cache_size)
-        self.price_cache = TTLCache(maxsize=100000, ttl=300)  # 5-minute TTL for prices
+        # Prices keep a bounded history per mint; get_price() only serves points newer than price_ttl.
+        # The store is built from CacheConfig on first use so importing the cache does not pull in NumPy.
+        self._price_history = price_history
+        self._price_history_lock = threading.Lock()
+        self.price_ttl = price_ttl
+        self._stale_prices = set()
+        
+        # Mints the marketplace confirmed do not exist, so repeated misses stay local
+        self.negative_cache = TTLCache(maxsize=negative_cache_size, ttl=negative_ttl)
         
         # Thread lock for cache operations
         self.cache_lock = threading.Lock()
+        # Serializes disk writes; put_many writes without holding cache_lock.
+        # Never acquire cache_lock while holding it.
+        self.disk_lock = threading.Lock()
+        
+        # Which mints have a disk file; a miss here skips the filesystem entirely.
+        # Files written by other processes sharing cache_dir are only seen after a restart.
+        self.presence_error_rate = presence_error_rate
+        self._presence_path = self.cache_dir / self.PRESENCE_FILE
+        mints = self._disk_mints()
+        self.presence = (PresenceFilter.load(self._presence_path, mints, presence_error_rate)
+                         or self._rebuild_presence(mints))
+        
+        # Collection address -> cached mints, for prefetching siblings. Saved with the
+        # presence filter; entries for removed files only cost a wasted prefetch.
+        self.collection_index: Dict[str, Set[str]] = self._load_collection_index()
+        self.prefetcher: Optional['CollectionPrefetcher'] = None
+        
+        # Optional shared L2 tier; peers' writes evict our L1 copies via pub/sub
+        self.l2 = l2_cache
+        if self.l2:
+            self.l2.subscribe_invalidations(self._invalidate_local)
         
         logger.info(f"Initialized NFT cache with max size: {max_cache_size} entries")
         
+    @traced('cache.get_nft', CACHE_LATENCY, root=False, op='get_nft')
     def get_nft(self, mint_address: str) -> Optional[NFTMetadata]:
         with self.cache_lock:
-            if mint_address in self.metadata_cache:
+            nft = self.metadata_cache.get(mint_address)
+            if nft is not None:
                 self.cache_hits.inc()
-                return self.metadata_cache[mint_address]
+            else:
+                self.cache_misses.inc()
+                if mint_address in self.negative_cache:
+                    NEGATIVE_HITS.inc()
+                    return None
+        if nft is not None:
+            self._accessed(nft)
+            return nft
+        
+        # Shared L2 lookup happens outside the lock so other threads keep hitting L1
+        if self.l2:
+            data = self.l2.get(L2Cache.nft_key(mint_address))
+            if data is not None:
+                try:
+                    nft = NFTMetadata.from_dict(json.loads(data))
+                    L2_HITS.inc()
+                    with self.cache_lock:
+                        self.metadata_cache[mint_address] = nft
+                        self._index_collection(nft)
+                    self._accessed(nft)
+                    return nft
+                except Exception as e:
+                    logger.error(f"Error decoding NFT from L2 cache: {e}")
+        
+        with self.cache_lock:
+            if mint_address not in self.presence:
+                DISK_PROBES_SKIPPED.inc()
+                return None
             
-            self.cache_misses.inc()
             # Try to load from disk cache
             cache_file = self.cache_dir / f"{mint_address}.json"
-            if cache_file.exists():
+            try:
+                with open(cache_file, 'r') as f:
+                    data = json.load(f)
+                    nft = NFTMetadata.from_dict(data)
+                    self.metadata_cache[mint_address] = nft
+                    self._index_collection(nft)
+            except FileNotFoundError:
+                # Presence filter false positive, or the file was removed
+                return None
+            except Exception as e:
+                logger.error(f"Error loading NFT from cache: {e}")
+                return None
+        
+        if self.l2:
+            self.l2.set(L2Cache.nft_key(mint_address), json.dumps(data), self.l2.metadata_ttl)
+        self._accessed(nft)
+        return nft
+    
+    @traced('cache.get_many', CACHE_LATENCY, root=False, op='get_many')
+    def get_many(self, mint_addresses: Iterable[str], prefetch: bool = False) -> Dict[str, NFTMetadata]:
+        """Look up many mints: one lock for memory, one L2 round trip, then one pass over the disk
+
+        Missing mints are left out. ``prefetch=True`` loads without counting
+        hits/misses or notifying the prefetcher, and only inserts mints still
+        absent from memory, so a stale disk copy never replaces a newer entry
+        and prefetched NFTs do not jump ahead of ones in use.
+        """
+        found: Dict[str, NFTMetadata] = {}
+        missing: List[str] = []
+        with self.cache_lock:
+            for mint in dict.fromkeys(mint_addresses):
+                nft = self.metadata_cache.get(mint)
+                if nft is not None:
+                    found[mint] = nft
+                elif mint not in self.negative_cache:
+                    missing.append(mint)
+        if not prefetch:
+            self.cache_hits.inc(len(found))
+            self.cache_misses.inc(len(missing))
+        
+        loaded: Dict[str, NFTMetadata] = {}
+        if missing and self.l2:
+            for key, data in self.l2.get_many([L2Cache.nft_key(m) for m in missing]).items():
                 try:
-                    with open(cache_file, 'r') as f:
-                        data = json.load(f)
-                        nft = NFTMetadata(**data)
-                        self.metadata_cache[mint_address] = nft
-                        return nft
+                    nft = NFTMetadata.from_dict(json.loads(data))
+                    loaded[nft.mint] = nft
                 except Exception as e:
-                    logger.error(f"Error loading NFT from cache: {e}")
-            
-            return None
+                    logger.error(f"Error decoding NFT from L2 cache: {e}")
+            L2_HITS.inc(len(loaded))
+            missing = [m for m in missing if m not in loaded]
+        
+        with self.cache_lock:
+            on_disk = [m for m in missing if m in self.presence]
+        DISK_PROBES_SKIPPED.inc(len(missing) - len(on_disk))
+        from_disk: Dict[str, str] = {}
+        for mint in sorted(on_disk):
+            try:
+                with open(self.cache_dir / f"{mint}.json", 'r') as f:
+                    raw = f.read()
+                nft = NFTMetadata.from_dict(json.loads(raw))
+                loaded[mint] = nft
+                from_disk[mint] = raw
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.error(f"Error loading NFT from cache: {e}")
+        
+        if loaded:
+            with self.cache_lock:
+                for mint, nft in loaded.items():
+                    current = self.metadata_cache.get(mint) if prefetch else None
+                    if current is not None:
+                        loaded[mint] = current  # cached while we were reading the disk
+                        continue
+                    self.metadata_cache[mint] = nft
+                    self._index_collection(nft)
+            if self.l2 and from_disk:
+                self.l2.set_many({L2Cache.nft_key(m): raw for m, raw in from_disk.items()}, self.l2.metadata_ttl)
+            found.update(loaded)
+        
+        if not prefetch:
+            for nft in found.values():
+                self._accessed(nft)
+        return found
     
+    @traced('cache.cache_nft', CACHE_LATENCY, root=False, op='cache_nft')
     def cache_nft(self, nft: NFTMetadata):
         with self.cache_lock:
             self.metadata_cache[nft.mint] = nft
             # Save to disk cache
             cache_file = self.cache_dir / f"{nft.mint}.json"
             try:
-                with open(cache_file, 'w') as f:
-                    json.dump(vars(nft), f)
+                with self.disk_lock, open(cache_file, 'w') as f:
+                    json.dump(nft.to_dict(), f)
+                self._mark_present(nft.mint)
             except Exception as e:
                 logger.error(f"Error saving NFT to cache: {e}")
+            self.negative_cache.pop(nft.mint, None)
+            self._index_collection(nft)
             
             # Update memory usage metric
             self.memory_usage.set(psutil.Process().memory_info().rss / 1024 / 1024)
+        
+        if self.l2:
+            key = L2Cache.nft_key(nft.mint)
+            self.l2.set(key, json.dumps(nft.to_dict()), self.l2.metadata_ttl)
+            self.l2.publish_invalidation([key])
+        
+        self.event_bus.publish('cache.nft', nft, key=nft.mint)
     
+    @traced('cache.put_many', CACHE_LATENCY, root=False, op='put_many')
+    def put_many(self, nfts: Iterable[NFTMetadata]):
+        """Cache many NFTs: encode outside the lock, then one lock, one disk pass and one L2 round trip
+
+        Only the memory update holds ``cache_lock``; readers keep going while
+        the files are written, and the presence filter learns each mint once
+        its file exists.
+        """
+        encoded = {nft.mint: (nft, json.dumps(nft.to_dict())) for nft in nfts}
+        if not encoded:
+            return
+        with self.cache_lock:
+            for mint, (nft, _) in encoded.items():
+                self.metadata_cache[mint] = nft
+                self.negative_cache.pop(mint, None)
+                self._index_collection(nft)
+        
+        written: List[str] = []
+        with self.disk_lock:
+            for mint, (_, data) in encoded.items():
+                try:
+                    with open(self.cache_dir / f"{mint}.json", 'w') as f:
+                        f.write(data)
+                    written.append(mint)
+                except Exception as e:
+                    logger.error(f"Error saving NFT to cache: {e}")
+        with self.cache_lock:
+            for mint in written:
+                self._mark_present(mint)
+        self.memory_usage.set(psutil.Process().memory_info().rss / 1024 / 1024)
+        
+        if self.l2:
+            items = {L2Cache.nft_key(mint): data for mint, (_, data) in encoded.items()}
+            self.l2.set_many(items, self.l2.metadata_ttl)
+            self.l2.publish_invalidation(list(items))
+        
+        for mint, (nft, _) in encoded.items():
+            self.event_bus.publish('cache.nft', nft, key=mint)
+    
+    def collection_mints(self, collection_address: str) -> List[str]:
+        """Cached mints known to belong to a collection"""
+        with self.cache_lock:
+            return list(self.collection_index.get(collection_address, ()))
+    
+    def missing_from_memory(self, mint_addresses: Iterable[str]) -> List[str]:
+        with self.cache_lock:
+            return [m for m in mint_addresses if m not in self.metadata_cache]
+    
+    def _index_collection(self, nft: NFTMetadata):
+        # Caller holds cache_lock
+        address = nft.collection.get('address') if nft.collection else None
+        if address:
+            self.collection_index.setdefault(address, set()).add(nft.mint)
+    
+    def _accessed(self, nft: NFTMetadata):
+        if self.prefetcher:
+            self.prefetcher.on_access(nft)
+    
+    def _load_collection_index(self) -> Dict[str, Set[str]]:
+        try:
+            with open(self.cache_dir / self.COLLECTIONS_FILE, 'r') as f:
+                return {address: set(mints) for address, mints in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.error(f"Error loading collection index: {e}")
+            return {}
+    
+    def mark_absent(self, mint_address: str):
+        """Remember for ``negative_ttl`` seconds that a mint does not exist upstream"""
+        with self.cache_lock:
+            if mint_address not in self.metadata_cache:
+                self.negative_cache[mint_address] = True
+    
+    def is_absent(self, mint_address: str) -> bool:
+        with self.cache_lock:
+            return mint_address in self.negative_cache
+    
+    def _mark_present(self, mint_address: str):
+        # Caller holds cache_lock
+        if mint_address in self.presence:
+            return
+        self.presence.add(mint_address)
+        if self.presence.full:
+            self.presence = self._rebuild_presence()
+    
+    def _disk_mints(self) -> List[str]:
+        with os.scandir(self.cache_dir) as entries:
+            return [e.name[:-5] for e in entries if e.name.endswith('.json')]
+    
+    def _rebuild_presence(self, mints: Optional[List[str]] = None) -> PresenceFilter:
+        """Build the presence filter from the disk store's file listing and persist it"""
+        start = time.perf_counter()
+        if mints is None:
+            mints = self._disk_mints()
+        presence = PresenceFilter.build(mints, self.presence_error_rate)
+        try:
+            presence.save(self._presence_path, mints)
+        except Exception as e:
+            logger.error(f"Error saving presence filter: {e}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Built presence filter over {len(mints)} cached NFTs in {elapsed_ms:.1f}ms")
+        return presence
+    
+    def save_index(self):
+        """Persist the collection index and presence filter so the next start can skip rebuilding them"""
+        # The filter is saved with a digest of the listing it covers, so files other
+        # processes wrote into cache_dir are folded in first; files written or
+        # deleted after this listing change the digest and make the saved filter stale.
+        on_disk = self._disk_mints()
+        unseen = [m for m in on_disk if m not in self.presence]
+        with self.cache_lock:
+            try:
+                for mint in unseen:
+                    self._mark_present(mint)
+                index = {address: sorted(mints) for address, mints in self.collection_index.items()}
+                tmp = self.cache_dir / f"{self.COLLECTIONS_FILE}.tmp"
+                with open(tmp, 'w') as f:
+                    json.dump(index, f)
+                os.replace(tmp, self.cache_dir / self.COLLECTIONS_FILE)
+                self.presence.save(self._presence_path, on_disk)
+            except Exception as e:
+                logger.error(f"Error saving cache index: {e}")
+    
+    def load_metadata(self, nfts: List[NFTMetadata]):
+        """Bulk-insert into memory only (no disk, L2 or events), e.g. when restoring a snapshot
+
+        Later items count as more recently used.
+        """
+        with self.cache_lock:
+            for nft in nfts:
+                self.metadata_cache[nft.mint] = nft
+    
+    @traced('cache.update_price', CACHE_LATENCY, root=False, op='update_price')
     def update_price(self, mint_address: str, floor_price: float, last_sale_price: float):
+        now = datetime.now()
+        self.price_history.append(mint_address, floor_price, last_sale_price, now.timestamp())
         with self.cache_lock:
-            self.price_cache[mint_address] = {
+            self._stale_prices.discard(mint_address)
+        
+        if self.l2:
+            key = L2Cache.price_key(mint_address)
+            price = {
                 'floor_price': floor_price,
                 'last_sale_price': last_sale_price,
-                'updated_at': datetime.now().isoformat()
+                'updated_at': now.isoformat()
             }
+            self.l2.set(key, json.dumps(price), self.l2.price_ttl)
+            self.l2.publish_invalidation([key])
+        
+        self.event_bus.publish('cache.price', {
+            'mint': mint_address,
+            'floor_price': floor_price,
+            'last_sale_price': last_sale_price,
+        }, key=mint_address)
     
+    @traced('cache.get_price', CACHE_LATENCY, root=False, op='get_price')
     def get_price(self, mint_address: str) -> Optional[Dict]:
+        """Latest price if it is newer than ``price_ttl``; falls back to the shared L2 tier"""
         with self.cache_lock:
-            return self.price_cache.get(mint_address)
+            stale = mint_address in self._stale_prices
+        latest = None if stale else self.price_history.latest(mint_address)
+        
+        if latest is None and self.l2:
+            data = self.l2.get(L2Cache.price_key(mint_address))
+            if data is not None:
+                price = json.loads(data)
+                timestamp = datetime.fromisoformat(price['updated_at']).timestamp()
+                known = self.price_history.latest(mint_address)
+                if known is None or timestamp > known['timestamp']:
+                    self.price_history.append(mint_address, price['floor_price'], price['last_sale_price'], timestamp)
+                with self.cache_lock:
+                    self._stale_prices.discard(mint_address)
+                latest = self.price_history.latest(mint_address)
+        
+        if latest is None or time.time() - latest['timestamp'] > self.price_ttl:
+            return None
+        return {
+            'floor_price': latest['floor_price'],
+            'last_sale_price': latest['last_sale_price'],
+            'updated_at': datetime.fromtimestamp(latest['timestamp']).isoformat()
+        }
+    
+    @property
+    def price_history(self) -> 'PriceHistoryStore':
+        if self._price_history is None:
+            with self._price_history_lock:
+                if self._price_history is None:
+                    from ..config import get_config
+                    from .price_history import PriceHistoryStore  # deferred: pulls in NumPy
+
+                    self._price_history = PriceHistoryStore.from_config(get_config().CACHE)
+        return self._price_history
+
+    def get_price_history(self, mint_address: str, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> Optional[Dict]:
+        """min/max/mean floor and last-sale prices recorded for a mint between ``start`` and ``end``"""
+        return self.price_history.window_stats(
+            mint_address,
+            start.timestamp() if start else None,
+            end.timestamp() if end else None,
+        )
+    
+    def _invalidate_local(self, keys: List[str]):
+        with self.cache_lock:
+            for key in keys:
+                kind, _, mint = key.partition(':')
+                if kind == 'nft':
+                    self.metadata_cache.pop(mint, None)
+                elif kind == 'price':
+                    # Keep the history; the next get_price() reads the peer's value from L2
+                    self._stale_prices.add(mint)
+    
+    def list_cached_mints(self) -> List[str]:
+        """List mints held in memory or in the disk cache"""
+        with self.cache_lock:
+            mints = set(self.metadata_cache.keys())
+        mints.update(self._disk_mints())
+        return sorted(mints)
     
     def clear_cache(self):
         with self.cache_lock:
             self.metadata_cache.clear()
-            self.price_cache.clear()
+            self._stale_prices.clear()
+            self.negative_cache.clear()
+            self.price_history.clear()
             logger.info("Cache cleared")
+        
+        self.event_bus.publish('cache.cleared', datetime.now())
     
     def get_cache_stats(self) -> Dict:
         return {
             'metadata_cache_size': len(self.metadata_cache),
-            'price_cache_size': len(self.price_cache),
+            'price_cache_size': len(self.price_history),
+            'negative_cache_size': len(self.negative_cache),
+            'presence_filter_keys': len(self.presence),
+            'price_history_mb': self.price_history.nbytes / 1024 / 1024,
             'memory_usage_mb': psutil.Process().memory_info().rss / 1024 / 1024,
             'cache_hits': self.cache_hits._value.get(),
             'cache_misses': self.cache_misses._value.get()
@@ -0,0 +1,99 @@
+from typing import Dict, Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+from loguru import logger
+from prometheus_client import Counter, Gauge
+from .nft_cache import NFTCacheManager, NFTMetadata
+
+PREFETCHED = Counter('nft_cache_prefetched', 'NFTs loaded into memory ahead of use by the sibling prefetcher')
+PREFETCH_USED = Counter('nft_cache_prefetch_used', 'Prefetched NFTs that were later looked up')
+PREFETCH_ACCURACY = Gauge('nft_cache_prefetch_accuracy', 'Share of prefetched NFTs that were later looked up')
+
+
+class CollectionPrefetcher:
+    """Loads the cached siblings of an NFT's collection when one of them is looked up
+
+    Siblings come from the cache's collection index and are loaded through
+    ``get_many`` on a background thread, at most once per collection every
+    ``cooldown`` seconds and at most ``max_siblings`` at a time. Accuracy is
+    the share of prefetched NFTs looked up before ``track_limit`` newer
+    prefetches push them out of tracking.
+    """
+
+    def __init__(self, cache_manager: NFTCacheManager, max_siblings: int = 200, cooldown: float = 60.0,
+                 track_limit: int = 100_000):
+        self.cache_manager = cache_manager
+        self.max_siblings = max_siblings
+        self.cooldown = cooldown
+        self.track_limit = track_limit
+        self.prefetched = 0
+        self.used = 0
+        self._lock = threading.Lock()
+        self._last_run: Dict[str, float] = {}
+        self._pending: Dict[str, Future] = {}
+        self._unused: 'OrderedDict[str, None]' = OrderedDict()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-prefetch')
+        cache_manager.prefetcher = self
+
+    @classmethod
+    def from_config(cls, cache_manager: NFTCacheManager, cache_config) -> 'CollectionPrefetcher':
+        return cls(cache_manager, max_siblings=cache_config.PREFETCH_SIBLINGS, cooldown=cache_config.PREFETCH_COOLDOWN)
+
+    @property
+    def accuracy(self) -> float:
+        return self.used / self.prefetched if self.prefetched else 0.0
+
+    def on_access(self, nft: NFTMetadata):
+        """Called by the cache on every successful lookup; cheap and non-blocking"""
+        with self._lock:
+            if nft.mint in self._unused:
+                del self._unused[nft.mint]
+                self.used += 1
+                PREFETCH_USED.inc()
+                PREFETCH_ACCURACY.set(self.accuracy)
+
+            address = nft.collection.get('address') if nft.collection else None
+            if not address or address in self._pending:
+                return
+            now = time.monotonic()
+            if now - self._last_run.get(address, -self.cooldown) < self.cooldown:
+                return
+            self._last_run[address] = now
+            self._pending[address] = self._pool.submit(self._prefetch, address)
+
+    def _prefetch(self, address: str):
+        try:
+            siblings = self.cache_manager.missing_from_memory(self.cache_manager.collection_mints(address))
+            if not siblings:
+                return
+            loaded = self.cache_manager.get_many(siblings[:self.max_siblings], prefetch=True)
+            with self._lock:
+                for mint in loaded:
+                    self._unused[mint] = None
+                while len(self._unused) > self.track_limit:
+                    self._unused.popitem(last=False)
+                self.prefetched += len(loaded)
+                PREFETCHED.inc(len(loaded))
+                PREFETCH_ACCURACY.set(self.accuracy)
+        except Exception as e:
+            logger.error(f"Error prefetching collection {address}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(address, None)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the prefetches queued so far have finished"""
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.result(timeout)
+
+    def stats(self) -> Dict:
+        return {'prefetched': self.prefetched, 'used': self.used, 'accuracy': self.accuracy}
+
+    def close(self):
+        if self.cache_manager.prefetcher is self:
+            self.cache_manager.prefetcher = None
+        self._pool.shutdown(wait=True)
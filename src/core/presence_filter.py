@@ -0,0 +1,109 @@
+from typing import Iterable, Optional
+from pathlib import Path
+import hashlib
+import math
+import os
+import struct
+from loguru import logger
+
+_HEADER = struct.Struct('<4sIQQ16s')  # magic, hash count, bit count, keys added, digest of the store listing
+_MAGIC = b'NFB3'
+
+
+def listing_digest(keys: Iterable[str]) -> bytes:
+    """Order-independent digest of the store's file listing
+
+    Unlike a file count, it changes when one file is deleted and another added.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for key in sorted(keys):
+        digest.update(key.encode())
+        digest.update(b'\0')
+    return digest.digest()
+
+
+class PresenceFilter:
+    """Bloom filter over the mints in the disk store
+
+    ``mint in filter`` is never false for a mint that was added, and false
+    positives happen at about ``error_rate`` while no more than ``capacity``
+    keys have been added. Not thread-safe; callers hold their own lock.
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        bits = int(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.nbits = max(64, (bits + 7) // 8 * 8)
+        self.nhashes = max(1, round(self.nbits / capacity * math.log(2)))
+        self.bits = bytearray(self.nbits // 8)
+        self.count = 0
+
+    @classmethod
+    def build(cls, keys: Iterable[str], error_rate: float = 0.01, headroom: float = 2.0) -> 'PresenceFilter':
+        """Filter holding ``keys``, sized for ``headroom`` times as many"""
+        keys = list(keys)
+        presence = cls(max(int(len(keys) * headroom), 100_000), error_rate)
+        for key in keys:
+            presence.add(key)
+        return presence
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        h2 |= 1
+        for i in range(self.nhashes):
+            yield (h1 + i * h2) % self.nbits
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def full(self) -> bool:
+        return self.count > self.capacity
+
+    def save(self, path: Path, listing: Iterable[str]):
+        """Write atomically, recording that the filter covers the store files named in ``listing``"""
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.nhashes, self.nbits, self.count, listing_digest(listing)))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, listing: Iterable[str], error_rate: float = 0.01) -> Optional['PresenceFilter']:
+        """Filter saved at ``path`` if it was saved over the same store files as ``listing``
+
+        A store whose listing changed since the save (a file written or deleted
+        by a process that did not save the filter, or a crash before saving)
+        gets None, and the caller rebuilds.
+        """
+        try:
+            with open(path, 'rb') as f:
+                magic, nhashes, nbits, count, saved_digest = _HEADER.unpack(f.read(_HEADER.size))
+                bits = bytearray(f.read())
+            if magic != _MAGIC or len(bits) * 8 != nbits or saved_digest != listing_digest(listing):
+                return None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error loading presence filter: {e}")
+            return None
+
+        presence = cls.__new__(cls)
+        presence.error_rate = error_rate
+        presence.nhashes = nhashes
+        presence.nbits = nbits
+        presence.capacity = max(1, int(nbits * math.log(2) ** 2 / -math.log(error_rate)))
+        presence.bits = bits
+        presence.count = count
+        return presence
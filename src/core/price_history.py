@@ -0,0 +1,202 @@
+from typing import Dict, List, Optional
+from collections import OrderedDict
+import threading
+import time
+import numpy as np
+
+
+class PriceHistoryStore:
+    """Fixed-size price history per mint, backed by preallocated NumPy arrays
+
+    Each tracked mint owns one row of ``length`` slots in three 2-D arrays
+    (timestamp, floor, last sale) used as a ring buffer, so appends are O(1)
+    and window queries are vectorized over a single row. Rows are allocated in
+    doubling blocks up to ``max_mints``; beyond that the least recently updated
+    mint is evicted and its row reused. Memory is bounded by
+    ``max_mints * length * 24`` bytes.
+    """
+
+    def __init__(self, length: int = 64, max_mints: int = 20000, initial_mints: int = 1024):
+        self.length = length
+        self.max_mints = max_mints
+
+        rows = min(initial_mints, max_mints)
+        self._ts = np.zeros((rows, length), dtype=np.float64)
+        self._floor = np.zeros((rows, length), dtype=np.float64)
+        self._last_sale = np.zeros((rows, length), dtype=np.float64)
+        self._head = np.zeros(rows, dtype=np.int64)
+        self._count = np.zeros(rows, dtype=np.int64)
+
+        self._rows: "OrderedDict[str, int]" = OrderedDict()  # mint -> row, least recently updated first
+        self._free: List[int] = list(range(rows - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cache_config) -> 'PriceHistoryStore':
+        return cls(length=cache_config.PRICE_HISTORY_LENGTH, max_mints=cache_config.PRICE_HISTORY_MAX_MINTS)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, mint: str) -> bool:
+        return mint in self._rows
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self._ts, self._floor, self._last_sale, self._head, self._count))
+
+    def append(self, mint: str, floor_price: float, last_sale_price: float, timestamp: Optional[float] = None):
+        """Record a price point; ``timestamp`` is Unix seconds and defaults to now"""
+        ts = time.time() if timestamp is None else timestamp
+        with self._lock:
+            row = self._rows.get(mint)
+            if row is None:
+                row = self._allocate(mint)
+            else:
+                self._rows.move_to_end(mint)
+            i = self._head[row]
+            self._ts[row, i] = ts
+            self._floor[row, i] = floor_price
+            self._last_sale[row, i] = last_sale_price
+            self._head[row] = (i + 1) % self.length
+            if self._count[row] < self.length:
+                self._count[row] += 1
+
+    def latest(self, mint: str) -> Optional[Dict]:
+        """Most recent point as ``{'timestamp', 'floor_price', 'last_sale_price'}``"""
+        with self._lock:
+            row = self._rows.get(mint)
+            if row is None:
+                return None
+            i = (self._head[row] - 1) % self.length
+            return {
+                'timestamp': float(self._ts[row, i]),
+                'floor_price': float(self._floor[row, i]),
+                'last_sale_price': float(self._last_sale[row, i]),
+            }
+
+    def history(self, mint: str, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Points with ``start <= timestamp <= end`` in insertion order, as arrays keyed by column"""
+        with self._lock:
+            row = self._rows.get(mint)
+            if row is None:
+                return {'timestamp': np.empty(0), 'floor_price': np.empty(0), 'last_sale_price': np.empty(0)}
+            count = self._count[row]
+            order = (self._head[row] - count + np.arange(count)) % self.length
+            ts = self._ts[row, order]
+            floor = self._floor[row, order]
+            last_sale = self._last_sale[row, order]
+
+        mask = np.ones(count, dtype=bool)
+        if start is not None:
+            mask &= ts >= start
+        if end is not None:
+            mask &= ts <= end
+        return {'timestamp': ts[mask], 'floor_price': floor[mask], 'last_sale_price': last_sale[mask]}
+
+    def window_stats(self, mint: str, start: Optional[float] = None, end: Optional[float] = None) -> Optional[Dict]:
+        """min/max/mean of floor and last sale over a time window, or None if it has no points"""
+        points = self.history(mint, start, end)
+        if not len(points['timestamp']):
+            return None
+        stats = {'count': int(len(points['timestamp']))}
+        for column in ('floor_price', 'last_sale_price'):
+            values = points[column]
+            stats[f'{column}_min'] = float(values.min())
+            stats[f'{column}_max'] = float(values.max())
+            stats[f'{column}_mean'] = float(values.mean())
+        return stats
+
+    def export_rows(self) -> Dict:
+        """Copy of every tracked row, least recently updated mint first, for snapshots"""
+        with self._lock:
+            mints = list(self._rows)
+            rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(mints))
+            return {
+                'mints': mints,
+                'timestamp': self._ts[rows],
+                'floor_price': self._floor[rows],
+                'last_sale_price': self._last_sale[rows],
+                'head': self._head[rows],
+                'count': self._count[rows],
+            }
+
+    def load_rows(self, mints: List[str], timestamp: np.ndarray, floor_price: np.ndarray,
+                  last_sale_price: np.ndarray, head: np.ndarray, count: np.ndarray):
+        """Bulk-insert rows produced by :meth:`export_rows`, replacing existing history
+
+        Rows whose length differs from this store's are re-packed; if there are
+        more mints than ``max_mints``, the most recently updated ones are kept.
+        """
+        width = timestamp.shape[1] if timestamp.ndim == 2 else self.length
+        if width != self.length:
+            timestamp, floor_price, last_sale_price, head, count = self._repack(
+                timestamp, floor_price, last_sale_price, head, count)
+        skip = max(0, len(mints) - self.max_mints)
+        mints = mints[skip:]
+        with self._lock:
+            for mint in mints:
+                if mint in self._rows:
+                    self._release(self._rows.pop(mint))
+            rows = np.array([self._allocate(mint) for mint in mints], dtype=np.int64)
+            if len(rows):
+                self._ts[rows] = timestamp[skip:]
+                self._floor[rows] = floor_price[skip:]
+                self._last_sale[rows] = last_sale_price[skip:]
+                self._head[rows] = head[skip:]
+                self._count[rows] = count[skip:]
+
+    def _repack(self, timestamp, floor_price, last_sale_price, head, count):
+        n, width = timestamp.shape
+        keep = np.minimum(count, self.length)
+        columns = [np.zeros((n, self.length)) for _ in range(3)]
+        for r in range(n):
+            order = (head[r] - keep[r] + np.arange(keep[r])) % width
+            for out, source in zip(columns, (timestamp, floor_price, last_sale_price)):
+                out[r, :keep[r]] = source[r, order]
+        return (*columns, keep % self.length, keep)
+
+    def mints(self) -> List[str]:
+        with self._lock:
+            return list(self._rows)
+
+    def discard(self, mint: str):
+        with self._lock:
+            row = self._rows.pop(mint, None)
+            if row is not None:
+                self._release(row)
+
+    def clear(self):
+        with self._lock:
+            for row in self._rows.values():
+                self._release(row)
+            self._rows.clear()
+
+    def _release(self, row: int):
+        self._head[row] = 0
+        self._count[row] = 0
+        self._free.append(row)
+
+    def _allocate(self, mint: str) -> int:
+        if not self._free:
+            rows = len(self._head)
+            if rows < self.max_mints:
+                self._grow(min(rows * 2, self.max_mints))
+            else:
+                _, row = self._rows.popitem(last=False)
+                self._release(row)
+        row = self._free.pop()
+        self._rows[mint] = row
+        return row
+
+    def _grow(self, rows: int):
+        old = len(self._head)
+        for name in ('_ts', '_floor', '_last_sale'):
+            grown = np.zeros((rows, self.length), dtype=np.float64)
+            grown[:old] = getattr(self, name)
+            setattr(self, name, grown)
+        for name in ('_head', '_count'):
+            grown = np.zeros(rows, dtype=np.int64)
+            grown[:old] = getattr(self, name)
+            setattr(self, name, grown)
+        self._free.extend(range(rows - 1, old - 1, -1))
@@ -0,0 +1,224 @@
+from typing import Iterator, List, Optional
+from contextlib import contextmanager
+from dataclasses import fields
+from datetime import datetime, timezone
+import gc
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from loguru import logger
+import numpy as np
+from .nft_cache import NFTCacheManager, NFTMetadata
+
+SNAPSHOT_VERSION = 1
+PRICE_COLUMNS = ('timestamp', 'floor_price', 'last_sale_price', 'head', 'count')
+METADATA_FIELDS = [f.name for f in fields(NFTMetadata)]
+LAST_UPDATED = METADATA_FIELDS.index('last_updated')
+
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic GC while decoding one batch of containers that all survive
+
+    Only the decode is covered, never the yield to the caller, so other threads
+    and the caller's own work run with the collector enabled.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class CacheSnapshotter:
+    """Periodic snapshots of an ``NFTCacheManager`` for warm restarts
+
+    A snapshot is a directory ``snapshot-<UTC time>`` holding:
+
+    * ``metadata.jsonl[.gz]`` - NFTs in the cache's iteration (insertion)
+      order, as one JSON array of positional rows per ``restore_batch_size``
+      entries; restore replays them in that order, so recency after a restart
+      is approximated by when each NFT was first cached
+    * ``prices.npz`` (compressed) or ``prices.<column>.npy`` (memory-mapped on
+      restore) - the price-history rows, plus ``prices.mints.json``
+    * ``manifest.json`` - written last; a directory without it is incomplete
+
+    The caches are copied under their locks (a list of references and one
+    NumPy copy), and serialized and written afterwards on the snapshot thread,
+    so readers are only held up for the copy. Snapshots are written to a
+    ``.tmp`` directory and renamed into place, and only the newest
+    ``max_backups`` are kept.
+    """
+
+    def __init__(self,
+                 cache_manager: NFTCacheManager,
+                 backup_path: str,
+                 interval: float = 86400,
+                 max_backups: int = 7,
+                 compression: bool = True,
+                 restore_batch_size: int = 10000):
+        self.cache_manager = cache_manager
+        self.backup_path = Path(backup_path)
+        self.interval = interval
+        self.max_backups = max_backups
+        self.compression = compression
+        self.restore_batch_size = restore_batch_size
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cache_manager: NFTCacheManager, backup_config) -> 'CacheSnapshotter':
+        return cls(
+            cache_manager,
+            str(backup_config.BACKUP_PATH),
+            interval=backup_config.BACKUP_INTERVAL,
+            max_backups=backup_config.MAX_BACKUPS,
+            compression=backup_config.COMPRESSION_ENABLED,
+        )
+
+    def start(self):
+        """Take a snapshot every ``interval`` seconds on a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, final_snapshot: bool = True):
+        """Stop the periodic thread, optionally writing one last snapshot"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if final_snapshot:
+            self.snapshot()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.snapshot()
+
+    def snapshots(self) -> List[Path]:
+        """Complete snapshots, newest first"""
+        if not self.backup_path.exists():
+            return []
+        found = [p for p in self.backup_path.iterdir()
+                 if p.is_dir() and p.name.startswith('snapshot-') and (p / 'manifest.json').exists()]
+        return sorted(found, key=lambda p: p.name, reverse=True)
+
+    def snapshot(self) -> Optional[Path]:
+        """Write a snapshot now and rotate old ones; returns its path, or None on error"""
+        with self._write_lock:
+            try:
+                start = time.perf_counter()
+                metadata = self._copy_metadata()
+                prices = self.cache_manager.price_history.export_rows()
+                copied = time.perf_counter() - start
+
+                self.backup_path.mkdir(parents=True, exist_ok=True)
+                name = f"snapshot-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}"
+                tmp = self.backup_path / f"{name}.tmp"
+                tmp.mkdir()
+
+                metadata_file = tmp / ('metadata.jsonl.gz' if self.compression else 'metadata.jsonl')
+                opener = gzip.open(metadata_file, 'wt', compresslevel=1) if self.compression \
+                    else open(metadata_file, 'w')
+                with opener as f:
+                    for i in range(0, len(metadata), self.restore_batch_size):
+                        rows = [[getattr(nft, name) for name in METADATA_FIELDS]
+                                for nft in metadata[i:i + self.restore_batch_size]]
+                        for row in rows:
+                            row[LAST_UPDATED] = row[LAST_UPDATED].isoformat()
+                        f.write(json.dumps(rows, separators=(',', ':')))
+                        f.write('\n')
+
+                if self.compression:
+                    np.savez_compressed(tmp / 'prices.npz', **{c: prices[c] for c in PRICE_COLUMNS})
+                else:
+                    for column in PRICE_COLUMNS:
+                        np.save(tmp / f"prices.{column}.npy", prices[column])
+                with open(tmp / 'prices.mints.json', 'w') as f:
+                    json.dump(prices['mints'], f)
+
+                with open(tmp / 'manifest.json', 'w') as f:
+                    json.dump({
+                        'version': SNAPSHOT_VERSION,
+                        'created_at': datetime.now(timezone.utc).isoformat(),
+                        'metadata_file': metadata_file.name,
+                        'metadata_count': len(metadata),
+                        'price_count': len(prices['mints']),
+                    }, f)
+
+                final = self.backup_path / name
+                os.replace(tmp, final)
+                self._rotate()
+                logger.info(f"Cache snapshot {final.name}: {len(metadata)} NFTs, {len(prices['mints'])} price rows "
+                            f"in {time.perf_counter() - start:.2f}s (caches copied in {copied * 1000:.1f}ms)")
+                return final
+            except Exception as e:
+                logger.error(f"Error writing cache snapshot: {e}")
+                return None
+
+    def restore(self, snapshot: Optional[Path] = None) -> bool:
+        """Load the newest (or the given) snapshot into the cache manager"""
+        if snapshot is None:
+            snapshots = self.snapshots()
+            if not snapshots:
+                return False
+            snapshot = snapshots[0]
+        try:
+            start = time.perf_counter()
+            with open(snapshot / 'manifest.json') as f:
+                manifest = json.load(f)
+            if manifest.get('version') != SNAPSHOT_VERSION:
+                logger.warning(f"Skipping cache snapshot {snapshot.name} with version {manifest.get('version')}")
+                return False
+
+            restored = 0
+            for batch in self._read_metadata(snapshot / manifest['metadata_file']):
+                self.cache_manager.load_metadata(batch)
+                restored += len(batch)
+
+            with open(snapshot / 'prices.mints.json') as f:
+                mints = json.load(f)
+            if (snapshot / 'prices.npz').exists():
+                with np.load(snapshot / 'prices.npz') as archive:
+                    columns = {c: archive[c] for c in PRICE_COLUMNS}
+            else:
+                columns = {c: np.load(snapshot / f"prices.{c}.npy", mmap_mode='r') for c in PRICE_COLUMNS}
+            self.cache_manager.price_history.load_rows(mints, **columns)
+
+            logger.info(f"Restored cache snapshot {snapshot.name}: {restored} NFTs, {len(mints)} price rows "
+                        f"in {time.perf_counter() - start:.2f}s")
+            return True
+        except Exception as e:
+            logger.error(f"Error restoring cache snapshot {snapshot}: {e}")
+            return False
+
+    def _copy_metadata(self) -> List[NFTMetadata]:
+        with self.cache_manager.cache_lock:
+            return list(self.cache_manager.metadata_cache.values())
+
+    def _read_metadata(self, path: Path) -> Iterator[List[NFTMetadata]]:
+        opener = gzip.open(path, 'rt') if path.suffix == '.gz' else open(path)
+        with opener as f:
+            for line in f:
+                with _gc_paused():
+                    batch = []
+                    for row in json.loads(line):
+                        row[LAST_UPDATED] = datetime.fromisoformat(row[LAST_UPDATED])
+                        batch.append(NFTMetadata(*row))
+                yield batch
+
+    def _rotate(self):
+        for old in self.snapshots()[self.max_backups:]:
+            shutil.rmtree(old, ignore_errors=True)
+        for leftover in self.backup_path.glob('snapshot-*.tmp'):
+            shutil.rmtree(leftover, ignore_errors=True)
@@ -0,0 +1,364 @@
+from typing import Dict, Iterable, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import asyncio
+import base64
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import os
+from pathlib import Path
+import aiohttp
+from loguru import logger
+from prometheus_client import Counter, Gauge
+from .instrumentation import http_trace_config
+from .metadata_resolver import DEFAULT_ARWEAVE_GATEWAYS, DEFAULT_IPFS_GATEWAYS, content_address
+
+THUMBNAILS = Counter('nft_thumbnails', 'Thumbnail requests by outcome', ['result'])
+THUMBNAIL_QUEUE = Gauge('nft_thumbnail_queue', 'Thumbnail jobs waiting for a download slot')
+THUMBNAIL_CACHE_BYTES = Gauge('nft_thumbnail_cache_bytes', 'Bytes used by the thumbnail disk cache')
+
+VISIBLE = 0  # priority of rows on screen; larger numbers run later
+
+
+def make_thumbnail(data: bytes, size: int) -> bytes:
+    """Decode an image and return it as a ``size`` x ``size`` PNG, scaled to fit and centred"""
+    from PIL import Image  # optional: only needed once thumbnails are generated
+
+    with Image.open(io.BytesIO(data)) as source:
+        # JPEGs decode straight to a reduced scale, skipping most of the work
+        source.draft('RGB', (size, size))
+        image = source.convert('RGBA')
+    image.thumbnail((size, size), Image.LANCZOS)
+    canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    canvas.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+    out = io.BytesIO()
+    canvas.save(out, format='PNG')
+    return out.getvalue()
+
+
+@dataclass
+class _Job:
+    url: str
+    priority: int
+    future: asyncio.Future
+    task: Optional[asyncio.Task] = None
+
+
+class ThumbnailService:
+    """Fixed-size NFT image thumbnails with a prioritized download queue and disk cache
+
+    Requests go through a priority queue served by ``max_downloads`` download
+    slots; decoding and resizing run on a ``workers`` thread pool so the event
+    loop never blocks. Each URL is fetched once however many callers ask for
+    it. :meth:`set_visible` moves the rows on screen to the front and cancels
+    everything else, so a fast scroll through a large wallet only downloads
+    what the user stops on.
+
+    Thumbnails are PNG files named by the SHA-256 of the source image, so the
+    same artwork behind different URLs is resized and stored once. The cache
+    is LRU-evicted down to ``max_cache_bytes``; recency survives restarts via
+    file modification times, and the URL index is saved by :meth:`close`.
+
+    All methods must be called on the event loop that owns the service.
+    """
+
+    def __init__(self,
+                 cache_dir: str,
+                 size: int = 64,
+                 max_cache_bytes: int = 256 * 1024 * 1024,
+                 max_downloads: int = 16,
+                 workers: int = 4,
+                 timeout: float = 15.0,
+                 max_image_bytes: int = 16 * 1024 * 1024,
+                 ipfs_gateway: str = DEFAULT_IPFS_GATEWAYS[0],
+                 arweave_gateway: str = DEFAULT_ARWEAVE_GATEWAYS[0]):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.max_cache_bytes = max_cache_bytes
+        self.max_downloads = max_downloads
+        self.timeout = timeout
+        self.max_image_bytes = max_image_bytes
+        self.ipfs_gateway = ipfs_gateway
+        self.arweave_gateway = arweave_gateway
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnail')
+        self._jobs: Dict[str, _Job] = {}
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._running = 0
+
+        self._urls: Dict[str, str] = {}  # source URL -> content hash
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # content hash -> bytes, least recent first
+        self._bytes = 0
+        self._load_index()
+
+    @classmethod
+    def from_config(cls, gui_config, cache_dir: str) -> 'ThumbnailService':
+        return cls(
+            cache_dir,
+            size=gui_config.THUMBNAIL_SIZE,
+            max_cache_bytes=gui_config.THUMBNAIL_CACHE_MB * 1024 * 1024,
+            max_downloads=gui_config.THUMBNAIL_DOWNLOADS,
+            workers=gui_config.THUMBNAIL_WORKERS,
+        )
+
+    async def get(self, url: str, priority: int = VISIBLE) -> Optional[bytes]:
+        """PNG thumbnail for ``url``, or None if it cannot be fetched or decoded
+
+        Raises ``asyncio.CancelledError`` if the request is cancelled by
+        :meth:`cancel` or :meth:`set_visible`.
+        """
+        if not url:
+            return None
+        data = self.lookup(url)
+        if data is not None:
+            THUMBNAILS.labels(result='hit').inc()
+            return data
+
+        job = self._jobs.get(url)
+        if job is None:
+            job = _Job(url, priority, asyncio.get_running_loop().create_future())
+            self._jobs[url] = job
+            self._push(job)
+            self._ensure_workers()
+        elif job.task is None and priority < job.priority:
+            job.priority = priority
+            self._push(job)
+        return await asyncio.shield(job.future)
+
+    def lookup(self, url: str) -> Optional[bytes]:
+        """Cached thumbnail for ``url`` without downloading anything"""
+        digest = self._urls.get(url)
+        if digest is None or digest not in self._entries:
+            return None
+        path = self._path(digest)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            self._forget(digest)
+            return None
+        self._entries.move_to_end(digest)
+        return data
+
+    def cancel(self, url: str):
+        """Drop the request for ``url``, including a download or resize in progress"""
+        job = self._jobs.pop(url, None)
+        if job is None:
+            return
+        job.future.cancel()
+        if job.task is not None:
+            job.task.cancel()
+        THUMBNAILS.labels(result='cancelled').inc()
+        self._update_queue_gauge()
+
+    def set_visible(self, urls: Iterable[str]):
+        """Serve ``urls`` first and cancel every other pending request"""
+        visible = set(urls)
+        for url, job in list(self._jobs.items()):
+            if url not in visible:
+                self.cancel(url)
+            elif job.task is None and job.priority > VISIBLE:
+                job.priority = VISIBLE
+                self._push(job)
+
+    def stats(self) -> Dict:
+        return {
+            'cached': len(self._entries),
+            'cache_bytes': self._bytes,
+            'queued': max(0, len(self._jobs) - self._running),
+            'running': self._running,
+        }
+
+    async def close(self):
+        """Cancel pending work, stop the workers and save the URL index"""
+        for url in list(self._jobs):
+            self.cancel(url)
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self.session:
+            await self.session.close()
+            self.session = None
+        self._pool.shutdown(wait=False)
+        self.save_index()
+
+    def save_index(self):
+        live = {url: digest for url, digest in self._urls.items() if digest in self._entries}
+        path = self.cache_dir / 'index.json'
+        try:
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(live, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"Error saving thumbnail index: {e}")
+
+    def _load_index(self):
+        files = []
+        for path in self.cache_dir.glob('*/*.png'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, digest, size in sorted(files):
+            self._entries[digest] = size
+            self._bytes += size
+        THUMBNAIL_CACHE_BYTES.set(self._bytes)
+
+        try:
+            with open(self.cache_dir / 'index.json') as f:
+                index = json.load(f)
+            self._urls = {url: digest for url, digest in index.items() if digest in self._entries}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable thumbnail index: {e}")
+
+    def _path(self, digest: str) -> Path:
+        return self.cache_dir / digest[:2] / f"{digest}.png"
+
+    def _forget(self, digest: str):
+        size = self._entries.pop(digest, None)
+        if size is not None:
+            self._bytes -= size
+            THUMBNAIL_CACHE_BYTES.set(self._bytes)
+
+    def _store(self, url: str, digest: str, thumbnail: bytes):
+        path = self._path(digest)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_bytes(thumbnail)
+        os.replace(tmp, path)
+        self._forget(digest)
+        self._entries[digest] = len(thumbnail)
+        self._bytes += len(thumbnail)
+        self._urls[url] = digest
+
+        while self._bytes > self.max_cache_bytes and len(self._entries) > 1:
+            old, _ = next(iter(self._entries.items()))
+            self._forget(old)
+            try:
+                self._path(old).unlink()
+            except OSError:
+                pass
+        THUMBNAIL_CACHE_BYTES.set(self._bytes)
+
+    def _push(self, job: _Job):
+        heapq.heappush(self._heap, (job.priority, next(self._seq), job.url))
+        self._update_queue_gauge()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _next_job(self) -> Optional[_Job]:
+        while self._heap:
+            priority, _, url = heapq.heappop(self._heap)
+            job = self._jobs.get(url)
+            # Skip entries for cancelled jobs and ones superseded by a re-prioritization
+            if job is not None and job.task is None and job.priority == priority:
+                return job
+        return None
+
+    def _update_queue_gauge(self):
+        THUMBNAIL_QUEUE.set(max(0, len(self._jobs) - self._running))
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.max_downloads)]
+
+    async def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            job.task = asyncio.ensure_future(self._generate(job.url))
+            self._running += 1
+            self._update_queue_gauge()
+            try:
+                await asyncio.wait([job.task])
+            finally:
+                self._running -= 1
+                self._update_queue_gauge()
+            self._finish(job)
+
+    def _finish(self, job: _Job):
+        if self._jobs.get(job.url) is job:
+            del self._jobs[job.url]
+        if job.future.done():
+            return
+        if job.task.cancelled():
+            job.future.cancel()
+            return
+        error = job.task.exception()
+        if error is not None:
+            logger.error(f"Error creating thumbnail for {job.url}: {error}")
+            THUMBNAILS.labels(result='failed').inc()
+            job.future.set_result(None)
+        else:
+            job.future.set_result(job.task.result())
+
+    async def _generate(self, url: str) -> Optional[bytes]:
+        data = await self._download(url)
+        if data is None:
+            THUMBNAILS.labels(result='failed').inc()
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in self._entries:
+            # Same artwork under another URL
+            self._urls[url] = digest
+            THUMBNAILS.labels(result='shared').inc()
+            return self.lookup(url)
+
+        loop = asyncio.get_running_loop()
+        thumbnail = await loop.run_in_executor(self._pool, make_thumbnail, data, self.size)
+        self._store(url, digest, thumbnail)
+        THUMBNAILS.labels(result='generated').inc()
+        return thumbnail
+
+    def _source_url(self, url: str) -> str:
+        address = content_address(url)
+        if address is None:
+            return url
+        kind, path = address
+        return (self.ipfs_gateway if kind == 'ipfs' else self.arweave_gateway) + path
+
+    async def _download(self, url: str) -> Optional[bytes]:
+        if url.startswith('data:'):
+            header, _, payload = url.partition(',')
+            return base64.b64decode(payload) if header.endswith(';base64') else None
+
+        if not self.session:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                                 trace_configs=[http_trace_config()])
+        try:
+            async with self.session.get(self._source_url(url)) as response:
+                if response.status != 200:
+                    logger.debug(f"Image {url} returned HTTP {response.status}")
+                    return None
+                if (response.content_length or 0) > self.max_image_bytes:
+                    return None
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(65536):
+                    body += chunk
+                    if len(body) > self.max_image_bytes:
+                        logger.debug(f"Image {url} exceeds {self.max_image_bytes} bytes")
+                        return None
+                return bytes(body)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Image download {url} failed: {e!r}")
+            return None
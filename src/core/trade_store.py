@@ -0,0 +1,343 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+import math
+import os
+import shutil
+import threading
+import numpy as np
+from loguru import logger
+from prometheus_client import Counter
+
+# Shared across instances so several stores can live in one process
+TRADES_INGESTED = Counter('nft_trade_store_ingested', 'Number of trades appended to the trade store')
+TRADES_DUPLICATE = Counter('nft_trade_store_duplicates', 'Number of duplicate trades skipped by the trade store')
+
+
+class TradeStore:
+    """Local append-only trade history partitioned by collection and day.
+
+    Every partition is a directory of plain ``.npy`` files, one per column, so
+    scans memory-map only the columns they touch. Rows inside a partition are
+    kept sorted by time, which turns time-range scans into two binary searches.
+    Writers build a new partition version next to the old one and swap a
+    ``CURRENT`` pointer, so readers never observe a half-written partition.
+    """
+
+    COLUMNS: Dict[str, str] = {
+        'timestamp': '<i8',  # unix seconds
+        'price': '<f8',  # SOL
+        'mint': 'S44',
+        'buyer': 'S44',
+        'seller': 'S44',
+        'signature': 'S88',
+    }
+    TIME_COLUMN = 'timestamp'
+    KEY_COLUMN = 'signature'
+
+    def __init__(self, root_dir: str = "data/trades"):
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # (collection, day) -> set of keys already stored, loaded on first write
+        self._keys: Dict[Tuple[str, str], set] = {}
+
+    def append(self, collection_address: str, records: Iterable[Dict]) -> int:
+        """Append records, skipping keys already stored. Returns rows written."""
+        by_day: Dict[str, List[Dict]] = {}
+        for record in records:
+            row = self._to_row(record)
+            if row is None:
+                continue
+            by_day.setdefault(self._day(row[self.TIME_COLUMN]), []).append(row)
+
+        written = 0
+        with self._lock:
+            for day, rows in by_day.items():
+                written += self._append_partition(collection_address, day, rows)
+        return written
+
+    def _append_partition(self, collection_address: str, day: str, rows: List[Dict]) -> int:
+        keys = self._partition_keys(collection_address, day)
+        fresh = []
+        seen = set()
+        for row in rows:
+            key = row[self.KEY_COLUMN]
+            if key in keys or key in seen:
+                continue
+            seen.add(key)
+            fresh.append(row)
+
+        TRADES_DUPLICATE.inc(len(rows) - len(fresh))
+        if not fresh:
+            return 0
+
+        partition = self._partition_dir(collection_address, day)
+        current = self._load_partition(partition, mmap=False)
+        merged = {}
+        for name, dtype in self.COLUMNS.items():
+            new_values = np.array([row[name] for row in fresh], dtype=dtype)
+            if current is not None:
+                new_values = np.concatenate([current[name], new_values])
+            merged[name] = new_values
+
+        order = np.argsort(merged[self.TIME_COLUMN], kind='stable')
+        for name in merged:
+            merged[name] = merged[name][order]
+
+        self._write_partition(partition, merged)
+        keys.update(seen)
+        TRADES_INGESTED.inc(len(fresh))
+        return len(fresh)
+
+    def _write_partition(self, partition: Path, columns: Dict[str, np.ndarray]):
+        partition.mkdir(parents=True, exist_ok=True)
+        previous = self._current_version(partition)
+        version = f"v{int(previous[1:]) + 1:06d}" if previous else "v000001"
+
+        version_dir = partition / version
+        version_dir.mkdir(exist_ok=True)
+        for name, values in columns.items():
+            np.save(version_dir / f"{name}.npy", values, allow_pickle=False)
+
+        pointer_tmp = partition / "CURRENT.tmp"
+        pointer_tmp.write_text(version)
+        os.replace(pointer_tmp, partition / "CURRENT")
+
+        # Keep the version just replaced for readers that resolved CURRENT
+        # before the swap; anything older has had a full write to finish.
+        for stale in partition.iterdir():
+            if stale.is_dir() and stale.name not in (version, previous):
+                shutil.rmtree(stale, ignore_errors=True)
+
+    def _partition_keys(self, collection_address: str, day: str) -> set:
+        cache_key = (collection_address, day)
+        keys = self._keys.get(cache_key)
+        if keys is None:
+            partition = self._load_partition(
+                self._partition_dir(collection_address, day),
+                columns=[self.KEY_COLUMN],
+            )
+            keys = set(partition[self.KEY_COLUMN].tolist()) if partition else set()
+            self._keys[cache_key] = keys
+        return keys
+
+    def _to_row(self, record: Dict) -> Optional[Dict]:
+        try:
+            row = {}
+            for name, dtype in self.COLUMNS.items():
+                value = record[name]
+                if name == self.TIME_COLUMN:
+                    value = self._to_epoch(value)
+                elif dtype.startswith('S'):
+                    value = str(value).encode('ascii')
+                    # NumPy would silently cut longer strings to the column width
+                    if len(value) > int(dtype[1:]):
+                        raise ValueError(f"{name} longer than {dtype[1:]} bytes: {value[:16].decode()}...")
+                row[name] = value
+            return row
+        except Exception as e:
+            logger.error(f"Skipping malformed record: {e}")
+            return None
+
+    def query(self,
+              collection_address: str,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None,
+              min_price: Optional[float] = None,
+              max_price: Optional[float] = None,
+              columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """Return the columns of all rows in ``[start, end)`` and the price range"""
+        wanted = list(columns or self.COLUMNS)
+        needed = set(wanted) | {self.TIME_COLUMN}
+        if min_price is not None or max_price is not None:
+            needed.add('price')
+
+        start_ts = self._to_epoch(start) if start else None
+        end_ts = self._to_epoch(end) if end else None
+
+        chunks: Dict[str, List[np.ndarray]] = {name: [] for name in wanted}
+        for day in self.days(collection_address, start, end):
+            partition = self._load_partition(
+                self._partition_dir(collection_address, day), columns=list(needed)
+            )
+            if partition is None:
+                continue
+
+            times = partition[self.TIME_COLUMN]
+            lo = np.searchsorted(times, start_ts, side='left') if start_ts is not None else 0
+            hi = np.searchsorted(times, end_ts, side='left') if end_ts is not None else len(times)
+            if lo >= hi:
+                continue
+
+            mask = None
+            if min_price is not None or max_price is not None:
+                prices = partition['price'][lo:hi]
+                mask = np.ones(hi - lo, dtype=bool)
+                if min_price is not None:
+                    mask &= prices >= min_price
+                if max_price is not None:
+                    mask &= prices <= max_price
+
+            for name in wanted:
+                values = partition[name][lo:hi]
+                chunks[name].append(values[mask] if mask is not None else np.asarray(values))
+
+        return {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype=self.COLUMNS[name])
+            for name, parts in chunks.items()
+        }
+
+    def get_trades(self,
+                   collection_address: str,
+                   start: Optional[datetime] = None,
+                   end: Optional[datetime] = None,
+                   min_price: Optional[float] = None,
+                   max_price: Optional[float] = None) -> List[Dict]:
+        """Return stored trades in the same shape as ``TensorClient.get_recent_trades``"""
+        columns = self.query(collection_address, start, end, min_price, max_price)
+        trades = []
+        for i in range(len(columns[self.TIME_COLUMN])):
+            trade = {}
+            for name, dtype in self.COLUMNS.items():
+                value = columns[name][i]
+                if name == self.TIME_COLUMN:
+                    value = datetime.fromtimestamp(int(value))
+                elif dtype.startswith('S'):
+                    value = value.decode('ascii')
+                else:
+                    value = value.item()
+                trade[name] = value
+            trades.append(trade)
+        return trades
+
+    def collections(self) -> List[str]:
+        """List collections with stored history"""
+        return sorted(p.name for p in self.root_dir.iterdir() if p.is_dir())
+
+    def days(self,
+             collection_address: str,
+             start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> List[str]:
+        """List stored day partitions for a collection, optionally bounded"""
+        collection_dir = self.root_dir / collection_address
+        if not collection_dir.exists():
+            return []
+        first = self._day(self._to_epoch(start)) if start else None
+        last = self._day(self._to_epoch(end)) if end else None
+        days = []
+        for p in sorted(collection_dir.iterdir()):
+            if not (p / "CURRENT").exists():
+                continue
+            if (first and p.name < first) or (last and p.name > last):
+                continue
+            days.append(p.name)
+        return days
+
+    def last_timestamp(self, collection_address: str) -> Optional[datetime]:
+        """Time of the newest stored row for a collection"""
+        for day in reversed(self.days(collection_address)):
+            partition = self._load_partition(
+                self._partition_dir(collection_address, day), columns=[self.TIME_COLUMN]
+            )
+            if partition is not None and len(partition[self.TIME_COLUMN]):
+                return datetime.fromtimestamp(int(partition[self.TIME_COLUMN][-1]))
+        return None
+
+    def _load_partition(self,
+                        partition: Path,
+                        columns: Optional[List[str]] = None,
+                        mmap: bool = True) -> Optional[Dict[str, np.ndarray]]:
+        version = self._current_version(partition)
+        if not version:
+            return None
+        try:
+            try:
+                return self._load_version(partition / version, columns, mmap)
+            except FileNotFoundError:
+                # A writer moved CURRENT on and removed this version meanwhile
+                latest = self._current_version(partition)
+                if not latest or latest == version:
+                    raise
+                return self._load_version(partition / latest, columns, mmap)
+        except Exception as e:
+            logger.error(f"Error loading partition {partition}: {e}")
+            return None
+
+    def _load_version(self,
+                      version_dir: Path,
+                      columns: Optional[List[str]],
+                      mmap: bool) -> Dict[str, np.ndarray]:
+        return {
+            name: np.load(version_dir / f"{name}.npy",
+                          mmap_mode='r' if mmap else None,
+                          allow_pickle=False)
+            for name in (columns or self.COLUMNS)
+        }
+
+    async def backfill(self, tensor_client, collection_address: str, hours: int = 24 * 30) -> int:
+        """Fetch and store up to ``hours`` of history for a collection"""
+        trades = await tensor_client.get_recent_trades(collection_address, hours)
+        written = self.append(collection_address, trades)
+        logger.info(f"Backfilled {written} trades for {collection_address}")
+        return written
+
+    async def ingest(self, tensor_client, collection_address: str, default_hours: int = 24) -> int:
+        """Fetch trades newer than the last stored one and append them"""
+        hours = default_hours
+        last = self.last_timestamp(collection_address)
+        if last:
+            elapsed = (datetime.now() - last).total_seconds()
+            # One hour of overlap; duplicates are dropped by signature
+            hours = max(1, math.ceil(elapsed / 3600) + 1)
+
+        trades = await tensor_client.get_recent_trades(collection_address, hours)
+        return self.append(collection_address, trades)
+
+    def _partition_dir(self, collection_address: str, day: str) -> Path:
+        return self.root_dir / collection_address / day
+
+    @staticmethod
+    def _current_version(partition: Path) -> Optional[str]:
+        try:
+            return (partition / "CURRENT").read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _to_epoch(value) -> int:
+        if isinstance(value, datetime):
+            return int(value.timestamp())
+        return int(value)
+
+    @staticmethod
+    def _day(epoch: int) -> str:
+        return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+class ListingStore(TradeStore):
+    """Snapshots of active listings, stored like trades and keyed by mint and list time"""
+
+    COLUMNS: Dict[str, str] = {
+        'timestamp': '<i8',  # listed_at, unix seconds
+        'price': '<f8',  # SOL
+        'mint': 'S44',
+        'seller': 'S44',
+        'listing_id': 'S64',
+    }
+    KEY_COLUMN = 'listing_id'
+
+    def __init__(self, root_dir: str = "data/listings"):
+        super().__init__(root_dir)
+
+    def _to_row(self, record: Dict) -> Optional[Dict]:
+        if 'timestamp' not in record and 'listed_at' in record:
+            record = dict(record, timestamp=record['listed_at'])
+        if 'listing_id' not in record and 'mint' in record and 'timestamp' in record:
+            record = dict(record, listing_id=f"{record['mint']}:{self._to_epoch(record['timestamp'])}")
+        return super()._to_row(record)
+
+    async def record(self, tensor_client, collection_address: str) -> int:
+        """Store the current ``TensorClient.get_nft_listings`` snapshot"""
+        listings = await tensor_client.get_nft_listings(collection_address)
+        return self.append(collection_address, listings)
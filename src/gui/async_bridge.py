@@ -0,0 +1,82 @@
+from typing import Any, Callable, Coroutine, Optional
+from concurrent.futures import Future
+import asyncio
+import functools
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+from loguru import logger
+
+
+class _UiDispatcher(QObject):
+    # Emitted from the loop thread; Qt queues the call onto the thread owning this object
+    invoke = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.invoke.connect(self._run)
+
+    def _run(self, fn: Callable):
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"Error in UI callback: {e}")
+
+
+class AsyncLoopThread:
+    """Dedicated asyncio loop thread for the GUI's network and disk work
+
+    Create it on the UI thread. Coroutines are scheduled with :meth:`submit`
+    and their callbacks run back on the UI thread, so handlers never block
+    painting and never touch widgets from the loop thread.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._dispatcher = _UiDispatcher()
+        self._thread = threading.Thread(target=self._run, name="gui-asyncio", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self,
+               coro: Coroutine,
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None) -> Future:
+        """Schedule a coroutine on the loop thread"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+        def done(f: Future):
+            if f.cancelled():
+                return
+            error = f.exception()
+            if error is not None:
+                logger.error(f"Background task failed: {error}")
+                if on_error:
+                    self.call_in_ui(on_error, error)
+            elif on_done:
+                self.call_in_ui(on_done, f.result())
+
+        future.add_done_callback(done)
+        return future
+
+    def call_in_ui(self, fn: Callable, *args):
+        """Run ``fn(*args)`` on the UI thread"""
+        self._dispatcher.invoke.emit(functools.partial(fn, *args))
+
+    def stop(self):
+        if not self._thread.is_alive():
+            return
+
+        async def _shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(_shutdown(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
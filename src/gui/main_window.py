@@ -2,32 +2,25 @@ import sys
 from typing import Dict, List, Optional
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                           QHBoxLayout, QLabel, QPushButton, QTableWidget,
-                           QTableWidgetItem, QProgressBar, QComboBox,
+                           QHBoxLayout, QLabel, QPushButton, QTableView,
+                           QHeaderView, QAbstractItemView, QComboBox,
                            QLineEdit, QMessageBox, QTabWidget, QFrame)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread
-from PyQt5.QtGui import QPalette, QColor, QFont
+from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtGui import QPalette, QColor, QFont, QPixmap
 import asyncio
 from loguru import logger
+from ..config import get_config
+from ..core.instrumentation import start_monitoring
 from ..core.nft_cache import NFTCacheManager, NFTMetadata
+from ..core.snapshot import CacheSnapshotter
+from ..core.thumbnails import ThumbnailService
 from ..trading.trade_manager import NFTTradeManager, MarketMetrics
+from ..trading.market_poller import MarketPoller
+from .async_bridge import AsyncLoopThread
+from .table_models import Column, RecordTableModel, format_sol
 
-class AsyncUpdateThread(QThread):
-    update_signal = pyqtSignal(dict)
-    
-    def __init__(self, trade_manager: NFTTradeManager):
-        super().__init__()
-        self.trade_manager = trade_manager
-        self.running = True
-    
-    def run(self):
-        while self.running:
-            stats = self.trade_manager.get_trading_stats()
-            self.update_signal.emit(stats)
-            self.msleep(1000)  # Update every second
-    
-    def stop(self):
-        self.running = False
+PORTFOLIO_BATCH_SIZE = 1000
+FRAME_INTERVAL = 1 / 60  # at most one redraw per frame per subscription
 
 class NFTManagerGUI(QMainWindow):
     def __init__(self, cache_manager: NFTCacheManager, trade_manager: NFTTradeManager):
@@ -35,6 +28,13 @@ class NFTManagerGUI(QMainWindow):
         self.cache_manager = cache_manager
         self.trade_manager = trade_manager
         
+        # Background loop for network and disk work; callbacks come back on the UI thread
+        self.loop_thread = AsyncLoopThread()
+        self.loop_thread.start()
+        self.known_collections = set()
+        self.thumbnails = ThumbnailService.from_config(get_config().GUI,
+                                                       str(cache_manager.cache_dir / 'thumbnails'))
+        
         # Setup UI
         self.setWindowTitle("Solana NFT Manager")
         self.setMinimumSize(1200, 800)
@@ -58,13 +58,43 @@ class NFTManagerGUI(QMainWindow):
         # Setup status bar
         self.statusBar().showMessage("Ready")
         
-        # Setup update thread
-        self.update_thread = AsyncUpdateThread(self.trade_manager)
-        self.update_thread.update_signal.connect(self.update_stats)
-        self.update_thread.start()
+        # Push-based updates: events are coalesced per frame and delivered on the UI thread
+        self.market_poller = MarketPoller(self.trade_manager)
+        self.loop_thread.loop.call_soon_threadsafe(self.market_poller.start)
+        bus = self.trade_manager.event_bus
+        self.subscriptions = [
+            bus.subscribe('trading.stats', lambda topic, stats: self.update_stats(stats),
+                          min_interval=FRAME_INTERVAL, scheduler=self.ui_scheduler),
+            bus.subscribe('market.*', self.on_market_event,
+                          min_interval=FRAME_INTERVAL, scheduler=self.ui_scheduler),
+            bus.subscribe('cache.price', self.on_price_event,
+                          min_interval=FRAME_INTERVAL, scheduler=self.ui_scheduler),
+        ]
         
         logger.info("GUI initialized")
     
+    def ui_scheduler(self, delay: float, fn):
+        """Event-bus scheduler that delivers on the UI thread"""
+        self.loop_thread.call_in_ui(QTimer.singleShot, max(0, int(delay * 1000)), fn)
+    
+    def on_market_event(self, topic: str, payload):
+        """Apply market metrics and new trades for the selected collection"""
+        collection = self.collection_combo.currentData()
+        if not collection or not topic.endswith(collection):
+            return
+        if topic.startswith('market.metrics.'):
+            self._apply_market((payload, []))
+        elif topic.startswith('market.trade.'):
+            self.market_model.enqueue([{
+                'id': payload['signature'], 'time': payload['timestamp'], 'mint': payload['mint'],
+                'price': payload['price'], 'event': "Sale",
+            }])
+    
+    def on_price_event(self, topic: str, payload: Dict):
+        """Update prices of portfolio rows already shown"""
+        if self.nft_model.has_key(payload['mint']):
+            self.nft_model.enqueue([payload])
+    
     def setup_dark_theme(self):
         """Setup dark theme for the application"""
         palette = QPalette()
@@ -95,24 +125,44 @@ class NFTManagerGUI(QMainWindow):
         summary_layout = QHBoxLayout(summary_frame)
         
         # Add summary widgets
-        total_value_label = QLabel("Total Portfolio Value: 0 SOL")
-        total_value_label.setFont(QFont("Arial", 14, QFont.Bold))
-        summary_layout.addWidget(total_value_label)
+        self.total_value_label = QLabel("Total Portfolio Value: 0 SOL")
+        self.total_value_label.setFont(QFont("Arial", 14, QFont.Bold))
+        summary_layout.addWidget(self.total_value_label)
         
-        nft_count_label = QLabel("Total NFTs: 0")
-        nft_count_label.setFont(QFont("Arial", 14, QFont.Bold))
-        summary_layout.addWidget(nft_count_label)
+        self.nft_count_label = QLabel("Total NFTs: 0")
+        self.nft_count_label.setFont(QFont("Arial", 14, QFont.Bold))
+        summary_layout.addWidget(self.nft_count_label)
         
         layout.addWidget(summary_frame)
         
-        # NFT list table
-        self.nft_table = QTableWidget()
-        self.nft_table.setColumnCount(6)
-        self.nft_table.setHorizontalHeaderLabels([
-            "Name", "Collection", "Floor Price", "Last Sale",
-            "Rarity Rank", "Actions"
-        ])
+        # NFT list table; details are loaded only for rows the view actually paints
+        self.nft_model = RecordTableModel([
+            Column("Name", 'name'),
+            Column("Collection", 'collection_name'),
+            Column("Floor Price", 'floor_price', format_sol),
+            Column("Last Sale", 'last_sale_price', format_sol),
+            Column("Rarity Rank", 'rarity_rank'),
+            Column("Mint", 'mint'),
+        ], key_field='mint', parent=self)
+        self.nft_model.detail_loader = self.load_nft_details
+        self.nft_model.thumbnail_loader = self.load_thumbnail
+        # Totals are recomputed at most a few times per second, not once per batch
+        self.summary_timer = QTimer(self)
+        self.summary_timer.setSingleShot(True)
+        self.summary_timer.setInterval(250)
+        self.summary_timer.timeout.connect(self.update_portfolio_summary)
+        self.nft_model.rowsInserted.connect(self.schedule_summary_update)
+        self.nft_model.dataChanged.connect(self.schedule_summary_update)
+        self.nft_table = self.create_table_view(self.nft_model)
+        self.nft_table.setIconSize(QSize(28, 28))
         layout.addWidget(self.nft_table)
+        # After scrolling settles, thumbnails for rows no longer on screen are cancelled
+        self.visible_rows_timer = QTimer(self)
+        self.visible_rows_timer.setSingleShot(True)
+        self.visible_rows_timer.setInterval(100)
+        self.visible_rows_timer.timeout.connect(self.update_visible_thumbnails)
+        self.nft_table.verticalScrollBar().valueChanged.connect(lambda *_: self.visible_rows_timer.start())
+        self.nft_model.layoutChanged.connect(lambda *_: self.visible_rows_timer.start())
         
         # Refresh button
         refresh_btn = QPushButton("Refresh Portfolio")
@@ -153,11 +203,14 @@ class NFTManagerGUI(QMainWindow):
         layout.addWidget(controls_frame)
         
         # Trading history table
-        self.trade_table = QTableWidget()
-        self.trade_table.setColumnCount(5)
-        self.trade_table.setHorizontalHeaderLabels([
-            "Time", "Type", "NFT", "Price", "Status"
-        ])
+        self.trade_model = RecordTableModel([
+            Column("Time", 'time', lambda t: t.strftime('%Y-%m-%d %H:%M:%S') if t else ""),
+            Column("Type", 'type'),
+            Column("NFT", 'mint'),
+            Column("Price", 'price', format_sol),
+            Column("Status", 'status'),
+        ], key_field='id', parent=self)
+        self.trade_table = self.create_table_view(self.trade_model)
         layout.addWidget(self.trade_table)
         
         return widget
@@ -184,13 +237,17 @@ class NFTManagerGUI(QMainWindow):
         layout.addWidget(metrics_frame)
         
         # Market activity table
-        self.market_table = QTableWidget()
-        self.market_table.setColumnCount(4)
-        self.market_table.setHorizontalHeaderLabels([
-            "Time", "NFT", "Price", "Event"
-        ])
+        self.market_model = RecordTableModel([
+            Column("Time", 'time', lambda t: t.strftime('%Y-%m-%d %H:%M:%S') if t else ""),
+            Column("NFT", 'mint'),
+            Column("Price", 'price', format_sol),
+            Column("Event", 'event'),
+        ], key_field='id', parent=self)
+        self.market_table = self.create_table_view(self.market_model)
         layout.addWidget(self.market_table)
         
+        self.collection_combo.currentTextChanged.connect(self.refresh_market)
+        
         return widget
     
     def create_settings_tab(self) -> QWidget:
@@ -227,32 +284,156 @@ class NFTManagerGUI(QMainWindow):
         
         return widget
     
+    def create_table_view(self, model: RecordTableModel) -> QTableView:
+        """Create a virtualized table view with fixed-height rows"""
+        view = QTableView()
+        view.setModel(model)
+        view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        view.setSortingEnabled(True)
+        # Fixed row heights let the view skip measuring off-screen rows
+        view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        view.verticalHeader().setDefaultSectionSize(30)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        view.horizontalHeader().setStretchLastSection(True)
+        return view
+    
     def refresh_portfolio(self):
         """Refresh the portfolio display"""
         try:
-            # Clear existing items
-            self.nft_table.setRowCount(0)
-            
-            # Add loading indicator
+            self.nft_model.clear()
             self.statusBar().showMessage("Refreshing portfolio...")
-            
-            # TODO: Implement async portfolio refresh
-            
-            self.statusBar().showMessage("Portfolio refreshed", 3000)
+            self.loop_thread.submit(
+                self._load_portfolio(),
+                on_done=lambda count: self.statusBar().showMessage(f"Portfolio refreshed: {count} NFTs", 3000),
+                on_error=lambda e: QMessageBox.critical(self, "Error", f"Failed to refresh portfolio: {str(e)}"),
+            )
             
         except Exception as e:
             logger.error(f"Error refreshing portfolio: {e}")
             QMessageBox.critical(self, "Error", f"Failed to refresh portfolio: {str(e)}")
     
+    async def _load_portfolio(self) -> int:
+        """List the wallet's NFTs and stream placeholder rows in batches"""
+        mints = await self.trade_manager.get_wallet_mints()
+        for i in range(0, len(mints), PORTFOLIO_BATCH_SIZE):
+            rows = [{'mint': mint, 'name': mint[:8] + "...", 'loaded': False}
+                    for mint in mints[i:i + PORTFOLIO_BATCH_SIZE]]
+            self.loop_thread.call_in_ui(self.nft_model.enqueue, rows)
+            await asyncio.sleep(0)
+        return len(mints)
+    
+    def load_nft_details(self, mint: str):
+        """Fetch metadata for a row that just became visible"""
+        self.loop_thread.submit(self._fetch_nft_row(mint), on_done=self._apply_nft_row)
+    
+    async def _fetch_nft_row(self, mint: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        nft = await loop.run_in_executor(None, self.cache_manager.get_nft, mint)
+        if nft is None:
+            nft = await self.trade_manager.get_nft_data(mint)
+        if nft is None:
+            return {'mint': mint, 'loaded': True}
+        
+        collection = nft.collection or {}
+        return {
+            'mint': mint,
+            'name': nft.name,
+            'collection_name': collection.get('name') or collection.get('address', ""),
+            'collection_address': collection.get('address'),
+            'floor_price': nft.floor_price,
+            'last_sale_price': nft.last_sale_price,
+            'image_url': nft.image_url,
+            'loaded': True,
+        }
+    
+    def _apply_nft_row(self, row: Dict):
+        self.nft_model.enqueue([row])
+        address = row.get('collection_address')
+        if address and address not in self.known_collections:
+            self.known_collections.add(address)
+            self.collection_combo.addItem(row.get('collection_name') or address, address)
+    
+    def load_thumbnail(self, mint: str, url: str):
+        """Fetch the thumbnail for a row that just became visible"""
+        self.loop_thread.submit(self.thumbnails.get(url), on_done=lambda data: self._apply_thumbnail(mint, data))
+    
+    def _apply_thumbnail(self, mint: str, data: Optional[bytes]):
+        pixmap = QPixmap()
+        if data and pixmap.loadFromData(data, 'PNG'):
+            self.nft_model.enqueue([{'mint': mint, 'thumbnail': pixmap}])
+    
+    def update_visible_thumbnails(self):
+        """Put on-screen rows first in the thumbnail queue and cancel the rest"""
+        first = self.nft_table.rowAt(0)
+        if first < 0:
+            return
+        last = self.nft_table.rowAt(self.nft_table.viewport().height() - 1)
+        if last < 0:
+            last = self.nft_model.rowCount() - 1
+        records = [self.nft_model.record(row) for row in range(first, last + 1)]
+        self.nft_model.retain_thumbnail_requests(r['mint'] for r in records if r)
+        urls = [r['image_url'] for r in records if r and r.get('image_url')]
+        self.loop_thread.loop.call_soon_threadsafe(self.thumbnails.set_visible, urls)
+    
+    def schedule_summary_update(self, *args):
+        if not self.summary_timer.isActive():
+            self.summary_timer.start()
+    
+    def update_portfolio_summary(self):
+        """Update the portfolio totals from loaded rows"""
+        rows = [self.nft_model.record(i) for i in range(self.nft_model.rowCount())]
+        total = sum(r.get('floor_price') or 0 for r in rows)
+        self.total_value_label.setText(f"Total Portfolio Value: {total:.2f} SOL")
+        self.nft_count_label.setText(f"Total NFTs: {len(rows)}")
+    
+    def refresh_market(self, *args):
+        """Load market metrics and activity for the selected collection"""
+        collection = self.collection_combo.currentData()
+        if not collection:
+            return
+        self.market_model.clear()
+        self.loop_thread.submit(self._load_market(collection), on_done=self._apply_market)
+        self.loop_thread.loop.call_soon_threadsafe(self._watch_only, collection)
+    
+    def _watch_only(self, collection: str):
+        # Runs on the loop thread, which owns the poller
+        for watched in list(self.market_poller.collections):
+            if watched != collection:
+                self.market_poller.unwatch(watched)
+        self.market_poller.watch(collection)
+    
+    async def _load_market(self, collection: str):
+        metrics, trades, listings = await asyncio.gather(
+            self.trade_manager.analyze_market(collection),
+            self.trade_manager.get_recent_trades(collection),
+            self.trade_manager.get_collection_listings(collection),
+        )
+        rows = [{'id': t['signature'], 'time': t['timestamp'], 'mint': t['mint'],
+                 'price': t['price'], 'event': "Sale"} for t in trades]
+        rows += [{'id': f"{listing['mint']}:{listing['listed_at'].timestamp()}", 'time': listing['listed_at'],
+                  'mint': listing['mint'], 'price': listing['price'], 'event': "Listing"}
+                 for listing in listings]
+        return metrics, rows
+    
+    def _apply_market(self, result):
+        metrics, rows = result
+        if metrics:
+            self.floor_price_label.setText(f"Floor Price: {metrics.floor_price:.3f} SOL")
+            self.volume_label.setText(f"24h Volume: {metrics.volume_24h:.2f} SOL")
+            self.listings_label.setText(f"Active Listings: {metrics.listed_count}")
+        self.market_model.enqueue(rows)
+    
     def place_buy_order(self):
         """Place a buy order"""
         try:
             price = float(self.price_input.text())
-            collection = self.collection_combo.currentText()
+            collection = self.collection_combo.currentData()
+            if not collection:
+                QMessageBox.warning(self, "Error", "Please select a collection")
+                return
             
-            # TODO: Implement async buy order
-            
-            QMessageBox.information(self, "Success", "Buy order placed successfully")
+            self._submit_order('Buy', self._buy_cheapest_listing(collection, price), price)
             
         except ValueError:
             QMessageBox.warning(self, "Error", "Please enter a valid price")
@@ -260,15 +441,30 @@ class NFTManagerGUI(QMainWindow):
             logger.error(f"Error placing buy order: {e}")
             QMessageBox.critical(self, "Error", f"Failed to place buy order: {str(e)}")
     
+    async def _buy_cheapest_listing(self, collection: str, price: float) -> Optional[str]:
+        listings = await self.trade_manager.get_collection_listings(collection)
+        candidates = sorted((listing for listing in listings if listing['price'] <= price),
+                            key=lambda listing: listing['price'])
+        if not candidates:
+            return None
+        # ``price`` is the most the user will pay; bid what the listing asks
+        cheapest = candidates[0]
+        nft = await self.trade_manager.get_nft_data(cheapest['mint'])
+        if nft and await self.trade_manager.place_buy_order(nft, cheapest['price']):
+            return nft.mint
+        return None
+    
     def place_sell_order(self):
         """Place a sell order"""
         try:
             price = float(self.price_input.text())
-            collection = self.collection_combo.currentText()
+            selected = self.nft_table.selectionModel().selectedRows()
+            if not selected:
+                QMessageBox.warning(self, "Error", "Please select an NFT in the portfolio")
+                return
+            mint = self.nft_model.record(selected[0].row())['mint']
             
-            # TODO: Implement async sell order
-            
-            QMessageBox.information(self, "Success", "Sell order placed successfully")
+            self._submit_order('Sell', self._sell_nft(mint, price), price)
             
         except ValueError:
             QMessageBox.warning(self, "Error", "Please enter a valid price")
@@ -276,6 +472,45 @@ class NFTManagerGUI(QMainWindow):
             logger.error(f"Error placing sell order: {e}")
             QMessageBox.critical(self, "Error", f"Failed to place sell order: {str(e)}")
     
+    async def _sell_nft(self, mint: str, price: float) -> Optional[str]:
+        nft = await self.trade_manager.get_nft_data(mint)
+        if nft and await self.trade_manager.place_sell_order(nft, price):
+            return mint
+        return None
+    
+    def _submit_order(self, side: str, coro, price: float):
+        """Run an order in the background and track it in the trade history table"""
+        order_id = f"{side}-{datetime.now().timestamp()}"
+        self.trade_model.enqueue([{
+            'id': order_id, 'time': datetime.now(), 'type': side,
+            'mint': "", 'price': price, 'status': "Pending",
+        }])
+        
+        def done(mint: Optional[str]):
+            status = "Placed" if mint else "Rejected"
+            self.trade_model.enqueue([{'id': order_id, 'mint': mint or "", 'status': status}])
+            self.statusBar().showMessage(f"{side} order {status.lower()}", 3000)
+        
+        def failed(error: Exception):
+            self.trade_model.enqueue([{'id': order_id, 'status': "Failed"}])
+            QMessageBox.critical(self, "Error", f"Failed to place {side.lower()} order: {str(error)}")
+        
+        self.loop_thread.submit(coro, on_done=done, on_error=failed)
+    
+    def restore_snapshot(self, snapshotter: CacheSnapshotter):
+        """Restore the last cache snapshot off the UI thread, then start periodic snapshots"""
+        self.statusBar().showMessage("Restoring cache snapshot...")
+        self.loop_thread.submit(
+            self._restore_snapshot(snapshotter),
+            on_done=lambda restored: self.statusBar().showMessage(
+                "Cache snapshot restored" if restored else "Ready", 3000),
+        )
+    
+    async def _restore_snapshot(self, snapshotter: CacheSnapshotter) -> bool:
+        restored = await asyncio.get_running_loop().run_in_executor(None, snapshotter.restore)
+        snapshotter.start()
+        return restored
+    
     def clear_cache(self):
         """Clear the NFT cache"""
         try:
@@ -298,13 +533,32 @@ class NFTManagerGUI(QMainWindow):
     
     def closeEvent(self, event):
         """Handle application closure"""
-        self.update_thread.stop()
-        self.update_thread.wait()
+        for subscription in self.subscriptions:
+            subscription.cancel()
+        self.loop_thread.submit(self.market_poller.stop())
+        try:
+            self.loop_thread.submit(self.thumbnails.close()).result(timeout=2)
+        except Exception as e:
+            logger.error(f"Error closing thumbnail service: {e}")
+        self.loop_thread.stop()
         super().closeEvent(event)
 
 def launch_gui(cache_manager: NFTCacheManager, trade_manager: NFTTradeManager):
     """Launch the NFT Manager GUI"""
+    start_monitoring()
+    
     app = QApplication(sys.argv)
     window = NFTManagerGUI(cache_manager, trade_manager)
     window.show()
-    sys.exit(app.exec_()) 
\ No newline at end of file
+    
+    # Warm the caches from the last snapshot and keep snapshotting while running
+    snapshotter = None
+    backup_config = get_config().BACKUP
+    if backup_config.ENABLE_AUTO_BACKUP:
+        snapshotter = CacheSnapshotter.from_config(cache_manager, backup_config)
+        window.restore_snapshot(snapshotter)
+    exit_code = app.exec_()
+    cache_manager.save_index()
+    if snapshotter:
+        snapshotter.stop()
+    sys.exit(exit_code)
@@ -0,0 +1,156 @@
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, QVariant
+
+
+class Column(NamedTuple):
+    header: str
+    key: str
+    fmt: Optional[Callable[[Any], str]] = None
+
+
+def format_sol(value: Any) -> str:
+    return f"{value:.3f} SOL" if isinstance(value, (int, float)) else ""
+
+
+class RecordTableModel(QAbstractTableModel):
+    """Virtualized table of dict records, identified by ``key_field``
+
+    Records are queued with :meth:`enqueue` and applied on a timer in batches,
+    so a burst of thousands of updates costs one insert/change notification per
+    batch instead of one per row. The view only asks for visible cells, which
+    is also when incomplete records (``loaded`` is False) are handed to
+    ``detail_loader`` to be filled in, and records with an ``image_url`` but
+    no ``thumbnail`` are handed to ``thumbnail_loader``.
+    """
+
+    def __init__(self,
+                 columns: List[Column],
+                 key_field: str = 'mint',
+                 batch_size: int = 2000,
+                 flush_interval_ms: int = 50,
+                 parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.key_field = key_field
+        self.batch_size = batch_size
+        self.detail_loader: Optional[Callable[[Any], None]] = None
+        self.thumbnail_loader: Optional[Callable[[Any, str], None]] = None
+
+        self._rows: List[Dict] = []
+        self._index: Dict[Any, int] = {}
+        self._pending: List[Dict] = []
+        self._requested = set()
+        self._thumbnails_requested = set()
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(flush_interval_ms)
+        self._flush_timer.timeout.connect(self._flush)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+
+        record = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            if not record.get('loaded', True):
+                self._request_details(record[self.key_field])
+            column = self.columns[index.column()]
+            value = record.get(column.key)
+            if column.fmt:
+                return column.fmt(value)
+            return "" if value is None else str(value)
+        if role == Qt.DecorationRole and index.column() == 0:
+            if 'thumbnail' not in record and record.get('image_url'):
+                self._request_thumbnail(record[self.key_field], record['image_url'])
+            return record.get('thumbnail', QVariant())
+        if role == Qt.UserRole:
+            return record
+        return QVariant()
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section].header
+        return QVariant()
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        key = self.columns[column].key
+        self.layoutAboutToBeChanged.emit()
+        self._rows.sort(
+            key=lambda r: (r.get(key) is None, r.get(key) if r.get(key) is not None else 0),
+            reverse=order == Qt.DescendingOrder,
+        )
+        self._index = {r[self.key_field]: i for i, r in enumerate(self._rows)}
+        self.layoutChanged.emit()
+
+    def enqueue(self, records: Iterable[Dict]):
+        """Queue new or updated records; must be called on the UI thread"""
+        self._pending.extend(records)
+        if self._pending and not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def has_key(self, key: Any) -> bool:
+        return key in self._index
+
+    def record(self, row: int) -> Optional[Dict]:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
+
+    def retain_thumbnail_requests(self, keys: Iterable[Any]):
+        """Forget thumbnail requests for other rows so they are asked for again when shown"""
+        self._thumbnails_requested.intersection_update(keys)
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows.clear()
+        self._index.clear()
+        self._pending.clear()
+        self._requested.clear()
+        self._thumbnails_requested.clear()
+        self.endResetModel()
+
+    def _flush(self):
+        batch = self._pending[:self.batch_size]
+        del self._pending[:self.batch_size]
+        if not self._pending:
+            self._flush_timer.stop()
+
+        inserts = []
+        changed_rows = []
+        for record in batch:
+            key = record[self.key_field]
+            row = self._index.get(key)
+            if row is None:
+                self._index[key] = len(self._rows) + len(inserts)
+                inserts.append(record)
+            elif row >= len(self._rows):
+                inserts[row - len(self._rows)].update(record)
+            else:
+                self._rows[row].update(record)
+                changed_rows.append(row)
+
+        if inserts:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(inserts) - 1)
+            self._rows.extend(inserts)
+            self.endInsertRows()
+
+        if changed_rows:
+            self.dataChanged.emit(
+                self.index(min(changed_rows), 0),
+                self.index(max(changed_rows), len(self.columns) - 1),
+            )
+
+    def _request_details(self, key: Any):
+        if self.detail_loader and key not in self._requested:
+            self._requested.add(key)
+            self.detail_loader(key)
+
+    def _request_thumbnail(self, key: Any, url: str):
+        if self.thumbnail_loader and key not in self._thumbnails_requested:
+            self._thumbnails_requested.add(key)
+            self.thumbnail_loader(key, url)
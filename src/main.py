@@ -7,6 +7,7 @@ from solana.rpc.async_api import AsyncClient
 from solana.keypair import Keypair
 from solana.publickey import PublicKey
 from anchorpy import Wallet
+from .core.instrumentation import InstrumentedClient, start_monitoring
 
 class NFTManager:
     def __init__(self, wallet_path: str, rpc_endpoint: str = "https://api.mainnet-beta.solana.com"):
@@ -18,7 +19,7 @@ class NFTManager:
             keypair = Keypair.from_secret_key(bytes(f.read()))
             
         self.wallet = Wallet(keypair)
-        self.client = AsyncClient(rpc_endpoint)
+        self.client = InstrumentedClient(AsyncClient(rpc_endpoint))
         logger.info("NFT Manager initialized")
 
     async def get_nft_info(self, mint_address: str) -> Optional[Dict]:
@@ -51,6 +52,7 @@ class NFTManager:
 
 async def main():
     """Example usage of NFT Manager"""
+    start_monitoring()
     manager = NFTManager("~/.config/solana/id.json")
     
     # Example: Get NFT info
@@ -0,0 +1,423 @@
+"""Headless asyncio service owning one cache, market poller and trade manager.
+
+Frontends (the GUI, the Node server, scripts) read through this service
+instead of building their own managers, so they share one warm cache and one
+upstream rate budget:
+
+    python -m src.service
+
+Read endpoints return JSON with an ``ETag``; responses are reused for a
+per-route TTL and ``If-None-Match`` revalidation answers 304. ``/api/stream``
+is a WebSocket of event-bus events (market metrics, new trades, prices and
+trading stats).
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+import asyncio
+import hashlib
+import json
+import signal
+import time
+from aiohttp import WSMsgType, web
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram
+from .config import CACHE_DIR, get_config
+from .core.events import asyncio_scheduler
+from .core.instrumentation import LATENCY_BUCKETS, start_monitoring
+from .core.l2_cache import L2Cache
+from .core.metadata_resolver import MetadataResolver
+from .core.nft_cache import NFTCacheManager
+from .core.prefetch import CollectionPrefetcher
+from .core.price_history import PriceHistoryStore
+from .core.snapshot import CacheSnapshotter
+from .trading.market_poller import MarketPoller
+from .trading.trade_manager import NFTTradeManager
+
+SERVICE_LATENCY = Histogram('nft_service_request_seconds', 'Service request latency',
+                            ['route', 'status'], buckets=LATENCY_BUCKETS)
+RESPONSE_CACHE = Counter('nft_service_response_cache', 'Service response cache lookups by outcome', ['result'])
+STREAM_CLIENTS = Gauge('nft_service_stream_clients', 'Connected WebSocket stream clients')
+STREAM_DROPPED = Counter('nft_service_stream_dropped', 'Events dropped because a stream client fell behind')
+
+DEFAULT_TOPICS = ['market.*', 'trading.stats']
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if is_dataclass(value):
+        return asdict(value)
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def encode(payload: Any) -> bytes:
+    return json.dumps(payload, default=_json_default, separators=(',', ':')).encode()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag``"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in (tag[2:] if tag.startswith('W/') else tag for tag in candidates)
+
+
+class ResponseCache:
+    """Encoded JSON responses and their ETags, reused until a per-entry TTL expires
+
+    Concurrent misses for one key share a single computation, so a burst of
+    identical requests costs one upstream call. ``None`` results (not found)
+    are not cached.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str, bytes]]" = OrderedDict()  # key -> (expires, etag, body)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str, ttl: float,
+                  compute: Callable[[], Awaitable[Any]]) -> Optional[Tuple[str, bytes]]:
+        """``(etag, body)`` for ``key``, computing and encoding it on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            RESPONSE_CACHE.labels(result='hit').inc()
+            return entry[1], entry[2]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            RESPONSE_CACHE.labels(result='shared').inc()
+            return await asyncio.shield(future)
+
+        RESPONSE_CACHE.labels(result='miss').inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            payload = await compute()
+            result = None
+            if payload is not None:
+                body = encode(payload)
+                result = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"', body
+                self._entries[key] = (time.monotonic() + ttl, *result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        except asyncio.CancelledError:
+            future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved, so an unshared failure is not reported twice
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+class NFTService:
+    """HTTP/WebSocket front for a shared ``NFTCacheManager``, ``MarketPoller`` and ``NFTTradeManager``"""
+
+    def __init__(self,
+                 cache_manager: NFTCacheManager,
+                 trade_manager: NFTTradeManager,
+                 poller: Optional[MarketPoller] = None,
+                 response_cache_size: int = 4096,
+                 nft_ttl: float = 60.0,
+                 market_ttl: float = 5.0,
+                 price_ttl: float = 2.0,
+                 stream_min_interval: float = 0.1,
+                 stream_queue_size: int = 1000):
+        self.cache_manager = cache_manager
+        self.trade_manager = trade_manager
+        self.event_bus = trade_manager.event_bus
+        self.poller = poller or MarketPoller(trade_manager)
+        self.responses = ResponseCache(response_cache_size)
+        self.nft_ttl = nft_ttl
+        self.market_ttl = market_ttl
+        self.price_ttl = price_ttl
+        self.stream_min_interval = stream_min_interval
+        self.stream_queue_size = stream_queue_size
+
+        self.url = ""
+        self._runner: Optional[web.AppRunner] = None
+        self._streams: set = set()
+        self._started_at = time.time()
+
+    @classmethod
+    def from_config(cls, config) -> 'NFTService':
+        """Build the shared cache and managers from the application configuration"""
+        cache_manager = NFTCacheManager(
+            str(CACHE_DIR),
+            l2_cache=L2Cache.from_config(config.CACHE, str(CACHE_DIR / 'l2.sock')),
+            price_history=PriceHistoryStore.from_config(config.CACHE),
+            negative_ttl=config.CACHE.NEGATIVE_CACHE_TTL,
+            presence_error_rate=config.CACHE.PRESENCE_FILTER_ERROR_RATE,
+        )
+        CollectionPrefetcher.from_config(cache_manager, config.CACHE)
+        trade_manager = NFTTradeManager(
+            None, cache_manager,
+            rpc_endpoint=config.SOLANA.RPC_ENDPOINTS[0],
+            metadata_resolver=MetadataResolver.from_config(config.METADATA, str(CACHE_DIR / 'offchain')),
+        )
+        service_config = config.SERVICE
+        return cls(
+            cache_manager, trade_manager,
+            poller=MarketPoller(trade_manager, interval=service_config.POLL_INTERVAL),
+            response_cache_size=service_config.RESPONSE_CACHE_SIZE,
+            nft_ttl=service_config.NFT_TTL,
+            market_ttl=service_config.MARKET_TTL,
+            price_ttl=service_config.PRICE_TTL,
+            stream_min_interval=service_config.STREAM_MIN_INTERVAL,
+            stream_queue_size=service_config.STREAM_QUEUE_SIZE,
+        )
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/api/health', self._health)
+        app.router.add_get('/api/stats', self._stats)
+        app.router.add_get('/api/nfts/{mint}', self._nft)
+        app.router.add_get('/api/nfts/{mint}/price', self._price)
+        app.router.add_get('/api/nfts/{mint}/history', self._history)
+        app.router.add_get('/api/collections/{address}/stats', self._collection_stats)
+        app.router.add_get('/api/collections/{address}/listings', self._listings)
+        app.router.add_get('/api/collections/{address}/trades', self._trades)
+        app.router.add_get('/api/stream', self._stream)
+        app.on_startup.append(self._on_startup)
+        app.on_shutdown.append(self._on_shutdown)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> 'NFTService':
+        """Serve on ``host:port`` (an ephemeral port by default); sets :attr:`url`"""
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound = self._runner.addresses[0]
+        self.url = f"http://{bound[0]}:{bound[1]}"
+        logger.info(f"NFT service listening on {self.url}")
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def _on_startup(self, app: web.Application):
+        self.poller.start()
+
+    async def _on_shutdown(self, app: web.Application):
+        for ws in list(self._streams):
+            await ws.close()
+        await self.poller.stop()
+        if self.trade_manager.tensor_client.session:
+            await self.trade_manager.tensor_client.session.close()
+        await self.trade_manager.metadata_resolver.close()
+        await self.trade_manager.client.close()
+        if self.cache_manager.prefetcher:
+            self.cache_manager.prefetcher.close()
+        self.cache_manager.save_index()
+        if self.cache_manager.l2:
+            # Joins the invalidation thread, so keep it off the loop
+            await asyncio.get_running_loop().run_in_executor(None, self.cache_manager.l2.close)
+
+    async def _respond(self, request: web.Request, route: str, ttl: float,
+                       compute: Callable[[], Awaitable[Any]]) -> web.Response:
+        start = time.perf_counter()
+        status = 500
+        try:
+            result = await self.responses.get(request.path_qs, ttl, compute)
+            if result is None:
+                status = 404
+                return web.json_response({'error': 'not found'}, status=404)
+            etag, body = result
+            headers = {'ETag': etag, 'Cache-Control': f"max-age={int(ttl)}"}
+            if etag_matches(request.headers.get('If-None-Match', ''), etag):
+                status = 304
+                RESPONSE_CACHE.labels(result='not_modified').inc()
+                return web.Response(status=304, headers=headers)
+            status = 200
+            return web.Response(body=body, content_type='application/json', headers=headers)
+        except Exception as e:
+            logger.error(f"Error serving {request.path_qs}: {e}")
+            return web.json_response({'error': 'internal error'}, status=500)
+        finally:
+            SERVICE_LATENCY.labels(route=route, status=status).observe(time.perf_counter() - start)
+
+    @staticmethod
+    def _float_param(request: web.Request, name: str) -> Optional[float]:
+        value = request.query.get(name)
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            raise web.HTTPBadRequest(reason=f"{name} must be a number")
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'status': 'ok',
+            'uptime': time.time() - self._started_at,
+            'stream_clients': len(self._streams),
+            'watched_collections': sorted(self.poller.collections),
+            'cached_responses': len(self.responses),
+        })
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        async def compute():
+            return {'trading': self.trade_manager.get_trading_stats(), 'cache': self.cache_manager.get_cache_stats()}
+        return await self._respond(request, 'stats', self.price_ttl, compute)
+
+    async def _nft(self, request: web.Request) -> web.Response:
+        mint = request.match_info['mint']
+
+        async def compute():
+            nft = await self.trade_manager.get_nft_data(mint)
+            return nft.to_dict() if nft is not None else None
+        return await self._respond(request, 'nft', self.nft_ttl, compute)
+
+    async def _price(self, request: web.Request) -> web.Response:
+        mint = request.match_info['mint']
+
+        async def compute():
+            return self.cache_manager.get_price(mint)
+        return await self._respond(request, 'price', self.price_ttl, compute)
+
+    async def _history(self, request: web.Request) -> web.Response:
+        mint = request.match_info['mint']
+        start, end = self._float_param(request, 'start'), self._float_param(request, 'end')
+
+        async def compute():
+            return self.cache_manager.get_price_history(mint, start, end)
+        return await self._respond(request, 'history', self.price_ttl, compute)
+
+    async def _collection_stats(self, request: web.Request) -> web.Response:
+        address = request.match_info['address']
+
+        async def compute():
+            # Watched collections are kept fresh by the poller; others are fetched on demand
+            metrics = self.trade_manager.market_data.get(address)
+            if address in self.poller.collections and metrics is not None and \
+                    (datetime.now() - metrics.last_update).total_seconds() < self.poller.interval:
+                return metrics
+            return await self.trade_manager.analyze_market(address)
+        return await self._respond(request, 'collection_stats', self.market_ttl, compute)
+
+    async def _listings(self, request: web.Request) -> web.Response:
+        address = request.match_info['address']
+
+        async def compute():
+            return await self.trade_manager.get_collection_listings(address)
+        return await self._respond(request, 'listings', self.market_ttl, compute)
+
+    async def _trades(self, request: web.Request) -> web.Response:
+        address = request.match_info['address']
+        hours = self._float_param(request, 'hours') or 24
+
+        async def compute():
+            return await self.trade_manager.get_recent_trades(address, int(hours))
+        return await self._respond(request, 'trades', self.market_ttl, compute)
+
+    async def _stream(self, request: web.Request) -> web.WebSocketResponse:
+        """WebSocket of ``{"topic", "data"}`` events
+
+        ``?topics=`` takes comma-separated event-bus topics (default
+        ``market.*,trading.stats``). Clients may send ``{"watch": <collection>}``
+        or ``{"unwatch": <collection>}`` to control what the poller refreshes.
+        """
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        topics = [t for t in request.query.get('topics', '').split(',') if t] or DEFAULT_TOPICS
+        queue: asyncio.Queue = asyncio.Queue(self.stream_queue_size)
+
+        def deliver(topic: str, payload: Any):
+            try:
+                queue.put_nowait((topic, payload))
+            except asyncio.QueueFull:
+                STREAM_DROPPED.inc()
+
+        subscription = self.event_bus.subscribe(topics, deliver, min_interval=self.stream_min_interval,
+                                                scheduler=asyncio_scheduler(asyncio.get_running_loop()))
+        sender = asyncio.ensure_future(self._send_events(ws, queue))
+        self._streams.add(ws)
+        STREAM_CLIENTS.inc()
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.TEXT:
+                    self._stream_command(message.data)
+        finally:
+            subscription.cancel()
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            self._streams.discard(ws)
+            STREAM_CLIENTS.dec()
+        return ws
+
+    async def _send_events(self, ws: web.WebSocketResponse, queue: asyncio.Queue):
+        while True:
+            topic, payload = await queue.get()
+            await ws.send_str(encode({'topic': topic, 'data': payload}).decode())
+
+    def _stream_command(self, data: str):
+        try:
+            command = json.loads(data)
+        except ValueError:
+            logger.warning(f"Ignoring malformed stream command: {data[:100]}")
+            return
+        if not isinstance(command, dict):
+            return
+        if isinstance(command.get('watch'), str):
+            self.poller.watch(command['watch'])
+        if isinstance(command.get('unwatch'), str):
+            self.poller.unwatch(command['unwatch'])
+
+    async def run_forever(self, host: str, port: int, snapshotter: Optional[CacheSnapshotter] = None):
+        """Serve until SIGINT/SIGTERM, restoring and snapshotting the cache if given a snapshotter"""
+        if snapshotter:
+            await asyncio.get_running_loop().run_in_executor(None, snapshotter.restore)
+            snapshotter.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # e.g. Windows; Ctrl+C still raises KeyboardInterrupt
+        await self.start(host, port)
+        try:
+            await stop.wait()
+        finally:
+            await self.stop()
+            if snapshotter:
+                snapshotter.stop()
+
+
+def main():
+    config = get_config()
+    start_monitoring(config.MONITORING)
+    service = NFTService.from_config(config)
+    snapshotter = None
+    if config.BACKUP.ENABLE_AUTO_BACKUP:
+        snapshotter = CacheSnapshotter.from_config(service.cache_manager, config.BACKUP)
+    asyncio.run(service.run_forever(config.SERVICE.HOST, config.SERVICE.PORT, snapshotter))
+
+
+if __name__ == "__main__":
+    main()
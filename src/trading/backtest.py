@@ -0,0 +1,233 @@
+from typing import Dict, Iterable, List, Optional, Union
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import time
+import numpy as np
+from loguru import logger
+from ..core.trade_store import TradeStore, ListingStore
+from .validation import validate_buy_price, validate_sell_price
+
+TRADE = 0
+LISTING = 1
+
+
+@dataclass
+class StrategyParams:
+    buy_below_floor: float = 0.95  # buy when priced at or below 95% of floor
+    take_profit: float = 1.15  # sell when a trade prints 15% above entry
+    stop_loss: float = 0.85  # sell when a trade prints 15% below entry
+    max_positions: int = 5
+    floor_window: int = 3600  # seconds of history used to estimate floor price
+
+
+@dataclass
+class MarketTape:
+    """Time-ordered trade and listing events for one collection"""
+    collection: str
+    timestamp: np.ndarray
+    price: np.ndarray
+    kind: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+
+@dataclass
+class BacktestResult:
+    collection: str
+    params: StrategyParams
+    events: int = 0
+    buys: int = 0
+    sells: int = 0
+    rejected: int = 0
+    fees_paid: float = 0.0
+    realized_pnl: float = 0.0
+    unrealized_pnl: float = 0.0
+    open_positions: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def events_per_sec(self) -> float:
+        return self.events / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def total_pnl(self) -> float:
+        return self.realized_pnl + self.unrealized_pnl
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['events_per_sec'] = self.events_per_sec
+        data['total_pnl'] = self.total_pnl
+        return data
+
+
+class BacktestEngine:
+    """Replays recorded market data through the live order validation rules
+
+    The floor price at each event is the lowest trade or listing price seen in
+    the trailing ``floor_window`` seconds. Buys fill at the event price and pay
+    the marketplace fee; sells fill at the trade price and pay the marketplace
+    fee plus the collection royalty (``seller_fee_basis_points``).
+    """
+
+    def __init__(self, seller_fee_basis_points: int = 0, marketplace_fee_bps: int = 150):
+        self.royalty_rate = seller_fee_basis_points / 10000
+        self.marketplace_rate = marketplace_fee_bps / 10000
+
+    @staticmethod
+    def load_tape(collection_address: str,
+                  trade_store: TradeStore,
+                  listing_store: Optional[ListingStore] = None,
+                  start: Optional[datetime] = None,
+                  end: Optional[datetime] = None) -> MarketTape:
+        """Merge stored trades and listings into one time-ordered tape"""
+        columns = ['timestamp', 'price']
+        trades = trade_store.query(collection_address, start, end, columns=columns)
+        timestamps = [trades['timestamp']]
+        prices = [trades['price']]
+        kinds = [np.full(len(trades['timestamp']), TRADE, dtype=np.int8)]
+
+        if listing_store is not None:
+            listings = listing_store.query(collection_address, start, end, columns=columns)
+            timestamps.append(listings['timestamp'])
+            prices.append(listings['price'])
+            kinds.append(np.full(len(listings['timestamp']), LISTING, dtype=np.int8))
+
+        timestamp = np.concatenate(timestamps)
+        order = np.argsort(timestamp, kind='stable')
+        return MarketTape(
+            collection=collection_address,
+            timestamp=timestamp[order],
+            price=np.concatenate(prices)[order],
+            kind=np.concatenate(kinds)[order],
+        )
+
+    def run(self, tape: MarketTape, params: StrategyParams) -> BacktestResult:
+        """Simulate a strategy over a tape"""
+        result = BacktestResult(collection=tape.collection, params=params, events=len(tape))
+        started = time.perf_counter()
+
+        buy_fee = 1 + self.marketplace_rate
+        sell_net = 1 - self.marketplace_rate - self.royalty_rate
+        window = deque()  # (timestamp, price), prices increasing: front is the floor
+        positions: List[float] = []  # entry prices
+        last_price = 0.0
+
+        for ts, price, kind in zip(tape.timestamp.tolist(), tape.price.tolist(), tape.kind.tolist()):
+            while window and window[0][0] <= ts - params.floor_window:
+                window.popleft()
+
+            if window:
+                floor_price = window[0][1]
+
+                # A trade print is a buyer we could have sold one position to
+                filled = False
+                if kind == TRADE:
+                    for i, entry in enumerate(positions):
+                        if price >= entry * params.take_profit or price <= entry * params.stop_loss:
+                            if validate_sell_price(price, floor_price):
+                                positions.pop(i)
+                                filled = True
+                                result.sells += 1
+                                result.fees_paid += price * (1 - sell_net) + entry * (buy_fee - 1)
+                                result.realized_pnl += price * sell_net - entry * buy_fee
+                            else:
+                                result.rejected += 1
+                            break
+
+                if (not filled and len(positions) < params.max_positions
+                        and price <= floor_price * params.buy_below_floor):
+                    if validate_buy_price(price, floor_price):
+                        positions.append(price)
+                        result.buys += 1
+                    else:
+                        result.rejected += 1
+
+            while window and window[-1][1] >= price:
+                window.pop()
+            window.append((ts, price))
+            last_price = price
+
+        result.open_positions = len(positions)
+        result.unrealized_pnl = sum(last_price * sell_net - entry * buy_fee for entry in positions)
+        result.elapsed = time.perf_counter() - started
+        return result
+
+
+def param_grid(**axes: Iterable) -> List[StrategyParams]:
+    """Build the cartesian product of parameter values, e.g. ``param_grid(take_profit=[1.1, 1.2])``"""
+    names = list(axes)
+    return [
+        StrategyParams(**dict(zip(names, values)))
+        for values in itertools.product(*(axes[name] for name in names))
+    ]
+
+
+def _run_batch(trade_dir: str,
+               listing_dir: Optional[str],
+               collection_address: str,
+               params: List[StrategyParams],
+               start: Optional[datetime],
+               end: Optional[datetime],
+               seller_fee_basis_points: int,
+               marketplace_fee_bps: int) -> List[BacktestResult]:
+    # Runs in a worker process: the tape is loaded once and reused for the whole batch
+    tape = BacktestEngine.load_tape(
+        collection_address,
+        TradeStore(trade_dir),
+        ListingStore(listing_dir) if listing_dir else None,
+        start,
+        end,
+    )
+    engine = BacktestEngine(seller_fee_basis_points, marketplace_fee_bps)
+    return [engine.run(tape, p) for p in params]
+
+
+def run_grid(collections: List[str],
+             grid: List[StrategyParams],
+             trade_dir: str = "data/trades",
+             listing_dir: Optional[str] = "data/listings",
+             start: Optional[datetime] = None,
+             end: Optional[datetime] = None,
+             seller_fee_basis_points: Union[int, Dict[str, int]] = 0,
+             marketplace_fee_bps: int = 150,
+             max_workers: Optional[int] = None,
+             batch_size: int = 16) -> List[BacktestResult]:
+    """Sweep a parameter grid across collections in a process pool
+
+    Raises the first batch failure instead of returning a partial sweep.
+    """
+    started = time.perf_counter()
+    results: List[BacktestResult] = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = []
+        for collection in collections:
+            fee_bps = (
+                seller_fee_basis_points.get(collection, 0)
+                if isinstance(seller_fee_basis_points, dict) else seller_fee_basis_points
+            )
+            for i in range(0, len(grid), batch_size):
+                futures.append(pool.submit(
+                    _run_batch, str(trade_dir), str(listing_dir) if listing_dir else None,
+                    collection, grid[i:i + batch_size], start, end, fee_bps, marketplace_fee_bps,
+                ))
+        try:
+            for future in futures:
+                results.extend(future.result())
+        except Exception as e:
+            # a partial sweep would silently skew the comparison, so fail the whole run
+            logger.error(f"Backtest batch failed: {e}")
+            pool.shutdown(cancel_futures=True)
+            raise
+
+    elapsed = time.perf_counter() - started
+    events = sum(r.events for r in results)
+    logger.info(
+        f"Backtested {len(results)} runs over {len(collections)} collections: "
+        f"{events} events in {elapsed:.2f}s ({events / elapsed if elapsed else 0:.0f} events/sec)"
+    )
+    return results
@@ -0,0 +1,74 @@
+from typing import Dict, Optional, Set
+import asyncio
+from loguru import logger
+from .trade_manager import NFTTradeManager
+
+
+class MarketPoller:
+    """Periodically refreshes watched collections and publishes what changed
+
+    Metrics are published by ``NFTTradeManager.analyze_market`` as
+    ``market.metrics.<collection>``; trades not seen on a previous poll are
+    published as ``market.trade.<collection>`` keyed by signature.
+    """
+
+    def __init__(self, trade_manager: NFTTradeManager, interval: float = 30.0, trade_window_hours: int = 1):
+        self.trade_manager = trade_manager
+        self.event_bus = trade_manager.event_bus
+        self.interval = interval
+        self.trade_window_hours = trade_window_hours
+        self.collections: Set[str] = set()
+        self._seen: Dict[str, Set[str]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def watch(self, collection_address: str):
+        """Start polling a collection; call from the poller's event loop"""
+        if collection_address not in self.collections:
+            self.collections.add(collection_address)
+            if self._wakeup:
+                self._wakeup.set()
+
+    def unwatch(self, collection_address: str):
+        self.collections.discard(collection_address)
+        self._seen.pop(collection_address, None)
+
+    def start(self):
+        """Start polling on the running event loop"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def poll_once(self):
+        await asyncio.gather(*(self._poll_collection(c) for c in list(self.collections)))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Error polling markets: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll_collection(self, collection_address: str):
+        trades = await self.trade_manager.get_recent_trades(collection_address, self.trade_window_hours)
+        await self.trade_manager.analyze_market(collection_address)
+
+        seen = self._seen.setdefault(collection_address, set())
+        current = set()
+        for trade in trades:
+            current.add(trade['signature'])
+            if trade['signature'] not in seen:
+                self.event_bus.publish(f'market.trade.{collection_address}', trade, key=trade['signature'])
+        # Only the current window is remembered, so memory stays bounded
+        self._seen[collection_address] = current
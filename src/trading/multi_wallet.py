@@ -0,0 +1,235 @@
+from typing import TYPE_CHECKING, Dict, List, Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+import asyncio
+from loguru import logger
+from prometheus_client import Counter, Gauge
+from ..core.nft_cache import NFTCacheManager, NFTMetadata
+from ..core.metadata_resolver import MetadataResolver
+from .rpc_router import RpcRouter
+from .tensor_client import SharedTensorClient
+from .trade_manager import NFTTradeManager
+from .tx_pipeline import BlockhashCache, TransactionPipeline, load_keypair
+
+if TYPE_CHECKING:
+    from anchorpy import Wallet
+
+WALLET_ORDERS = Counter('nft_wallet_orders', 'Orders processed per wallet', ['wallet', 'side', 'result'])
+WALLET_QUEUE = Gauge('nft_wallet_order_queue', 'Orders waiting per wallet', ['wallet'])
+WALLET_HOLDINGS = Gauge('nft_wallet_holdings', 'NFTs held per wallet at the last sync', ['wallet'])
+
+
+@dataclass
+class _Order:
+    side: str
+    nft: NFTMetadata
+    price: float
+    future: asyncio.Future
+
+
+@dataclass
+class WalletShard:
+    """One wallet's trade manager, order queue and workers"""
+    name: str
+    wallet: 'Wallet'
+    manager: NFTTradeManager
+    queue: asyncio.Queue
+    workers: List[asyncio.Task] = field(default_factory=list)
+    holdings: List[str] = field(default_factory=list)
+    last_sync: Optional[datetime] = None
+    orders: int = 0
+    failed: int = 0
+
+
+class MultiWalletManager:
+    """Trades from several wallets over one cache, HTTP session and RPC router
+
+    Each wallet gets its own :class:`NFTTradeManager`, order queue and
+    ``per_wallet_concurrency`` workers. Workers also take a slot from a
+    global FIFO semaphore of ``max_concurrent_orders``, so a wallet with a
+    deep queue cannot starve the others. Collection and NFT reads go through
+    one :class:`SharedTensorClient`, so wallets trading the same collection
+    share the upstream fetch instead of repeating it.
+    """
+
+    def __init__(self,
+                 cache_manager: NFTCacheManager,
+                 router: RpcRouter,
+                 tensor_client: Optional[SharedTensorClient] = None,
+                 metadata_resolver: Optional[MetadataResolver] = None,
+                 per_wallet_concurrency: int = 2,
+                 max_concurrent_orders: int = 16,
+                 sync_concurrency: int = 8,
+                 queue_size: int = 1000):
+        self.cache_manager = cache_manager
+        self.router = router
+        self.tensor_client = tensor_client or SharedTensorClient()
+        self.metadata_resolver = metadata_resolver or MetadataResolver(str(cache_manager.cache_dir / 'offchain'))
+        self.blockhashes = BlockhashCache(router)
+        self.per_wallet_concurrency = per_wallet_concurrency
+        self.queue_size = queue_size
+        self.shards: Dict[str, WalletShard] = {}
+        self._order_slots = asyncio.Semaphore(max_concurrent_orders)
+        self._sync_slots = asyncio.Semaphore(sync_concurrency)
+
+    @classmethod
+    def from_config(cls, config, cache_manager: NFTCacheManager) -> 'MultiWalletManager':
+        """Build the shared clients and add one wallet per configured keypair"""
+        from anchorpy import Wallet  # deferred: heavy and only needed once trading starts
+
+        wallet_config = config.WALLET
+        manager = cls(
+            cache_manager,
+            RpcRouter.from_endpoints(config.SOLANA.RPC_ENDPOINTS),
+            tensor_client=SharedTensorClient(ttl=wallet_config.SHARED_READ_TTL),
+            metadata_resolver=MetadataResolver.from_config(config.METADATA, str(cache_manager.cache_dir / 'offchain')),
+            per_wallet_concurrency=wallet_config.ORDERS_PER_WALLET,
+            max_concurrent_orders=wallet_config.MAX_CONCURRENT_ORDERS,
+            sync_concurrency=wallet_config.SYNC_CONCURRENCY,
+        )
+        key_paths = wallet_config.KEY_PATHS or [p for p in [wallet_config.KEY_PATH] if p]
+        for path in key_paths:
+            manager.add_wallet(Wallet(load_keypair(path)))
+        return manager
+
+    def add_wallet(self, wallet: 'Wallet', name: Optional[str] = None) -> WalletShard:
+        """Register a wallet and start its order workers on the running loop"""
+        name = name or str(wallet.public_key)
+        if name in self.shards:
+            return self.shards[name]
+
+        payer = getattr(wallet, 'payer', None)
+        pipeline = TransactionPipeline(self.router, [payer] if payer else [], blockhashes=self.blockhashes)
+        manager = NFTTradeManager(
+            wallet, self.cache_manager,
+            max_concurrent_trades=self.per_wallet_concurrency,
+            metadata_resolver=self.metadata_resolver,
+            client=self.router,
+            tensor_client=self.tensor_client,
+            tx_pipeline=pipeline,
+        )
+        shard = WalletShard(name, wallet, manager, asyncio.Queue(self.queue_size))
+        shard.workers = [asyncio.ensure_future(self._worker(shard)) for _ in range(self.per_wallet_concurrency)]
+        self.shards[name] = shard
+        logger.info(f"Added wallet {name} ({len(self.shards)} wallets)")
+        return shard
+
+    async def remove_wallet(self, name: str):
+        shard = self.shards.pop(name, None)
+        if shard:
+            await self._stop_shard(shard)
+
+    async def submit_order(self, name: str, side: str, nft: NFTMetadata, price: float) -> asyncio.Future:
+        """Queue a ``buy`` or ``sell`` order; the returned future resolves to its success"""
+        if side not in ('buy', 'sell'):
+            raise ValueError(f"Unknown order side: {side}")
+        shard = self.shards[name]
+        future = asyncio.get_running_loop().create_future()
+        await shard.queue.put(_Order(side, nft, price, future))
+        WALLET_QUEUE.labels(wallet=name).set(shard.queue.qsize())
+        return future
+
+    async def place_order(self, name: str, side: str, nft: NFTMetadata, price: float) -> bool:
+        return await (await self.submit_order(name, side, nft, price))
+
+    async def _worker(self, shard: WalletShard):
+        while True:
+            order = await shard.queue.get()
+            WALLET_QUEUE.labels(wallet=shard.name).set(shard.queue.qsize())
+            try:
+                if order.future.cancelled():
+                    continue
+                async with self._order_slots:
+                    if order.side == 'buy':
+                        ok = await shard.manager.place_buy_order(order.nft, order.price)
+                    else:
+                        ok = await shard.manager.place_sell_order(order.nft, order.price)
+                shard.orders += 1
+                if not ok:
+                    shard.failed += 1
+                WALLET_ORDERS.labels(wallet=shard.name, side=order.side, result='ok' if ok else 'failed').inc()
+                if not order.future.done():
+                    order.future.set_result(ok)
+            except asyncio.CancelledError:
+                if not order.future.done():
+                    order.future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Error processing order for wallet {shard.name}: {e}")
+                if not order.future.done():
+                    order.future.set_result(False)
+            finally:
+                shard.queue.task_done()
+
+    async def sync_portfolio(self, name: str) -> List[NFTMetadata]:
+        """Refresh the NFTs a wallet holds and cache their metadata"""
+        shard = self.shards[name]
+        try:
+            mints = await shard.manager.get_wallet_mints()
+
+            async def fetch(mint: str) -> Optional[NFTMetadata]:
+                async with self._sync_slots:
+                    return await shard.manager.get_nft_data(mint)
+
+            cached = self.cache_manager.get_many(mints)
+            fetched = await asyncio.gather(*(fetch(mint) for mint in mints if mint not in cached))
+            nfts = list(cached.values()) + [nft for nft in fetched if nft]
+            shard.holdings = mints
+            shard.last_sync = datetime.now()
+            WALLET_HOLDINGS.labels(wallet=name).set(len(mints))
+            self.cache_manager.event_bus.publish(f'wallet.portfolio.{name}', mints)
+            return nfts
+
+        except Exception as e:
+            logger.error(f"Error syncing portfolio for wallet {name}: {e}")
+            return []
+
+    async def sync_all(self) -> Dict[str, List[NFTMetadata]]:
+        """Sync every wallet concurrently, one task per wallet"""
+        names = list(self.shards)
+        results = await asyncio.gather(*(self.sync_portfolio(name) for name in names))
+        return dict(zip(names, results))
+
+    def stats(self) -> Dict:
+        return {
+            'wallets': {
+                name: {
+                    'queued': shard.queue.qsize(),
+                    'orders': shard.orders,
+                    'failed': shard.failed,
+                    'holdings': len(shard.holdings),
+                    'last_sync': shard.last_sync.isoformat() if shard.last_sync else None,
+                    'pending_transactions': shard.manager.tx_pipeline.in_flight,
+                }
+                for name, shard in self.shards.items()
+            },
+            'tensor_upstream_calls': self.tensor_client.upstream_calls,
+            'rpc_endpoints': self.router.endpoints,
+        }
+
+    async def _stop_shard(self, shard: WalletShard):
+        for worker in shard.workers:
+            worker.cancel()
+        await asyncio.gather(*shard.workers, return_exceptions=True)
+        # Orders no worker picked up would otherwise leave their callers waiting forever
+        while not shard.queue.empty():
+            order = shard.queue.get_nowait()
+            order.future.cancel()
+            shard.queue.task_done()
+        await shard.manager.tx_pipeline.stop()
+        WALLET_QUEUE.labels(wallet=shard.name).set(0)
+
+    async def close(self):
+        for name in list(self.shards):
+            await self.remove_wallet(name)
+        await self.blockhashes.stop()
+        if self.tensor_client.session:
+            await self.tensor_client.session.close()
+        await self.metadata_resolver.close()
+        await self.router.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
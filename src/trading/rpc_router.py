@@ -0,0 +1,110 @@
+from typing import List, Optional
+from dataclasses import dataclass
+import asyncio
+import time
+import aiohttp
+import httpx
+from loguru import logger
+from prometheus_client import Counter
+from ..core.instrumentation import InstrumentedClient
+
+RPC_ROUTED = Counter('nft_rpc_routed_calls', 'JSON-RPC calls routed per endpoint', ['endpoint'])
+RPC_FAILOVERS = Counter('nft_rpc_failovers', 'JSON-RPC calls retried on another endpoint after an error')
+
+_TRANSPORT_ERRORS = (httpx.TransportError, aiohttp.ClientConnectionError, asyncio.TimeoutError, ConnectionError)
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """Whether ``error`` (or what it wraps) is a connection, timeout, HTTP 5xx or 429 failure
+
+    The solana client wraps httpx errors in ``SolanaRpcException``, so the
+    ``__cause__`` chain is searched too.
+    """
+    while error is not None:
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status >= 500 or status == 429
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status >= 500 or error.status == 429
+        if isinstance(error, _TRANSPORT_ERRORS):
+            return True
+        error = error.__cause__
+    return False
+
+
+@dataclass
+class _Endpoint:
+    url: str
+    client: object
+    in_flight: int = 0
+    failed_until: float = 0.0
+
+
+class RpcRouter:
+    """Spreads JSON-RPC calls from many callers over several endpoints
+
+    Behaves like the ``AsyncClient`` it wraps: every coroutine method is sent
+    to the healthy endpoint with the fewest calls in flight. An endpoint that
+    fails at the transport level (connection, timeout, HTTP 5xx or 429) is
+    benched for ``cooldown`` seconds and the call is retried on the next one,
+    up to ``retries`` times. Errors returned by the RPC method itself are
+    raised to the caller as-is. Retrying ``sendTransaction`` resends the same
+    signed bytes, so it cannot double-execute.
+    """
+
+    def __init__(self, clients: List, urls: Optional[List[str]] = None, cooldown: float = 5.0, retries: int = 1):
+        if not clients:
+            raise ValueError("RpcRouter needs at least one client")
+        urls = urls or [str(i) for i in range(len(clients))]
+        self._endpoints = [_Endpoint(url, client) for url, client in zip(urls, clients)]
+        self.cooldown = cooldown
+        self.retries = retries
+
+    @classmethod
+    def from_endpoints(cls, endpoints: List[str], **kwargs) -> 'RpcRouter':
+        from solana.rpc.async_api import AsyncClient  # deferred: heavy and only needed once trading starts
+
+        return cls([InstrumentedClient(AsyncClient(url)) for url in endpoints], urls=list(endpoints), **kwargs)
+
+    @property
+    def endpoints(self) -> List[str]:
+        return [endpoint.url for endpoint in self._endpoints]
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._endpoints[0].client, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def routed(*args, **kwargs):
+            return await self._call(name, args, kwargs)
+
+        routed.__name__ = name
+        setattr(self, name, routed)
+        return routed
+
+    def _ordered(self) -> List[_Endpoint]:
+        now = time.monotonic()
+        return sorted(self._endpoints, key=lambda e: (e.failed_until > now, e.in_flight))
+
+    async def _call(self, name: str, args, kwargs):
+        error: Optional[Exception] = None
+        for attempt, endpoint in enumerate(self._ordered()[:self.retries + 1]):
+            if attempt:
+                RPC_FAILOVERS.inc()
+            endpoint.in_flight += 1
+            RPC_ROUTED.labels(endpoint=endpoint.url).inc()
+            try:
+                return await getattr(endpoint.client, name)(*args, **kwargs)
+            except Exception as e:
+                if not is_transport_error(e):
+                    raise
+                endpoint.failed_until = time.monotonic() + self.cooldown
+                logger.warning(f"RPC {name} failed on {endpoint.url}: {e}")
+                error = e
+            finally:
+                endpoint.in_flight -= 1
+        raise error
+
+    async def close(self):
+        for endpoint in self._endpoints:
+            await endpoint.client.close()
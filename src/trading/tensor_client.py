@@ -1,8 +1,14 @@
-from typing import Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
 import aiohttp
 import asyncio
+import time
 from datetime import datetime, timedelta
 from loguru import logger
+from ..core.instrumentation import TENSOR_LATENCY, http_trace_config, traced
+
+class NFTNotFound(LookupError):
+    """Tensor answered 404 for a mint it does not know"""
+
 
 class TensorClient:
     """Client for interacting with Tensor.trade API"""
@@ -11,19 +17,23 @@ class TensorClient:
         self.api_endpoint = api_endpoint
         self.session = None
         
+    def _create_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(trace_configs=[http_trace_config()])
+        
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        self.session = self._create_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
             
+    @traced('tensor.get_collection_stats', TENSOR_LATENCY, method='get_collection_stats')
     async def get_collection_stats(self, collection_address: str) -> Optional[Dict]:
         """Get collection statistics from Tensor"""
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = self._create_session()
                 
             url = f"{self.api_endpoint}/v1/collections/{collection_address}/stats"
             async with self.session.get(url) as response:
@@ -42,11 +52,12 @@ class TensorClient:
             logger.error(f"Error fetching collection stats: {e}")
             return None
             
+    @traced('tensor.get_nft_listings', TENSOR_LATENCY, method='get_nft_listings')
     async def get_nft_listings(self, collection_address: str) -> List[Dict]:
         """Get active listings for a collection"""
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = self._create_session()
                 
             url = f"{self.api_endpoint}/v1/collections/{collection_address}/listings"
             async with self.session.get(url) as response:
@@ -66,11 +77,12 @@ class TensorClient:
             logger.error(f"Error fetching listings: {e}")
             return []
             
+    @traced('tensor.get_recent_trades', TENSOR_LATENCY, method='get_recent_trades')
     async def get_recent_trades(self, collection_address: str, hours: int = 24) -> List[Dict]:
         """Get recent trades for a collection"""
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = self._create_session()
                 
             url = f"{self.api_endpoint}/v1/collections/{collection_address}/trades"
             params = {
@@ -95,11 +107,12 @@ class TensorClient:
             logger.error(f"Error fetching recent trades: {e}")
             return []
             
+    @traced('tensor.get_nft_data', TENSOR_LATENCY, method='get_nft_data')
     async def get_nft_data(self, mint_address: str) -> Optional[Dict]:
-        """Get detailed data for a specific NFT"""
+        """Get detailed data for a specific NFT; raises NFTNotFound if Tensor has no such mint"""
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = self._create_session()
                 
             url = f"{self.api_endpoint}/v1/nfts/{mint_address}"
             async with self.session.get(url) as response:
@@ -112,19 +125,25 @@ class TensorClient:
                         'attributes': data.get('attributes', {}),
                         'rarity_rank': data.get('rarity_rank'),
                         'image_url': data.get('image_url'),
+                        'uri': data.get('uri'),
                         'last_sale': data.get('last_sale', {}).get('price', 0) / 1e9 if data.get('last_sale') else 0
                     }
+                if response.status == 404:
+                    raise NFTNotFound(mint_address)
                 return None
                 
+        except NFTNotFound:
+            raise
         except Exception as e:
             logger.error(f"Error fetching NFT data: {e}")
             return None
             
+    @traced('tensor.place_bid', TENSOR_LATENCY, method='place_bid')
     async def place_bid(self, mint_address: str, price: float) -> Optional[str]:
         """Place a bid on an NFT"""
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = self._create_session()
                 
             url = f"{self.api_endpoint}/v1/nfts/{mint_address}/bids"
             payload = {
@@ -142,11 +161,12 @@ class TensorClient:
             logger.error(f"Error placing bid: {e}")
             return None
             
+    @traced('tensor.create_listing', TENSOR_LATENCY, method='create_listing')
     async def create_listing(self, mint_address: str, price: float) -> Optional[str]:
         """Create a listing for an NFT"""
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = self._create_session()
                 
             url = f"{self.api_endpoint}/v1/nfts/{mint_address}/listings"
             payload = {
@@ -163,11 +183,12 @@ class TensorClient:
             logger.error(f"Error creating listing: {e}")
             return None
             
+    @traced('tensor.cancel_listing', TENSOR_LATENCY, method='cancel_listing')
     async def cancel_listing(self, mint_address: str) -> bool:
         """Cancel an active listing"""
         try:
             if not self.session:
-                self.session = aiohttp.ClientSession()
+                self.session = self._create_session()
                 
             url = f"{self.api_endpoint}/v1/nfts/{mint_address}/listings/cancel"
             async with self.session.post(url) as response:
@@ -175,4 +196,69 @@ class TensorClient:
                 
         except Exception as e:
             logger.error(f"Error canceling listing: {e}")
-            return False 
\ No newline at end of file
+            return False
+
+
+class SharedTensorClient(TensorClient):
+    """TensorClient shared by many trade managers (one session, one rate budget)
+
+    Collection and NFT reads are single-flight: concurrent identical calls
+    share one request, and non-empty results are reused for ``ttl`` seconds,
+    so a dozen wallets validating orders against the same collection cost
+    one upstream fetch. Bids and listings always go through.
+    """
+
+    def __init__(self, api_endpoint: str = "https://api.tensor.trade", ttl: float = 2.0, max_entries: int = 4096):
+        super().__init__(api_endpoint)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.upstream_calls = 0
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def _shared(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self._results.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            self.upstream_calls += 1
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.set_result(None)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved, so an unshared failure is not reported twice
+            raise
+        else:
+            future.set_result(result)
+            if result:
+                if len(self._results) >= self.max_entries:
+                    now = time.monotonic()
+                    self._results = {k: v for k, v in self._results.items() if v[0] > now}
+                self._results[key] = (time.monotonic() + self.ttl, result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def get_collection_stats(self, collection_address: str) -> Optional[Dict]:
+        return await self._shared(('stats', collection_address),
+                                  lambda: TensorClient.get_collection_stats(self, collection_address))
+
+    async def get_nft_listings(self, collection_address: str) -> List[Dict]:
+        return await self._shared(('listings', collection_address),
+                                  lambda: TensorClient.get_nft_listings(self, collection_address))
+
+    async def get_recent_trades(self, collection_address: str, hours: int = 24) -> List[Dict]:
+        return await self._shared(('trades', collection_address, hours),
+                                  lambda: TensorClient.get_recent_trades(self, collection_address, hours))
+
+    async def get_nft_data(self, mint_address: str) -> Optional[Dict]:
+        return await self._shared(('nft', mint_address),
+                                  lambda: TensorClient.get_nft_data(self, mint_address))
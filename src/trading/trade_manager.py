@@ -1,15 +1,26 @@
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import asyncio
+import json
 from loguru import logger
 from prometheus_client import Counter, Gauge, Histogram
-from solana.rpc.async_api import AsyncClient
-from solana.transaction import Transaction
-from anchorpy import Program, Provider, Wallet
-import numpy as np
 from ..core.nft_cache import NFTCacheManager, NFTMetadata
-from .tensor_client import TensorClient
+from ..core.events import EventBus
+from ..core.metadata_resolver import MetadataResolver
+from ..core.instrumentation import InstrumentedClient, current_span, traced
+from .tensor_client import NFTNotFound, TensorClient
+from .tx_pipeline import TransactionPipeline
+from .validation import validate_buy_price, validate_sell_price
+
+if TYPE_CHECKING:
+    from anchorpy import Wallet
+
+# Module-level so several trade managers can share a process
+TRADES_EXECUTED = Counter('nft_trades_executed', 'Number of trades executed')
+TRADE_VOLUME = Counter('nft_trade_volume_sol', 'Trading volume in SOL')
+ACTIVE_TRADES = Gauge('nft_active_trades', 'Number of active trades')
+TRADE_DURATION = Histogram('nft_trade_duration_seconds', 'Time taken to execute trades')
 
 @dataclass
 class MarketMetrics:
@@ -23,30 +34,50 @@ class MarketMetrics:
 
 class NFTTradeManager:
     def __init__(self, 
-                 wallet: Wallet,
+                 wallet: 'Wallet',
                  cache_manager: NFTCacheManager,
                  rpc_endpoint: str = "https://api.mainnet-beta.solana.com",
-                 max_concurrent_trades: int = 5):
+                 max_concurrent_trades: int = 5,
+                 event_bus: Optional[EventBus] = None,
+                 metadata_resolver: Optional[MetadataResolver] = None,
+                 client=None,
+                 tensor_client: Optional[TensorClient] = None,
+                 tx_pipeline: Optional[TransactionPipeline] = None):
         
         self.wallet = wallet
         self.cache_manager = cache_manager
-        self.client = AsyncClient(rpc_endpoint)
-        self.tensor_client = TensorClient()
+        self.event_bus = event_bus or cache_manager.event_bus
+        if client is None:
+            from solana.rpc.async_api import AsyncClient  # deferred: heavy and only needed once trading starts
+
+            client = InstrumentedClient(AsyncClient(rpc_endpoint))
+        self.client = client
+        self.tensor_client = tensor_client or TensorClient()
+        self.metadata_resolver = metadata_resolver or MetadataResolver(str(cache_manager.cache_dir / 'offchain'))
         self.max_concurrent_trades = max_concurrent_trades
         
         # Trading metrics
-        self.trades_executed = Counter('nft_trades_executed', 'Number of trades executed')
-        self.trade_volume = Counter('nft_trade_volume_sol', 'Trading volume in SOL')
-        self.active_trades = Gauge('nft_active_trades', 'Number of active trades')
-        self.trade_duration = Histogram('nft_trade_duration_seconds', 'Time taken to execute trades')
+        self.trades_executed = TRADES_EXECUTED
+        self.trade_volume = TRADE_VOLUME
+        self.active_trades = ACTIVE_TRADES
+        self.trade_duration = TRADE_DURATION
+        
+        # Plain counters owned by the trading loop; published to the event bus on change
+        self._active_count = 0
+        self._trade_count = 0
+        self._volume = 0.0
         
         # Trading pools and queues
         self.trade_semaphore = asyncio.Semaphore(max_concurrent_trades)
-        self.pending_trades: List[Transaction] = []
+        if tx_pipeline is None:
+            payer = getattr(wallet, 'payer', None)
+            tx_pipeline = TransactionPipeline(self.client, [payer] if payer else [])
+        self.tx_pipeline = tx_pipeline
         self.market_data: Dict[str, MarketMetrics] = {}
         
         logger.info("NFT Trade Manager initialized with Tensor.trade integration")
     
+    @traced('trading.analyze_market')
     async def analyze_market(self, collection_address: str) -> MarketMetrics:
         """Analyze market conditions for a collection using Tensor.trade data"""
         try:
@@ -75,32 +106,34 @@ class NFTTradeManager:
             )
             
             self.market_data[collection_address] = metrics
+            self.event_bus.publish(f'market.metrics.{collection_address}', metrics)
             return metrics
             
         except Exception as e:
             logger.error(f"Error analyzing market: {e}")
             return None
     
+    @traced('trading.place_buy_order')
     async def place_buy_order(self, nft: NFTMetadata, price: float) -> bool:
         """Place a buy order for an NFT using Tensor.trade"""
+        current_span().set_attribute('mint', nft.mint)
         async with self.trade_semaphore:
             try:
-                self.active_trades.inc()
+                self._set_active(1)
                 start_time = datetime.now()
                 
                 # Validate price against market conditions
                 collection = nft.collection.get('address') if nft.collection else None
                 if collection:
                     metrics = await self.analyze_market(collection)
-                    if metrics and price > metrics.floor_price * 1.1:  # 10% above floor price
+                    if metrics and not validate_buy_price(price, metrics.floor_price):
                         logger.warning(f"Buy price {price} SOL is significantly above floor price {metrics.floor_price} SOL")
                         return False
                 
                 # Place bid on Tensor
                 signature = await self.tensor_client.place_bid(nft.mint, price)
                 if signature:
-                    self.trades_executed.inc()
-                    self.trade_volume.inc(price)
+                    self._record_trade('buy', nft.mint, price, signature)
                     self.cache_manager.update_price(nft.mint, price, price)
                     
                     duration = (datetime.now() - start_time).total_seconds()
@@ -115,28 +148,29 @@ class NFTTradeManager:
                 logger.error(f"Error placing buy order: {e}")
                 return False
             finally:
-                self.active_trades.dec()
+                self._set_active(-1)
     
+    @traced('trading.place_sell_order')
     async def place_sell_order(self, nft: NFTMetadata, price: float) -> bool:
         """Place a sell order for an NFT using Tensor.trade"""
+        current_span().set_attribute('mint', nft.mint)
         async with self.trade_semaphore:
             try:
-                self.active_trades.inc()
+                self._set_active(1)
                 start_time = datetime.now()
                 
                 # Validate price against market conditions
                 collection = nft.collection.get('address') if nft.collection else None
                 if collection:
                     metrics = await self.analyze_market(collection)
-                    if metrics and price < metrics.floor_price * 0.9:  # 10% below floor price
+                    if metrics and not validate_sell_price(price, metrics.floor_price):
                         logger.warning(f"Sell price {price} SOL is significantly below floor price {metrics.floor_price} SOL")
                         return False
                 
                 # Create listing on Tensor
                 signature = await self.tensor_client.create_listing(nft.mint, price)
                 if signature:
-                    self.trades_executed.inc()
-                    self.trade_volume.inc(price)
+                    self._record_trade('sell', nft.mint, price, signature)
                     self.cache_manager.update_price(nft.mint, price, price)
                     
                     duration = (datetime.now() - start_time).total_seconds()
@@ -151,7 +185,7 @@ class NFTTradeManager:
                 logger.error(f"Error placing sell order: {e}")
                 return False
             finally:
-                self.active_trades.dec()
+                self._set_active(-1)
     
     async def get_nft_data(self, mint_address: str) -> Optional[Dict]:
         """Get NFT data from Tensor.trade"""
@@ -160,24 +194,33 @@ class NFTTradeManager:
             cached_nft = self.cache_manager.get_nft(mint_address)
             if cached_nft:
                 return cached_nft
+            if self.cache_manager.is_absent(mint_address):
+                return None
             
             # Fetch from Tensor if not in cache
-            nft_data = await self.tensor_client.get_nft_data(mint_address)
+            try:
+                nft_data = await self.tensor_client.get_nft_data(mint_address)
+            except NFTNotFound:
+                self.cache_manager.mark_absent(mint_address)
+                return None
             if nft_data:
                 # Create NFT metadata and cache it
                 metadata = NFTMetadata(
                     mint=nft_data['mint'],
                     name=nft_data['name'],
                     symbol="",  # Tensor API might not provide this
-                    uri="",  # Tensor API might not provide this
+                    uri=nft_data.get('uri') or "",
                     seller_fee_basis_points=0,  # Tensor API might not provide this
                     creators=[],  # Tensor API might not provide this
                     collection=nft_data['collection'],
                     attributes=nft_data['attributes'],
                     last_updated=datetime.now(),
                     floor_price=0.0,
-                    last_sale_price=nft_data['last_sale']
+                    last_sale_price=nft_data['last_sale'],
+                    image_url=nft_data.get('image_url') or ""
                 )
+                if not metadata.attributes and metadata.uri:
+                    await self.metadata_resolver.fill_attributes([metadata])
                 self.cache_manager.cache_nft(metadata)
                 return metadata
             
@@ -187,6 +230,25 @@ class NFTTradeManager:
             logger.error(f"Error fetching NFT data: {e}")
             return None
     
+    async def get_wallet_mints(self) -> List[str]:
+        """Mints of the NFTs (amount 1, no decimals) held by this manager's wallet"""
+        from solana.publickey import PublicKey  # deferred: heavy and only needed once trading starts
+        from solana.rpc.types import TokenAccountOpts
+        from spl.token.constants import TOKEN_PROGRAM_ID
+
+        response = await self.client.get_token_accounts_by_owner_json_parsed(
+            PublicKey(str(self.wallet.public_key)), TokenAccountOpts(program_id=TOKEN_PROGRAM_ID))
+        mints = []
+        for account in response.value:
+            parsed = account.account.data.parsed
+            if isinstance(parsed, str):
+                parsed = json.loads(parsed)
+            info = parsed.get('info', {})
+            amount = info.get('tokenAmount', {})
+            if amount.get('decimals') == 0 and amount.get('amount') == '1':
+                mints.append(info['mint'])
+        return mints
+    
     async def get_collection_listings(self, collection_address: str) -> List[Dict]:
         """Get active listings for a collection from Tensor.trade"""
         try:
@@ -203,11 +265,36 @@ class NFTTradeManager:
             logger.error(f"Error fetching recent trades: {e}")
             return []
     
+    def _set_active(self, delta: int):
+        self._active_count += delta
+        if delta > 0:
+            self.active_trades.inc(delta)
+        else:
+            self.active_trades.dec(-delta)
+        self._publish_stats()
+    
+    def _record_trade(self, side: str, mint: str, price: float, signature: str):
+        self.trades_executed.inc()
+        self.trade_volume.inc(price)
+        self._trade_count += 1
+        self._volume += price
+        self.event_bus.publish('trade.executed', {
+            'side': side,
+            'mint': mint,
+            'price': price,
+            'signature': signature,
+            'time': datetime.now(),
+        }, key=signature)
+        self._publish_stats()
+    
+    def _publish_stats(self):
+        self.event_bus.publish('trading.stats', self.get_trading_stats())
+    
     def get_trading_stats(self) -> Dict:
         """Get current trading statistics"""
         return {
-            'active_trades': self.active_trades._value.get(),
-            'total_trades': self.trades_executed._value.get(),
-            'total_volume': self.trade_volume._value.get(),
-            'pending_trades': len(self.pending_trades),
+            'active_trades': self._active_count,
+            'total_trades': self._trade_count,
+            'total_volume': self._volume,
+            'pending_trades': self.tx_pipeline.in_flight,
         } 
\ No newline at end of file
@@ -0,0 +1,369 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import asyncio
+import json
+import os
+import time
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.signature import Signature
+from solders.transaction import Transaction
+from ..core.instrumentation import LATENCY_BUCKETS
+
+if TYPE_CHECKING:
+    from solana.rpc.async_api import AsyncClient
+
+TX_SENT = Counter('nft_tx_sent', 'Transactions sent, including re-signed retries')
+TX_REBROADCAST = Counter('nft_tx_rebroadcast', 'Rebroadcasts of in-flight transactions')
+TX_CONFIRMED = Counter('nft_tx_confirmed', 'Transactions confirmed')
+TX_FAILED = Counter('nft_tx_failed', 'Transactions that failed, expired or timed out', ['reason'])
+TX_IN_FLIGHT = Gauge('nft_tx_in_flight', 'Transactions awaiting confirmation')
+TX_CONFIRM_LATENCY = Histogram('nft_tx_confirm_seconds', 'Time from first send to confirmation',
+                               buckets=LATENCY_BUCKETS)
+STATUS_BATCH = Histogram('nft_tx_status_batch_size', 'Signatures per getSignatureStatuses call',
+                         buckets=(1, 8, 32, 64, 128, 256))
+
+# Same order as int(TransactionConfirmationStatus)
+_COMMITMENT_RANK = {'processed': 0, 'confirmed': 1, 'finalized': 2}
+
+
+class TransactionFailed(Exception):
+    """The cluster executed the transaction and it returned an error"""
+
+
+class TransactionExpired(Exception):
+    """The transaction was not confirmed before its blockhash expired or the timeout passed"""
+
+
+@dataclass
+class TransactionResult:
+    signature: str
+    slot: int
+    confirmation_status: str
+    attempts: int
+    latency: float
+
+
+@dataclass
+class _InFlight:
+    instructions: Sequence[Instruction]
+    signers: List[Keypair]
+    future: asyncio.Future
+    submitted_at: float
+    raw: bytes = b""
+    signature: Optional[Signature] = None
+    last_valid_block_height: int = 0
+    last_sent: float = 0.0
+    attempts: int = 0
+
+
+def load_keypair(path: str) -> Keypair:
+    """Load a keypair from a Solana CLI JSON key file (an array of 64 byte values)"""
+    with open(os.path.expanduser(path)) as f:
+        return Keypair.from_bytes(bytes(json.load(f)))
+
+
+class BlockhashCache:
+    """Keeps a recent blockhash and the current block height fresh in the background
+
+    Transactions are signed against the cached blockhash instead of fetching
+    one per transaction. The block height is what tells the confirmation
+    tracker that a dropped transaction's blockhash has expired.
+    """
+
+    def __init__(self, client: 'AsyncClient', commitment: str = 'confirmed', refresh_interval: float = 10.0):
+        self.client = client
+        self.commitment = commitment
+        self.refresh_interval = refresh_interval
+        self.blockhash: Optional[Hash] = None
+        self.last_valid_block_height = 0
+        self.block_height = 0
+        self.fetched_at = 0.0
+        self._refreshing: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self) -> Tuple[Hash, int]:
+        """Cached ``(blockhash, last_valid_block_height)``, refreshed first if it is too old"""
+        if self.blockhash is None or time.monotonic() - self.fetched_at > 2 * self.refresh_interval:
+            await self.refresh()
+        return self.blockhash, self.last_valid_block_height
+
+    async def refresh(self):
+        # Concurrent callers share one in-flight fetch
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._fetch())
+        await asyncio.shield(self._refreshing)
+
+    async def _fetch(self):
+        blockhash, height = await asyncio.gather(
+            self.client.get_latest_blockhash(self.commitment),
+            self.client.get_block_height(self.commitment),
+        )
+        self.blockhash = blockhash.value.blockhash
+        self.last_valid_block_height = blockhash.value.last_valid_block_height
+        self.block_height = height.value
+        self.fetched_at = time.monotonic()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        tasks = [t for t in (self._task, self._refreshing) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._refreshing = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing blockhash: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+class TransactionPipeline:
+    """Builds, signs, sends and confirms transactions for many concurrent callers
+
+    * Blockhashes come from a background-refreshed :class:`BlockhashCache`.
+    * Signing runs on a thread pool so large batches do not stall the event loop.
+    * Sends are retried ``max_retries`` times with exponential backoff, and
+      in-flight transactions are rebroadcast every ``rebroadcast_interval``.
+    * One polling loop confirms every in-flight signature with batched
+      ``getSignatureStatuses`` calls (up to ``status_batch_size`` per call).
+    * A transaction whose blockhash expired unseen is re-signed with a fresh
+      blockhash (it can no longer land, so this cannot double-execute), up to
+      ``max_retries`` times.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self,
+                 client: 'AsyncClient',
+                 signers: List[Keypair],
+                 commitment: str = 'confirmed',
+                 preflight_commitment: str = 'processed',
+                 max_retries: int = 3,
+                 retry_delay: float = 1.0,
+                 timeout: float = 60.0,
+                 poll_interval: float = 0.4,
+                 rebroadcast_interval: float = 2.0,
+                 blockhash_refresh_interval: float = 10.0,
+                 status_batch_size: int = 256,
+                 sign_workers: int = 4,
+                 blockhashes: Optional[BlockhashCache] = None):
+        self.client = client
+        self.signers = signers
+        self.commitment = commitment
+        self.preflight_commitment = preflight_commitment
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.rebroadcast_interval = rebroadcast_interval
+        self.status_batch_size = status_batch_size
+
+        # A cache passed in is shared with other pipelines and left running on stop()
+        self._owns_blockhashes = blockhashes is None
+        self.blockhashes = blockhashes or BlockhashCache(client, commitment, blockhash_refresh_interval)
+        self.sign_workers = sign_workers
+        self._sign_executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[Signature, _InFlight] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._poller: Optional[asyncio.Task] = None
+        self.status_calls = 0
+
+    @classmethod
+    def from_config(cls, client: 'AsyncClient', solana_config, wallet_config) -> 'TransactionPipeline':
+        signers = [load_keypair(wallet_config.KEY_PATH)] if wallet_config.KEY_PATH else []
+        return cls(
+            client,
+            signers,
+            commitment=solana_config.COMMITMENT,
+            preflight_commitment=solana_config.PREFLIGHT_COMMITMENT,
+            max_retries=solana_config.MAX_RETRIES,
+            retry_delay=solana_config.RETRY_DELAY,
+            timeout=solana_config.TRANSACTION_TIMEOUT,
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        # Created here rather than in __init__ so the pipeline can be started again after stop()
+        if self._sign_executor is None:
+            self._sign_executor = ThreadPoolExecutor(max_workers=self.sign_workers, thread_name_prefix="tx-sign")
+        self.blockhashes.start()
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll_loop())
+
+    async def stop(self):
+        """Stop background work and fail anything still in flight"""
+        if self._poller:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        if self._owns_blockhashes:
+            await self.blockhashes.stop()
+        for tx in list(self._pending.values()):
+            self._finish(tx, error=TransactionExpired("pipeline stopped"), reason='stopped')
+        if self._sign_executor:
+            self._sign_executor.shutdown(wait=False)
+            self._sign_executor = None
+
+    async def submit(self, instructions: Sequence[Instruction],
+                     signers: Optional[List[Keypair]] = None) -> asyncio.Future:
+        """Sign and send; the returned future resolves to a :class:`TransactionResult`"""
+        [future] = await self.submit_many([instructions], signers)
+        return future
+
+    async def submit_many(self, batches: Sequence[Sequence[Instruction]],
+                          signers: Optional[List[Keypair]] = None) -> List[asyncio.Future]:
+        """Sign a batch of transactions in parallel and send them concurrently"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        txs = [_InFlight(instructions, list(signers or self.signers), loop.create_future(), now)
+               for instructions in batches]
+        await asyncio.gather(*(self._sign(tx) for tx in txs))
+        await asyncio.gather(*(self._send_new(tx) for tx in txs))
+        return [tx.future for tx in txs]
+
+    async def send_and_confirm(self, instructions: Sequence[Instruction],
+                               signers: Optional[List[Keypair]] = None) -> Optional[TransactionResult]:
+        """Submit and wait for confirmation; logs and returns None on failure"""
+        try:
+            return await (await self.submit(instructions, signers))
+        except Exception as e:
+            logger.error(f"Transaction failed: {e}")
+            return None
+
+    async def _sign(self, tx: _InFlight):
+        blockhash, last_valid = await self.blockhashes.get()
+        payer = tx.signers[0]
+        signed = await asyncio.get_running_loop().run_in_executor(
+            self._sign_executor,
+            lambda: Transaction.new_signed_with_payer(tx.instructions, payer.pubkey(), tx.signers, blockhash),
+        )
+        tx.raw = bytes(signed)
+        tx.signature = signed.signatures[0]
+        tx.last_valid_block_height = last_valid
+        tx.attempts += 1
+
+    async def _send_new(self, tx: _InFlight):
+        """Send with retries, then hand the signature to the confirmation loop"""
+        from solana.rpc.types import TxOpts
+
+        opts = TxOpts(skip_confirmation=True, preflight_commitment=self.preflight_commitment)
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.client.send_raw_transaction(tx.raw, opts=opts)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self._finish(tx, error=TransactionFailed(f"send failed: {e}"), reason='send')
+                    return
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+        TX_SENT.inc()
+        tx.last_sent = time.monotonic()
+        self._pending[tx.signature] = tx
+        TX_IN_FLIGHT.set(len(self._pending))
+        self._wakeup.set()
+
+    async def _rebroadcast(self, tx: _InFlight):
+        from solana.rpc.types import TxOpts
+
+        tx.last_sent = time.monotonic()
+        TX_REBROADCAST.inc()
+        try:
+            await self.client.send_raw_transaction(tx.raw, opts=TxOpts(skip_confirmation=True, skip_preflight=True))
+        except Exception as e:
+            logger.debug(f"Rebroadcast of {tx.signature} failed: {e}")
+
+    async def _resubmit(self, tx: _InFlight):
+        try:
+            await self._sign(tx)
+        except Exception as e:
+            self._finish(tx, error=TransactionFailed(f"re-sign failed: {e}"), reason='send')
+            return
+        await self._send_new(tx)
+
+    async def _poll_loop(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Error polling signature statuses: {e}")
+
+    async def poll_once(self):
+        """Check every in-flight signature once; resolve, rebroadcast or re-sign as needed"""
+        pending = list(self._pending.values())
+        chunks = [pending[i:i + self.status_batch_size] for i in range(0, len(pending), self.status_batch_size)]
+        responses = await asyncio.gather(
+            *(self.client.get_signature_statuses([tx.signature for tx in chunk]) for chunk in chunks),
+            return_exceptions=True,
+        )
+        self.status_calls += len(chunks)
+
+        now = time.monotonic()
+        target = _COMMITMENT_RANK.get(self.commitment, 1)
+        follow_up = []
+        for chunk, response in zip(chunks, responses):
+            STATUS_BATCH.observe(len(chunk))
+            if isinstance(response, Exception):
+                logger.error(f"Error fetching signature statuses: {response}")
+                continue
+            for tx, status in zip(chunk, response.value):
+                if status is not None and status.err is not None:
+                    self._finish(tx, error=TransactionFailed(str(status.err)), reason='error')
+                elif (status is not None and status.confirmation_status is not None
+                        and int(status.confirmation_status) >= target):
+                    self._finish(tx, status=status)
+                elif now - tx.submitted_at > self.timeout:
+                    self._finish(tx, error=TransactionExpired(f"not confirmed within {self.timeout}s"),
+                                 reason='timeout')
+                elif status is None and self.blockhashes.block_height > tx.last_valid_block_height:
+                    del self._pending[tx.signature]
+                    if tx.attempts > self.max_retries:
+                        self._finish(tx, error=TransactionExpired("blockhash expired"), reason='expired')
+                    else:
+                        follow_up.append(self._resubmit(tx))
+                elif status is None and now - tx.last_sent >= self.rebroadcast_interval:
+                    follow_up.append(self._rebroadcast(tx))
+
+        TX_IN_FLIGHT.set(len(self._pending))
+        if follow_up:
+            await asyncio.gather(*follow_up)
+
+    def _finish(self, tx: _InFlight, status=None, error: Optional[Exception] = None, reason: str = ''):
+        self._pending.pop(tx.signature, None)
+        if tx.future.done():
+            return
+        if error is not None:
+            TX_FAILED.labels(reason=reason).inc()
+            tx.future.set_exception(error)
+            return
+        latency = time.monotonic() - tx.submitted_at
+        TX_CONFIRMED.inc()
+        TX_CONFIRM_LATENCY.observe(latency)
+        tx.future.set_result(TransactionResult(
+            signature=str(tx.signature),
+            slot=status.slot,
+            confirmation_status=str(status.confirmation_status).split('.')[-1].lower(),
+            attempts=tx.attempts,
+            latency=latency,
+        ))
@@ -0,0 +1,14 @@
+"""Price checks shared by live order placement and backtests"""
+
+MAX_BUY_PREMIUM = 1.1  # refuse bids more than 10% above floor price
+MIN_SELL_DISCOUNT = 0.9  # refuse listings more than 10% below floor price
+
+
+def validate_buy_price(price: float, floor_price: float) -> bool:
+    """Return False if a bid is significantly above the floor price"""
+    return not price > floor_price * MAX_BUY_PREMIUM
+
+
+def validate_sell_price(price: float, floor_price: float) -> bool:
+    """Return False if a listing is significantly below the floor price"""
+    return not price < floor_price * MIN_SELL_DISCOUNT
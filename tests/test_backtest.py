@@ -0,0 +1,94 @@
+"""Tests for the backtesting engine."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from src.core.trade_store import TradeStore
+from src.trading.backtest import (
+    LISTING, TRADE, BacktestEngine, MarketTape, StrategyParams, param_grid, run_grid,
+)
+
+
+def make_tape(events):
+    """Build a tape from (timestamp, price, kind) tuples."""
+    timestamp, price, kind = zip(*events)
+    return MarketTape(
+        collection="TestCollection",
+        timestamp=np.array(timestamp, dtype=np.int64),
+        price=np.array(price, dtype=np.float64),
+        kind=np.array(kind, dtype=np.int8),
+    )
+
+
+def test_round_trip_pays_fees_and_royalties():
+    """Test a buy below floor followed by a take-profit sell."""
+    tape = make_tape([(0, 10.0, LISTING), (1, 9.0, LISTING), (2, 11.0, TRADE)])
+    result = BacktestEngine(seller_fee_basis_points=500, marketplace_fee_bps=150).run(tape, StrategyParams())
+
+    assert (result.buys, result.sells, result.open_positions) == (1, 1, 0)
+    assert result.realized_pnl == pytest.approx(11.0 * (1 - 0.015 - 0.05) - 9.0 * 1.015)
+    assert result.events == 3
+
+
+def test_sell_below_floor_is_rejected_like_live_trading():
+    """Test that the floor -10% sell check blocks a stop-loss fill."""
+    tape = make_tape([(0, 10.0, LISTING), (1, 9.0, LISTING), (2, 7.0, TRADE)])
+    result = BacktestEngine().run(tape, StrategyParams(max_positions=1))
+
+    assert result.sells == 0
+    assert result.rejected == 1
+    assert result.open_positions == 1
+
+
+def test_param_grid_is_cartesian_product():
+    """Test that param_grid expands every combination."""
+    grid = param_grid(take_profit=[1.1, 1.2], stop_loss=[0.8, 0.9, 0.95])
+    assert len(grid) == 6
+    assert {(p.take_profit, p.stop_loss) for p in grid} == {
+        (tp, sl) for tp in (1.1, 1.2) for sl in (0.8, 0.9, 0.95)
+    }
+
+
+def write_trades(trade_dir, collections):
+    """Store a rising and falling price series for each collection."""
+    store = TradeStore(trade_dir)
+    start = datetime(2024, 3, 1)
+    for n, collection in enumerate(collections):
+        store.append(collection, [
+            {"mint": f"Mint{i}", "price": 10.0 + n + (i % 7) - 3, "buyer": "Buyer", "seller": "Seller",
+             "timestamp": start + timedelta(minutes=i), "signature": f"{collection}{i:04d}"}
+            for i in range(200)
+        ])
+
+
+def test_run_grid_matches_serial_runs(tmp_path):
+    """Test that the process-pool sweep returns the same results as running each combination serially."""
+    collections = ["CollectionA", "CollectionB"]
+    write_trades(tmp_path, collections)
+    grid = param_grid(buy_below_floor=[0.9, 1.0], take_profit=[1.05, 1.2], floor_window=[600, 3600])
+
+    results = run_grid(collections, grid, trade_dir=tmp_path, listing_dir=None,
+                       seller_fee_basis_points={"CollectionB": 500}, max_workers=2, batch_size=3)
+
+    engine_fees = {"CollectionA": 0, "CollectionB": 500}
+    expected = []
+    for collection in collections:
+        tape = BacktestEngine.load_tape(collection, TradeStore(tmp_path))
+        engine = BacktestEngine(engine_fees[collection])
+        expected.extend(engine.run(tape, params) for params in grid)
+
+    def strip(result):
+        return {k: v for k, v in result.to_dict().items() if k not in ("elapsed", "events_per_sec")}
+
+    assert [strip(r) for r in results] == [strip(r) for r in expected]
+    assert any(r.buys for r in results)
+
+
+def test_run_grid_raises_failed_batches(tmp_path):
+    """Test that a failing batch aborts the sweep instead of returning partial results."""
+    write_trades(tmp_path, ["CollectionA"])
+    grid = [StrategyParams(), StrategyParams(floor_window=None)]
+
+    with pytest.raises(TypeError):
+        run_grid(["CollectionA"], grid, trade_dir=tmp_path, listing_dir=None, max_workers=1, batch_size=1)
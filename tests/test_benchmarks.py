@@ -0,0 +1,72 @@
+"""Tests for the benchmark stand-ins and baseline comparison."""
+
+import json
+
+import pytest
+
+from benchmarks.run import BASELINE_FILE, compare, compare_ratios
+from benchmarks.stubs import FaultProfile, StubRpcServer, StubTensorServer, fake_address
+from src.trading.tensor_client import TensorClient
+
+
+@pytest.mark.asyncio
+async def test_stub_tensor_injects_rate_limits_and_serves_data():
+    """Test that a 429 profile fails every call and a clean one returns stable data."""
+    collection = fake_address("collection:0")
+    async with StubTensorServer(FaultProfile(rate_limit_rate=1.0)) as server:
+        async with TensorClient(server.url) as client:
+            assert await client.get_collection_stats(collection) is None
+        assert server.responses[429] == 1
+
+        server.faults = FaultProfile()
+        async with TensorClient(server.url) as client:
+            stats = await client.get_collection_stats(collection)
+            listings = await client.get_nft_listings(collection)
+        assert stats['floor_price'] == StubTensorServer.floor_lamports(collection) / 1e9
+        assert len(listings) == server.listings_per_collection
+
+
+@pytest.mark.asyncio
+async def test_stub_rpc_answers_solana_client():
+    """Test that the JSON-RPC stand-in is parseable by the solana client."""
+    from solana.rpc.async_api import AsyncClient
+
+    async with StubRpcServer() as server:
+        client = AsyncClient(server.url)
+        blockhash = await client.get_latest_blockhash()
+        slot = await client.get_slot()
+        await client.close()
+    assert blockhash.value.last_valid_block_height == slot.value + 150
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    """Test direction-aware comparison of throughput and latency metrics."""
+    baseline = {"b": {"ops_per_sec": 100.0, "latency_p50_ms": 10.0, "failed": 1}}
+    results = {"b": {"ops_per_sec": 85.0, "latency_p50_ms": 13.0, "failed": 9}}
+
+    assert compare(results, baseline, tolerance=0.2) == ["b.latency_p50_ms: 13.00 > baseline 10.00"]
+
+
+def test_compare_skips_tail_latency_and_disk_writes():
+    """Test that p99 latencies and disk-write throughput never fail the absolute gate."""
+    baseline = {"b": {"latency_p99_ms": 10.0}, "cache_put": {"puts_per_sec": 4000.0}}
+    results = {"b": {"latency_p99_ms": 100.0}, "cache_put": {"puts_per_sec": 1000.0}}
+
+    assert compare(results, baseline, tolerance=0.25) == []
+
+
+def test_ratio_comparison_against_recorded_baseline():
+    """Test the recorded walk ratio: a slower host passes, batching no faster than single reads fails."""
+    walk = "cache_collection_walk"
+    baseline = json.loads(BASELINE_FILE.read_text())["results"]
+    single, batched = baseline[walk]["single_reads_per_sec"], baseline[walk]["batched_reads_per_sec"]
+    slower_host = {walk: {"single_reads_per_sec": single / 2, "batched_reads_per_sec": batched / 2}}
+    lost_speedup = {walk: {"single_reads_per_sec": single, "batched_reads_per_sec": single * 0.95}}
+
+    assert batched > single
+    assert compare_ratios(baseline, baseline, tolerance=0.25) == []
+    assert compare_ratios(slower_host, baseline, tolerance=0.25) == []
+    assert compare_ratios(lost_speedup, baseline, tolerance=0.25) == [
+        "cache_collection_walk.batched_reads_per_sec/single_reads_per_sec: 0.95x < floor 1.00x"
+    ]
+    assert compare_ratios(lost_speedup, {}, tolerance=0.25)
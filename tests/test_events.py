@@ -0,0 +1,63 @@
+"""Tests for the event bus."""
+
+import asyncio
+
+import pytest
+from src.core.events import EventBus, asyncio_scheduler
+
+
+def test_unchanged_state_is_not_republished():
+    """Test that publishing an equal payload on a state topic is dropped."""
+    bus = EventBus()
+    received = []
+    bus.subscribe("trading.stats", lambda topic, payload: received.append(payload))
+
+    bus.publish("trading.stats", {"total_trades": 1})
+    bus.publish("trading.stats", {"total_trades": 1})
+    bus.publish("trading.stats", {"total_trades": 2})
+
+    assert received == [{"total_trades": 1}, {"total_trades": 2}]
+
+
+def test_new_subscriber_gets_current_state_and_prefix_topics():
+    """Test replay of the last value and trailing-* topic matching."""
+    bus = EventBus()
+    bus.publish("market.metrics.A", 1)
+    bus.publish("trading.stats", 2)
+    received = []
+    bus.subscribe("market.*", lambda topic, payload: received.append((topic, payload)))
+
+    bus.publish("market.trade.A", {"signature": "s1"}, key="s1")
+
+    assert received == [("market.metrics.A", 1), ("market.trade.A", {"signature": "s1"})]
+
+
+@pytest.mark.asyncio
+async def test_bursts_coalesce_into_one_delivery_per_interval():
+    """Test that a throttled subscriber sees only the newest payload per key."""
+    bus = EventBus()
+    received = []
+    subscription = bus.subscribe(
+        ["trading.stats", "cache.price"],
+        lambda topic, payload: received.append((topic, payload)),
+        min_interval=0.05,
+        scheduler=asyncio_scheduler(asyncio.get_running_loop()),
+    )
+
+    for i in range(100):
+        bus.publish("trading.stats", {"total_trades": i})
+        bus.publish("cache.price", {"mint": "A", "floor_price": i}, key="A")
+    bus.publish("cache.price", {"mint": "B", "floor_price": 1}, key="B")
+    await asyncio.sleep(0.1)
+
+    assert received == [
+        ("trading.stats", {"total_trades": 99}),
+        ("cache.price", {"mint": "A", "floor_price": 99}),
+        ("cache.price", {"mint": "B", "floor_price": 1}),
+    ]
+    assert subscription.coalesced == 198
+
+    subscription.cancel()
+    bus.publish("trading.stats", {"total_trades": 100})
+    await asyncio.sleep(0.1)
+    assert len(received) == 3
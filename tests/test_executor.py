@@ -0,0 +1,110 @@
+"""Tests for the process-pool analytics executor."""
+
+import asyncio
+import os
+import time
+
+import numpy as np
+import pytest
+from src.core.executor import AnalyticsExecutor
+
+
+def double(values):
+    """Return a new array twice the input."""
+    return values * 2
+
+
+def fail(message):
+    """Raise inside the worker."""
+    raise ValueError(message)
+
+
+def spin(seconds):
+    """Burn CPU for ``seconds`` and return how long it ran."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        pass
+    return time.perf_counter() - started
+
+
+def shared_blocks():
+    """Names of the shared-memory blocks currently allocated on this host."""
+    return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')}
+
+
+@pytest.fixture
+def executor():
+    executor = AnalyticsExecutor(max_workers=1, shm_threshold=1024)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_shared_memory_round_trip(executor):
+    """Test that large arguments and results pass through shared memory and are released."""
+    before = shared_blocks()
+    values = np.arange(100_000, dtype=np.float64)
+
+    result = await executor.submit(double, values)
+
+    assert np.array_equal(result, values * 2)
+    assert not np.shares_memory(result, values)
+    assert shared_blocks() == before
+    stats = executor.get_stats()
+    assert stats['workers'] == 1
+    assert stats['pending_jobs'] == 0
+    assert stats['run_time_sum'] > 0
+
+
+@pytest.mark.asyncio
+async def test_worker_errors_propagate(executor):
+    """Test that an exception raised in the worker reaches the awaiting caller."""
+    with pytest.raises(ValueError, match="bad input"):
+        await executor.submit(fail, "bad input")
+
+    assert executor.get_stats()['failed_jobs'] == 1
+    assert await executor.submit(spin, 0) >= 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_jobs_are_dropped(executor):
+    """Test that cancelling queued and running jobs frees the caller and the pool."""
+    running = asyncio.ensure_future(executor.submit(spin, 0.5))
+    queued = asyncio.ensure_future(executor.submit(double, np.ones(10_000)))
+    await asyncio.sleep(0.1)
+
+    queued.cancel()
+    running.cancel()
+    for task in (queued, running):
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert executor.get_stats()['cancelled_jobs'] == 2
+    assert await executor.submit(spin, 0) >= 0
+    assert executor.get_stats()['pending_jobs'] == 0
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive(executor):
+    """Test that the loop keeps ticking while a CPU-bound job runs."""
+    await executor.submit(spin, 0)  # start the worker before timing
+    job = asyncio.ensure_future(executor.submit(spin, 1.0))
+    ticks = []
+    while not job.done():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        ticks.append(time.perf_counter() - started)
+
+    assert await job >= 1.0
+    assert len(ticks) > 20
+    assert max(ticks) < 0.5
+
+
+@pytest.mark.asyncio
+async def test_pending_count_settles_after_many_jobs(executor):
+    """Test that the pending counter returns to zero after a burst of jobs finishing on the pool thread."""
+    results = await asyncio.gather(*(executor.submit(spin, 0) for _ in range(200)))
+
+    assert len(results) == 200
+    assert executor.pending == 0
+    assert executor.get_stats()['pending_jobs'] == 0
@@ -0,0 +1,31 @@
+"""Tests that lightweight imports stay free of heavy dependencies and side effects."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_probe(code):
+    """Run ``code`` in a fresh interpreter from the repo root and return stdout."""
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return proc.stdout.strip()
+
+
+def test_package_import_loads_no_heavy_dependencies():
+    """Test that ``import src`` and ``import src.config`` defer GUI, chain and env loading."""
+    loaded = run_probe(
+        "import sys, src, src.config; "
+        "print(','.join(m for m in ('PyQt5', 'anchorpy', 'solana', 'numpy', 'redis', 'dotenv') if m in sys.modules))"
+    )
+    assert loaded == ""
+
+
+def test_lazy_names_resolve_on_access():
+    """Test that public names and the global config still resolve."""
+    out = run_probe(
+        "import src, src.config; "
+        "print(src.NFTCacheManager.__name__, type(src.config.config).__name__, 'NFTManager' in dir(src))"
+    )
+    assert out == "NFTCacheManager Config True"
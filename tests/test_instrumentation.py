@@ -0,0 +1,108 @@
+"""Tests for latency instrumentation and slow-operation tracing."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from aiohttp import web
+from loguru import logger
+from prometheus_client import REGISTRY
+
+from src.core.instrumentation import InMemoryExporter, InstrumentedClient, tracer
+from src.core.nft_cache import NFTCacheManager, NFTMetadata
+from src.trading.trade_manager import NFTTradeManager
+
+
+@pytest.fixture
+def exporter():
+    """Attach an in-memory exporter with a low slow-operation threshold."""
+    exporter = InMemoryExporter()
+    tracer.add_exporter(exporter)
+    threshold = tracer.slow_threshold
+    tracer.slow_threshold = 0.05
+    yield exporter
+    tracer.slow_threshold = threshold
+    tracer.remove_exporter(exporter)
+
+
+async def start_stub_tensor(stats_delay):
+    """Serve the Tensor endpoints used by a buy order on a local port."""
+    async def stats(request):
+        await asyncio.sleep(stats_delay)
+        return web.json_response({'floor_price': 1e9, 'volume_24h': 0, 'listed_count': 1,
+                                  'avg_price_24h': 1e9, 'market_cap': 0})
+
+    async def trades(request):
+        return web.json_response({'trades': []})
+
+    async def bid(request):
+        return web.json_response({'signature': 'sig1'})
+
+    app = web.Application()
+    app.router.add_get('/v1/collections/{c}/stats', stats)
+    app.router.add_get('/v1/collections/{c}/trades', trades)
+    app.router.add_post('/v1/nfts/{m}/bids', bid)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+@pytest.mark.asyncio
+async def test_buy_order_trace_spans_market_analysis_and_http(exporter, tmp_path):
+    """Test the span tree of a buy order and the slow-operation breakdown log."""
+    runner, url = await start_stub_tensor(stats_delay=0.06)
+    messages = []
+    sink = logger.add(messages.append, level="WARNING")
+    manager = NFTTradeManager(None, NFTCacheManager(str(tmp_path)))
+    manager.tensor_client.api_endpoint = url
+    nft = NFTMetadata(mint="Mint1", name="N", symbol="", uri="", seller_fee_basis_points=0, creators=[],
+                      collection={'address': 'Coll'}, attributes=[], last_updated=datetime.now())
+    try:
+        assert await manager.place_buy_order(nft, 1.0)
+    finally:
+        logger.remove(sink)
+        await manager.tensor_client.session.close()
+        await manager.client.close()
+        await runner.cleanup()
+
+    root, close = exporter.spans
+    assert root.name == 'trading.place_buy_order'
+    assert close.name == 'rpc.close'
+    assert root.attributes['mint'] == 'Mint1'
+    assert [c.name for c in root.children] == ['trading.analyze_market', 'tensor.place_bid', 'cache.update_price']
+    [stats] = exporter.find('tensor.get_collection_stats')
+    assert stats.parent.name == 'trading.analyze_market'
+    assert stats.children[0].name == 'http GET'
+    assert stats.children[0].attributes['status'] == '200'
+    assert stats.duration >= 0.06
+
+    [slow_log] = [m for m in messages if 'Slow operation trading.place_buy_order' in m]
+    assert 'tensor.get_collection_stats' in slow_log and 'http GET' in slow_log
+
+
+@pytest.mark.asyncio
+async def test_cache_ops_outside_a_trace_only_record_latency(exporter, tmp_path):
+    """Test that untraced cache calls feed the histogram without creating traces."""
+    cache = NFTCacheManager(str(tmp_path))
+
+    def count():
+        return REGISTRY.get_sample_value('nft_cache_op_seconds_count', {'op': 'get_price'}) or 0
+
+    before = count()
+
+    cache.get_price("Missing")
+
+    assert exporter.spans == []
+    assert count() == before + 1
+
+    class FakeRPC:
+        async def get_slot(self):
+            return 42
+
+    client = InstrumentedClient(FakeRPC())
+    with tracer.span('job'):
+        assert await client.get_slot() == 42
+    assert [c.name for c in exporter.spans[0].children] == ['rpc.get_slot']
@@ -0,0 +1,103 @@
+"""Tests for the shared L2 cache tier against the local Redis-protocol stand-in."""
+
+import os
+import signal
+import socket
+import struct
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("redis")
+
+from src.core.l2_cache import L2Cache, LocalCacheServer
+from src.core.nft_cache import NFTCacheManager, NFTMetadata
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Run a LocalCacheServer on a unix socket for the duration of a test."""
+    server = LocalCacheServer(path=str(tmp_path / "l2.sock")).start_in_thread()
+    yield server
+    server.stop_thread()
+
+
+def make_nft(mint, name="Test NFT"):
+    """Build a minimal NFTMetadata."""
+    return NFTMetadata(
+        mint=mint, name=name, symbol="TST", uri="", seller_fee_basis_points=500,
+        creators=[], collection={"address": "Coll"}, attributes=[], last_updated=datetime.now(),
+    )
+
+
+def wait_for(predicate, timeout=3.0):
+    """Poll until predicate() is true or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _server_pid(path):
+    """Process id of whatever is listening on a unix socket."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[0]
+
+
+def test_pipelined_multi_get_set_with_ttl(server):
+    """Test multi-get/set round trips and key expiry."""
+    l2 = L2Cache(server.url)
+    l2.set_many({"a": "1", "b": "2"}, ttl=60)
+    l2.set("short", "x", ttl=1)
+
+    assert l2.get_many(["a", "b", "missing"]) == {"a": b"1", "b": b"2"}
+    assert wait_for(lambda: l2.get("short") is None)
+    l2.close()
+
+
+def test_processes_share_entries_and_invalidate_l1(server, tmp_path):
+    """Test that a peer reads through L2 and drops its L1 copy on update."""
+    writer = NFTCacheManager(str(tmp_path / "a"), l2_cache=L2Cache(server.url))
+    reader = NFTCacheManager(str(tmp_path / "b"), l2_cache=L2Cache(server.url))
+
+    writer.cache_nft(make_nft("Mint1"))
+    assert reader.get_nft("Mint1").name == "Test NFT"
+    assert "Mint1" in reader.metadata_cache
+
+    writer.cache_nft(make_nft("Mint1", name="Renamed"))
+    assert wait_for(lambda: "Mint1" not in reader.metadata_cache)
+    assert reader.get_nft("Mint1").name == "Renamed"
+
+    writer.update_price("Mint1", 1.5, 1.2)
+    assert reader.get_price("Mint1")["floor_price"] == 1.5
+
+    writer.l2.close()
+    reader.l2.close()
+
+
+def test_fallback_server_outlives_its_starter_and_is_reelected(tmp_path):
+    """Test that the fallback server runs in its own process and peers restart it when it dies."""
+    path = str(tmp_path / "l2.sock")
+    assert LocalCacheServer.ensure_running(path, idle_timeout=30)
+    assert not LocalCacheServer.ensure_running(path)
+
+    l2 = L2Cache(f"unix://{path}", local_socket=path)
+    l2.set("a", "1", ttl=60)
+    assert l2.get("a") == b"1"
+
+    server_pid = _server_pid(path)
+    assert server_pid != os.getpid()
+    os.kill(server_pid, signal.SIGTERM)
+    assert wait_for(lambda: not LocalCacheServer.is_serving(path))
+
+    assert l2.get("a") is None  # the failed read re-elects a server
+    assert LocalCacheServer.is_serving(path)
+    l2.set("a", "2", ttl=60)
+    assert l2.get("a") == b"2"
+    l2.close()
+    os.kill(_server_pid(path), signal.SIGTERM)
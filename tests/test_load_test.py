@@ -0,0 +1,18 @@
+"""Tests for the open-loop load test harness."""
+
+from benchmarks.load_test import LoadProfile, flatten, run_sweep
+
+
+def test_sweep_reports_stage_latencies_and_finds_saturation():
+    """Test that a light rate is sustained and an overload is reported as saturation."""
+    profile = LoadProfile(rates=[20, 400], duration=2.0, max_concurrent_trades=1, rtt=0.005,
+                          drain_timeout=1.0, tolerance=0.6)
+    report = run_sweep(profile)
+
+    light, overload = report["steps"]
+    assert not light["saturated"] and light["failed"] == 0
+    assert {"buy.total", "buy.validation", "buy.http", "buy.cache", "buy.queue", "read.http"} <= set(light["stages"])
+    assert overload["saturated"] and overload["timed_out"] > 0
+    assert report["saturation"] == {"max_sustained_rate": 20, "saturated_at": 400, "reason": overload["reason"]}
+    assert report["upstream_requests"]["bid"] > 0
+    assert "achieved_per_sec" in flatten(report)["rate_20"]
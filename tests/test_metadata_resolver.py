@@ -0,0 +1,74 @@
+"""Tests for the off-chain metadata resolver against local gateway stand-ins."""
+
+from datetime import datetime
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from benchmarks.stubs import FaultProfile, StubGatewayServer
+from src.core.metadata_resolver import MetadataResolver, content_address
+from src.core.nft_cache import NFTMetadata
+
+
+def documents(count):
+    return {f"ipfs/cid{i}/meta.json": {"name": f"NFT #{i}", "attributes": [{"trait_type": "Rank", "value": i}]}
+            for i in range(count)}
+
+
+def test_content_address():
+    """Test that every IPFS spelling of a document maps to the same address."""
+    for uri in ("ipfs://cid0/meta.json", "ipfs://ipfs/cid0/meta.json",
+                "https://gateway.pinata.cloud/ipfs/cid0/meta.json", "https://gateway.ipfs.io/ipfs/cid0/meta.json"):
+        assert content_address(uri) == ("ipfs", "cid0/meta.json")
+    cid = "bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi"
+    assert content_address(f"https://{cid}.ipfs.dweb.link/meta.json") == ("ipfs", f"{cid}/meta.json")
+    assert content_address("https://gateway.ipfs.io/ipfs/QmX/1.json") == ("ipfs", "QmX/1.json")
+    assert content_address("https://dweb.ipfs.io/meta.json") is None
+    assert content_address("https://arweave.net/tx123") == ("ar", "tx123")
+    assert content_address("https://example.com/meta.json") is None
+
+
+@pytest.mark.asyncio
+async def test_race_prefers_fastest_gateway_and_caches(tmp_path):
+    """Test that the fastest gateway wins, losers are cancelled and results are cached."""
+    docs = documents(20)
+    async with StubGatewayServer(docs, FaultProfile(latency=2.0)) as slow, \
+            StubGatewayServer({}) as missing, \
+            StubGatewayServer(docs, FaultProfile(latency=0.02)) as fast:
+        gateways = [f"{slow.url}/ipfs/", f"{missing.url}/ipfs/", f"{fast.url}/ipfs/"]
+        async with MetadataResolver(str(tmp_path), ipfs_gateways=gateways, hedge_delay=0.05,
+                                    max_concurrent=8) as resolver:
+            start = time.perf_counter()
+            results = await resolver.resolve_many(f"ipfs://cid{i}/meta.json" for i in range(20))
+            elapsed = time.perf_counter() - start
+            assert REGISTRY.get_sample_value('nft_metadata_requests_in_flight') == 0
+            assert elapsed < 1.5
+            assert results["ipfs://cid7/meta.json"]["name"] == "NFT #7"
+
+            # Dead only once every gateway, including the slow one, has answered 404
+            assert await resolver.resolve("ipfs://dead/meta.json") is None
+
+            # A gateway URL for the same content, and the dead link, are now served from disk
+            served = sum(fast.requests.values()) + sum(missing.requests.values())
+            again = await resolver.resolve_many([f"{fast.url}/ipfs/cid3/meta.json", "ipfs://dead/meta.json"])
+            assert again[f"{fast.url}/ipfs/cid3/meta.json"]["name"] == "NFT #3"
+            assert sum(fast.requests.values()) + sum(missing.requests.values()) == served
+
+
+@pytest.mark.asyncio
+async def test_fill_attributes_only_when_missing(tmp_path):
+    """Test that NFTs without attributes are filled from their URI and others are left alone."""
+    async with StubGatewayServer(documents(2)) as gateway:
+        nfts = [
+            NFTMetadata(mint=f"mint{i}", name="", symbol="", uri=f"ipfs://cid{i}/meta.json",
+                        seller_fee_basis_points=0, creators=[], collection=None,
+                        attributes=attrs, last_updated=datetime.now())
+            for i, attrs in enumerate([[], [{"trait_type": "Kept", "value": 1}]])
+        ]
+        async with MetadataResolver(str(tmp_path), ipfs_gateways=[f"{gateway.url}/ipfs/"]) as resolver:
+            assert await resolver.fill_attributes(nfts) == 1
+
+    assert nfts[0].attributes == [{"trait_type": "Rank", "value": 0}]
+    assert nfts[1].attributes == [{"trait_type": "Kept", "value": 1}]
+    assert list(gateway.requests) == ["ipfs/cid0/meta.json"]
@@ -0,0 +1,136 @@
+"""Tests for multi-wallet trading over shared clients."""
+
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+from anchorpy import Wallet
+from solders.keypair import Keypair
+
+from benchmarks.stubs import FaultProfile, StubRpcServer, StubTensorServer, fake_address
+from src.core.nft_cache import NFTCacheManager, NFTMetadata
+from src.trading.multi_wallet import MultiWalletManager
+from src.trading.rpc_router import RpcRouter
+from src.trading.tensor_client import SharedTensorClient, TensorClient
+
+
+def nft(mint, collection):
+    return NFTMetadata(mint=mint, name="N", symbol="", uri="", seller_fee_basis_points=0, creators=[],
+                       collection={"address": collection}, attributes=[], last_updated=datetime.now())
+
+
+@pytest.mark.asyncio
+async def test_wallets_share_collection_reads_and_sync_their_own_holdings(tmp_path):
+    """Test that orders from many wallets fetch shared collection data once."""
+    collection = fake_address("collection:7")
+    price = StubTensorServer.floor_lamports(collection) / 1e9
+    async with StubTensorServer(FaultProfile(latency=0.05)) as tensor, StubRpcServer(nfts_per_owner=3) as rpc:
+        manager = MultiWalletManager(NFTCacheManager(str(tmp_path)), RpcRouter.from_endpoints([rpc.url]),
+                                     tensor_client=SharedTensorClient(tensor.url), per_wallet_concurrency=2)
+        async with manager:
+            names = [manager.add_wallet(Wallet(Keypair())).name for _ in range(4)]
+            futures = [await manager.submit_order(name, "buy", nft(fake_address(f"{name}:{i}"), collection), price)
+                       for name in names for i in range(3)]
+            assert all(await asyncio.gather(*futures))
+            portfolios = await manager.sync_all()
+            stats = manager.stats()
+
+    assert len(tensor.bids) == 12
+    assert tensor.requests["stats"] == 1
+    assert tensor.requests["trades"] == 1
+    assert {name: len(nfts) for name, nfts in portfolios.items()} == {name: 3 for name in names}
+    assert tensor.requests["nft"] == 12
+    assert all(wallet["orders"] == 3 for wallet in stats["wallets"].values())
+
+
+@pytest.mark.asyncio
+async def test_router_fails_over_from_a_dead_endpoint():
+    """Test that calls succeed while one endpoint refuses connections."""
+    async with StubRpcServer() as rpc:
+        router = RpcRouter.from_endpoints(["http://127.0.0.1:9", rpc.url])
+        try:
+            slots = await asyncio.gather(*(router.get_slot() for _ in range(5)))
+        finally:
+            await router.close()
+
+    assert all(slot.value >= 1000 for slot in slots)
+    assert rpc.requests["getSlot"] == 5
+
+
+@pytest.mark.asyncio
+async def test_closing_cancels_queued_orders(tmp_path):
+    """Test that orders still queued or running when the manager closes are cancelled, not left pending."""
+    collection = fake_address("collection:8")
+    price = StubTensorServer.floor_lamports(collection) / 1e9
+    async with StubTensorServer(FaultProfile(latency=0.5)) as tensor, StubRpcServer() as rpc:
+        manager = MultiWalletManager(NFTCacheManager(str(tmp_path)), RpcRouter.from_endpoints([rpc.url]),
+                                     tensor_client=SharedTensorClient(tensor.url), per_wallet_concurrency=1)
+        name = manager.add_wallet(Wallet(Keypair())).name
+        futures = [await manager.submit_order(name, "buy", nft(fake_address(f"queued:{i}"), collection), price)
+                   for i in range(3)]
+        await asyncio.sleep(0.1)
+        await manager.close()
+
+    assert all(future.cancelled() for future in futures)
+    assert tensor.bids == []
+
+
+class FakeEndpoint:
+    """Client whose get_slot raises ``error`` or returns 1, counting calls."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    async def get_slot(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return 1
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_router_only_fails_over_on_transport_errors():
+    """Test that HTTP 5xx fails over to the next endpoint while RPC errors reach the caller untouched."""
+    async with StubRpcServer(FaultProfile(error_rate=1.0)) as broken, StubRpcServer() as rpc:
+        router = RpcRouter.from_endpoints([broken.url, rpc.url])
+        try:
+            assert (await router.get_slot()).value >= 1000
+        finally:
+            await router.close()
+    assert broken.responses[500] == 1
+
+    rejected, spare = FakeEndpoint(ValueError("Transaction simulation failed")), FakeEndpoint()
+    router = RpcRouter([rejected, spare])
+    for _ in range(2):
+        with pytest.raises(ValueError, match="simulation failed"):
+            await router.get_slot()
+    assert (rejected.calls, spare.calls) == (2, 0)  # neither retried elsewhere nor benched
+
+    timed_out = FakeEndpoint(httpx.ReadTimeout("timed out"))
+    router = RpcRouter([timed_out, spare])
+    assert await router.get_slot() == 1
+    assert await router.get_slot() == 1
+    assert (timed_out.calls, spare.calls) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_shared_reads_propagate_errors_to_every_caller(monkeypatch):
+    """Test that callers sharing an in-flight read all see its exception instead of None."""
+    calls = []
+
+    async def failing_stats(self, collection_address):
+        calls.append(collection_address)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream exploded")
+
+    monkeypatch.setattr(TensorClient, "get_collection_stats", failing_stats)
+    client = SharedTensorClient("http://127.0.0.1:9")
+    results = await asyncio.gather(*(client.get_collection_stats("Coll") for _ in range(3)), return_exceptions=True)
+
+    assert calls == ["Coll"]
+    assert [type(r) for r in results] == [RuntimeError] * 3
@@ -0,0 +1,101 @@
+"""Tests for the bulk cache API and collection sibling prefetching."""
+
+import builtins
+import threading
+from datetime import datetime
+
+from src.core.nft_cache import NFTCacheManager, NFTMetadata
+from src.core.prefetch import CollectionPrefetcher
+
+
+def make_nft(mint, collection):
+    """Build a minimal NFTMetadata in a collection."""
+    return NFTMetadata(mint=mint, name=f"NFT {mint}", symbol="TST", uri="", seller_fee_basis_points=0,
+                       creators=[], collection={"address": collection}, attributes=[],
+                       last_updated=datetime(2024, 1, 1))
+
+
+def test_put_many_and_get_many_round_trip_through_disk(tmp_path):
+    """Test that a batch written by put_many is read back by get_many after a restart."""
+    nfts = [make_nft(f"M{i}", "A") for i in range(30)]
+    writer = NFTCacheManager(str(tmp_path))
+    writer.put_many(nfts)
+    writer.save_index()
+
+    reader = NFTCacheManager(str(tmp_path))
+    found = reader.get_many([f"M{i}" for i in range(40)] + ["M0"])
+    assert sorted(found) == sorted(nft.mint for nft in nfts)
+    assert found["M7"] == nfts[7]
+    assert len(reader.metadata_cache) == 30
+    assert sorted(reader.collection_mints("A")) == sorted(found)
+
+
+def test_reading_one_mint_prefetches_its_collection(tmp_path):
+    """Test that siblings are loaded in the background and their use is counted."""
+    writer = NFTCacheManager(str(tmp_path))
+    writer.put_many([make_nft(f"{c}{i}", c) for c in "AB" for i in range(20)])
+    writer.save_index()
+
+    reader = NFTCacheManager(str(tmp_path))
+    prefetcher = CollectionPrefetcher(reader)
+    try:
+        assert reader.get_nft("A0")
+        prefetcher.wait(timeout=5)
+        assert {m for m in reader.metadata_cache} == {f"A{i}" for i in range(20)}
+
+        for i in range(1, 11):
+            assert reader.get_nft(f"A{i}")
+    finally:
+        prefetcher.close()
+
+    assert prefetcher.stats() == {"prefetched": 19, "used": 10, "accuracy": 10 / 19}
+
+
+def test_prefetch_never_replaces_an_entry_cached_meanwhile(tmp_path, monkeypatch):
+    """Test that a prefetch reading an old disk copy keeps the newer NFT cached while it read."""
+    writer = NFTCacheManager(str(tmp_path))
+    writer.put_many([make_nft("M0", "A"), make_nft("M1", "A")])
+    reader = NFTCacheManager(str(tmp_path))
+    newer = make_nft("M0", "A")
+    newer.name = "Renamed"
+
+    from_dict = NFTMetadata.from_dict.__func__
+
+    def cached_during_read(cls, data):
+        reader.load_metadata([newer])  # another thread caches M0 between the disk read and the insert
+        return from_dict(cls, data)
+
+    monkeypatch.setattr(NFTMetadata, "from_dict", classmethod(cached_during_read))
+    found = reader.get_many(["M0", "M1"], prefetch=True)
+
+    assert reader.get_nft("M0").name == "Renamed"
+    assert found["M0"].name == "Renamed"
+    assert reader.get_nft("M1").name == "NFT M1"
+
+
+def test_put_many_writes_files_without_holding_the_cache_lock(tmp_path, monkeypatch):
+    """Test that readers are served from memory while a batch is still being written to disk."""
+    cache = NFTCacheManager(str(tmp_path))
+    cache.cache_nft(make_nft("Old", "A"))
+    writing, release = threading.Event(), threading.Event()
+
+    def slow_open(path, *args, **kwargs):
+        if str(path).endswith("Slow.json"):
+            writing.set()
+            release.wait(5)
+        return builtins.open(path, *args, **kwargs)
+
+    monkeypatch.setattr("src.core.nft_cache.open", slow_open, raising=False)
+    writer = threading.Thread(target=cache.put_many, args=([make_nft("Slow", "A")],))
+    writer.start()
+    try:
+        assert writing.wait(5)
+        assert cache.get_nft("Old").name == "NFT Old"
+        assert cache.get_nft("Slow").name == "NFT Slow"
+        assert not (tmp_path / "Slow.json").exists()
+    finally:
+        release.set()
+        writer.join()
+
+    assert (tmp_path / "Slow.json").exists()
+    assert "Slow" in cache.presence
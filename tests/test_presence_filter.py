@@ -0,0 +1,98 @@
+"""Tests for negative caching and the disk presence filter."""
+
+import json
+from datetime import datetime
+
+import pytest
+from prometheus_client import REGISTRY
+
+from benchmarks.stubs import StubRpcServer, StubTensorServer, fake_address
+from src.core.nft_cache import NFTCacheManager, NFTMetadata
+from src.core.presence_filter import PresenceFilter
+from src.trading.trade_manager import NFTTradeManager
+
+
+def make_nft(mint):
+    """Build a minimal NFTMetadata."""
+    return NFTMetadata(mint=mint, name=f"NFT {mint}", symbol="TST", uri="", seller_fee_basis_points=0,
+                       creators=[], collection=None, attributes=[], last_updated=datetime(2024, 1, 1))
+
+
+def disk_probes_skipped():
+    """Current value of the skipped-disk-probe counter."""
+    return REGISTRY.get_sample_value('nft_cache_disk_probes_skipped_total') or 0
+
+
+def test_misses_skip_disk_and_filter_survives_restart(tmp_path):
+    """Test that unknown mints skip the disk and a saved filter is loaded, not rebuilt."""
+    writer = NFTCacheManager(str(tmp_path))
+    for i in range(50):
+        writer.cache_nft(make_nft(f"M{i}"))
+    writer.save_index()
+    saved = (tmp_path / NFTCacheManager.PRESENCE_FILE).stat()
+
+    reader = NFTCacheManager(str(tmp_path))
+    assert (tmp_path / NFTCacheManager.PRESENCE_FILE).stat().st_ino == saved.st_ino  # not rewritten
+    assert len(reader.presence) == 50
+    skipped = disk_probes_skipped()
+    assert all(reader.get_nft(f"M{i}") for i in range(50))
+    assert sum(reader.get_nft(f"unknown{i}") is None for i in range(1000)) == 1000
+    assert disk_probes_skipped() - skipped > 950
+
+    # A file written after the filter was saved makes it stale
+    (tmp_path / "Late.json").write_text(json.dumps(make_nft("Late").to_dict()))
+    listing = [f"M{i}" for i in range(50)] + ["Late"]
+    assert PresenceFilter.load(tmp_path / NFTCacheManager.PRESENCE_FILE, listing) is None
+    assert NFTCacheManager(str(tmp_path)).get_nft("Late").name == "NFT Late"
+    assert (tmp_path / NFTCacheManager.PRESENCE_FILE).stat().st_ino != saved.st_ino
+
+
+def test_filter_is_stale_after_a_delete_and_an_add(tmp_path):
+    """Test that replacing one file with another, keeping the count, still forces a rebuild."""
+    writer = NFTCacheManager(str(tmp_path))
+    for i in range(10):
+        writer.cache_nft(make_nft(f"M{i}"))
+    writer.save_index()
+
+    (tmp_path / "M0.json").unlink()
+    (tmp_path / "Swapped.json").write_text(json.dumps(make_nft("Swapped").to_dict()))
+
+    listing = [f"M{i}" for i in range(1, 10)] + ["Swapped"]
+    assert PresenceFilter.load(tmp_path / NFTCacheManager.PRESENCE_FILE, listing) is None
+    reader = NFTCacheManager(str(tmp_path))
+    assert reader.get_nft("Swapped").name == "NFT Swapped"
+    assert PresenceFilter.load(tmp_path / NFTCacheManager.PRESENCE_FILE, listing) is not None
+
+
+def test_saved_filter_includes_files_from_other_processes(tmp_path):
+    """Test that saving folds in files a peer wrote, so the loaded filter finds them."""
+    ours = NFTCacheManager(str(tmp_path))
+    peer = NFTCacheManager(str(tmp_path))
+    ours.cache_nft(make_nft("Ours"))
+    peer.cache_nft(make_nft("Theirs"))
+    assert "Theirs" not in ours.presence
+
+    ours.save_index()
+
+    presence = PresenceFilter.load(tmp_path / NFTCacheManager.PRESENCE_FILE, ["Theirs", "Ours"])
+    assert presence is not None and "Ours" in presence and "Theirs" in presence
+
+
+@pytest.mark.asyncio
+async def test_mints_tensor_does_not_know_are_fetched_once(tmp_path):
+    """Test that a 404 from Tensor is remembered until the negative TTL expires."""
+    missing = fake_address("missing")
+    async with StubTensorServer() as tensor, StubRpcServer() as rpc:
+        tensor.missing_mints.add(missing)
+        manager = NFTTradeManager(None, NFTCacheManager(str(tmp_path)), rpc_endpoint=rpc.url)
+        manager.tensor_client.api_endpoint = tensor.url
+        try:
+            for _ in range(5):
+                assert await manager.get_nft_data(missing) is None
+            assert await manager.get_nft_data(fake_address("present"))
+        finally:
+            await manager.tensor_client.session.close()
+            await manager.client.close()
+
+    assert tensor.requests["nft"] == 2
+    assert manager.cache_manager.is_absent(missing)
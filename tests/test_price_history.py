@@ -0,0 +1,68 @@
+"""Tests for the per-mint price history ring buffers."""
+
+import numpy as np
+
+from src.config import get_config
+from src.core.nft_cache import NFTCacheManager
+from src.core.price_history import PriceHistoryStore
+
+
+def test_ring_buffer_keeps_latest_points_in_order():
+    """Test wrap-around and windowed min/max/mean."""
+    store = PriceHistoryStore(length=4)
+    for i in range(6):
+        store.append("A", floor_price=float(i), last_sale_price=float(10 + i), timestamp=100.0 + i)
+
+    history = store.history("A")
+    assert history['timestamp'].tolist() == [102.0, 103.0, 104.0, 105.0]
+    assert store.latest("A")['floor_price'] == 5.0
+
+    stats = store.window_stats("A", start=103.0, end=104.0)
+    assert stats == {
+        'count': 2,
+        'floor_price_min': 3.0, 'floor_price_max': 4.0, 'floor_price_mean': 3.5,
+        'last_sale_price_min': 13.0, 'last_sale_price_max': 14.0, 'last_sale_price_mean': 13.5,
+    }
+    assert store.window_stats("A", start=200.0) is None
+
+
+def test_memory_is_bounded_by_evicting_least_recently_updated_mint():
+    """Test row growth up to max_mints and LRU reuse after that."""
+    store = PriceHistoryStore(length=8, max_mints=3, initial_mints=1)
+    for mint in ("A", "B", "C"):
+        store.append(mint, 1.0, 1.0)
+    nbytes = store.nbytes
+    store.append("A", 2.0, 2.0)
+    store.append("D", 3.0, 3.0)
+
+    assert store.mints() == ["C", "A", "D"]
+    assert store.nbytes == nbytes
+    np.testing.assert_array_equal(store.history("D")['floor_price'], [3.0])
+
+
+def test_cache_manager_serves_fresh_prices_and_keeps_history(tmp_path):
+    """Test that get_price keeps its shape and expires while history remains."""
+    cache = NFTCacheManager(str(tmp_path), price_ttl=300)
+    cache.update_price("Mint1", 1.0, 0.9)
+    cache.update_price("Mint1", 1.2, 1.1)
+
+    price = cache.get_price("Mint1")
+    assert (price['floor_price'], price['last_sale_price']) == (1.2, 1.1)
+    assert set(price) == {'floor_price', 'last_sale_price', 'updated_at'}
+
+    cache.price_ttl = -1
+    assert cache.get_price("Mint1") is None
+    assert cache.get_price_history("Mint1")['floor_price_mean'] == 1.1
+
+
+def test_default_store_follows_cache_config(tmp_path, monkeypatch):
+    """Test that a cache built without a store sizes its price history from CacheConfig."""
+    monkeypatch.setattr(get_config().CACHE, "PRICE_HISTORY_LENGTH", 5)
+    monkeypatch.setattr(get_config().CACHE, "PRICE_HISTORY_MAX_MINTS", 2)
+    cache = NFTCacheManager(str(tmp_path))
+    for mint in ("A", "B", "C"):
+        cache.update_price(mint, 1.0, 1.0)
+
+    assert (cache.price_history.length, cache.price_history.max_mints) == (5, 2)
+    assert "A" not in cache.price_history
+    assert len(cache.price_history) == 2
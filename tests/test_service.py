@@ -0,0 +1,81 @@
+"""Tests for the headless service against the local Tensor stand-in."""
+
+import asyncio
+import threading
+
+import aiohttp
+import pytest
+
+from benchmarks.stubs import FaultProfile, StubRpcServer, StubTensorServer, fake_address
+from src.core.nft_cache import NFTCacheManager
+from src.service import NFTService
+from src.trading.trade_manager import NFTTradeManager
+
+
+def make_service(tensor_url, rpc_url, cache_dir, l2_cache=None):
+    manager = NFTTradeManager(None, NFTCacheManager(cache_dir, l2_cache=l2_cache), rpc_endpoint=rpc_url)
+    manager.tensor_client.api_endpoint = tensor_url
+    return NFTService(manager.cache_manager, manager, stream_min_interval=0)
+
+
+@pytest.mark.asyncio
+async def test_read_endpoints_share_upstream_calls_and_revalidate(tmp_path):
+    """Test that concurrent identical reads make one upstream call and ETags give 304s."""
+    collection = fake_address("collection:0")
+    async with StubTensorServer(FaultProfile(latency=0.05)) as tensor, StubRpcServer() as rpc:
+        async with make_service(tensor.url, rpc.url, str(tmp_path)) as service, aiohttp.ClientSession() as http:
+            url = f"{service.url}/api/collections/{collection}/listings"
+
+            async def fetch():
+                async with http.get(url) as response:
+                    return response.status, response.headers["ETag"], await response.json()
+
+            results = await asyncio.gather(*(fetch() for _ in range(50)))
+            assert {status for status, _, _ in results} == {200}
+            assert len({etag for _, etag, _ in results}) == 1
+            assert len(results[0][2]) == tensor.listings_per_collection
+            assert tensor.requests["listings"] == 1
+
+            async with http.get(url, headers={"If-None-Match": results[0][1]}) as response:
+                assert response.status == 304
+            async with http.get(f"{service.url}/api/nfts/{fake_address('mint:0')}/price") as response:
+                assert response.status == 404
+
+
+@pytest.mark.asyncio
+async def test_stream_delivers_market_events_for_watched_collections(tmp_path):
+    """Test that a WebSocket client watching a collection receives its trades and metrics."""
+    collection = fake_address("collection:1")
+    async with StubTensorServer(trades_per_collection=3) as tensor, StubRpcServer() as rpc:
+        async with make_service(tensor.url, rpc.url, str(tmp_path)) as service, aiohttp.ClientSession() as http:
+            async with http.ws_connect(f"{service.url}/api/stream?topics=market.*") as ws:
+                await ws.send_json({"watch": collection})
+                topics = set()
+                while len(topics) < 4:
+                    message = await asyncio.wait_for(ws.receive_json(), timeout=5)
+                    topics.add((message["topic"], message["data"].get("signature")))
+
+    assert (f"market.metrics.{collection}", None) in topics
+    assert sum(1 for topic, _ in topics if topic == f"market.trade.{collection}") == 3
+
+
+@pytest.mark.asyncio
+async def test_shutdown_closes_the_l2_tier_and_saves_the_index(tmp_path):
+    """Test that stopping the service stops the L2 invalidation listener and writes the collection index."""
+    redis = pytest.importorskip("redis")
+    from src.core.l2_cache import L2Cache, LocalCacheServer
+
+    def listeners():
+        return [t for t in threading.enumerate() if isinstance(t, redis.client.PubSubWorkerThread) and t.is_alive()]
+
+    server = LocalCacheServer(path=str(tmp_path / "l2.sock")).start_in_thread()
+    try:
+        async with StubTensorServer() as tensor, StubRpcServer() as rpc:
+            service = make_service(tensor.url, rpc.url, str(tmp_path / "cache"), L2Cache(server.url))
+            async with service:
+                assert len(listeners()) == 1
+            assert listeners() == []
+    finally:
+        server.stop_thread()
+
+    assert (tmp_path / "cache" / NFTCacheManager.COLLECTIONS_FILE).exists()
@@ -0,0 +1,74 @@
+"""Tests for cache snapshots and warm restore."""
+
+import gc
+import json
+from datetime import datetime, timezone
+
+from cachetools import LRUCache
+from src.core.nft_cache import NFTCacheManager, NFTMetadata
+from src.core.snapshot import CacheSnapshotter
+
+
+def make_nft(mint):
+    """Build a minimal NFTMetadata."""
+    return NFTMetadata(
+        mint=mint, name=f"NFT {mint}", symbol="TST", uri="", seller_fee_basis_points=500,
+        creators=[{"address": "C", "share": 100}], collection={"address": "Coll"},
+        attributes=[{"trait_type": "bg", "value": "blue"}], last_updated=datetime(2024, 1, 1, 12, 0),
+    )
+
+
+def test_restore_replays_entries_and_price_history(tmp_path):
+    """Test that a restored cache holds the snapshot's NFTs in the same order and keeps price history."""
+    source = NFTCacheManager(str(tmp_path / "a"))
+    source.load_metadata([make_nft(m) for m in ("A", "B", "C")])
+    source.get_nft("A")
+    source.update_price("B", 1.0, 0.9)
+    source.update_price("B", 1.5, 1.4)
+    path = CacheSnapshotter(source, str(tmp_path / "backups"), restore_batch_size=2).snapshot()
+    assert path is not None
+    assert not (tmp_path / "a" / NFTCacheManager.COLLECTIONS_FILE).exists()  # no index writes on the snapshot path
+    manifest = json.loads((path / "manifest.json").read_text())
+    assert datetime.fromisoformat(manifest["created_at"]).tzinfo == timezone.utc
+
+    target = NFTCacheManager(str(tmp_path / "b"))
+    target.metadata_cache = LRUCache(maxsize=3)
+    assert CacheSnapshotter(target, str(tmp_path / "backups")).restore()
+
+    assert list(target.metadata_cache) == ["A", "B", "C"]
+    target.cache_nft(make_nft("D"))
+    assert "A" not in target.metadata_cache
+    assert target.get_nft("B") == make_nft("B")
+    assert target.get_price("B")["floor_price"] == 1.5
+    assert target.get_price_history("B")["count"] == 2
+
+
+def test_restore_leaves_garbage_collection_enabled(tmp_path):
+    """Test that the collector is only paused while a batch decodes, not across the restore."""
+    source = NFTCacheManager(str(tmp_path / "a"))
+    source.load_metadata([make_nft(str(i)) for i in range(5)])
+    CacheSnapshotter(source, str(tmp_path / "backups"), restore_batch_size=2).snapshot()
+    target = NFTCacheManager(str(tmp_path / "b"))
+    enabled = []
+    load_metadata = target.load_metadata
+
+    def record_gc_state(batch):
+        enabled.append(gc.isenabled())
+        load_metadata(batch)
+
+    target.load_metadata = record_gc_state
+
+    assert CacheSnapshotter(target, str(tmp_path / "backups")).restore()
+    assert enabled == [True, True, True]
+    assert gc.isenabled()
+    assert len(target.metadata_cache) == 5
+
+
+def test_rotation_keeps_newest_snapshots(tmp_path):
+    """Test MAX_BACKUPS rotation and that incomplete snapshots are ignored."""
+    cache = NFTCacheManager(str(tmp_path / "cache"))
+    snapshotter = CacheSnapshotter(cache, str(tmp_path / "backups"), max_backups=2, compression=False)
+    paths = [snapshotter.snapshot() for _ in range(3)]
+    (tmp_path / "backups" / "snapshot-99999999T000000000000Z").mkdir()
+
+    assert snapshotter.snapshots() == [paths[2], paths[1]]
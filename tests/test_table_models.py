@@ -0,0 +1,91 @@
+"""Tests for the batched GUI table model."""
+
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+
+from PyQt5.QtCore import Qt  # noqa: E402
+from src.gui.table_models import Column, RecordTableModel  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def make_model(**kwargs):
+    """Build a two-column model keyed by mint."""
+    return RecordTableModel([Column("Name", "name"), Column("Mint", "mint")], flush_interval_ms=0, **kwargs)
+
+
+def wait_for(app, condition, timeout=2.0):
+    """Process Qt events until ``condition()`` holds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the model"
+        app.processEvents()
+
+
+def test_records_are_applied_in_batches_and_merged_by_key(app):
+    """Test that queued records are inserted per batch and updates merge into existing rows."""
+    model = make_model(batch_size=400)
+    inserts, changes = [], []
+    model.rowsInserted.connect(lambda parent, first, last: inserts.append(last - first + 1))
+    model.dataChanged.connect(lambda first, last: changes.append((first.row(), last.row())))
+
+    model.enqueue({"mint": f"mint{i}", "name": f"NFT {i}"} for i in range(1000))
+    model.enqueue([{"mint": "mint5", "name": "Renamed"}])
+    wait_for(app, lambda: sum(inserts) == 1000 and changes)
+
+    assert inserts == [400, 400, 200]
+    assert changes == [(5, 5)]
+    assert model.rowCount() == 1000
+    assert model.record(5)["name"] == "Renamed"
+    assert model.data(model.index(5, 0)) == "Renamed"
+
+
+def test_duplicates_within_one_batch_become_one_row(app):
+    """Test that a key queued twice before a flush is inserted once with both updates."""
+    model = make_model()
+    model.enqueue([{"mint": "a", "name": "first"}, {"mint": "b", "name": "other"},
+                   {"mint": "a", "floor_price": 1.5}])
+    wait_for(app, lambda: model.rowCount() == 2)
+    app.processEvents()
+
+    assert model.rowCount() == 2
+    assert model.record(0) == {"mint": "a", "name": "first", "floor_price": 1.5}
+
+
+def test_details_are_requested_once_per_visible_incomplete_row(app):
+    """Test that only displayed rows without details reach the detail loader, once each."""
+    model = make_model()
+    requested, thumbnails = [], []
+    model.detail_loader = requested.append
+    model.thumbnail_loader = lambda key, url: thumbnails.append(key)
+    model.enqueue([{"mint": "a", "name": "a", "loaded": False},
+                   {"mint": "b", "name": "b", "loaded": True, "image_url": "https://img/b.png"},
+                   {"mint": "c", "name": "c", "loaded": False}])
+    wait_for(app, lambda: model.rowCount() == 3)
+
+    assert requested == []  # nothing is fetched until a cell is shown
+    for _ in range(3):
+        model.data(model.index(0, 0))
+        model.data(model.index(0, 1))
+        model.data(model.index(1, 0))
+        model.data(model.index(1, 0), Qt.DecorationRole)
+    assert requested == ["a"]
+    assert thumbnails == ["b"]
+
+    model.retain_thumbnail_requests([])
+    model.data(model.index(1, 0), Qt.DecorationRole)
+    assert thumbnails == ["b", "b"]
+
+    model.clear()
+    model.enqueue([{"mint": "a", "name": "a", "loaded": False}])
+    wait_for(app, lambda: model.rowCount() == 1)
+    model.data(model.index(0, 0))
+    assert requested == ["a", "a"]
@@ -0,0 +1,60 @@
+"""Tests for the thumbnail service against a local image gateway."""
+
+import asyncio
+import io
+
+import pytest
+from PIL import Image
+
+from benchmarks.stubs import FaultProfile, StubGatewayServer
+from src.core.thumbnails import VISIBLE, ThumbnailService
+
+
+def png(width, height, color):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(out, format="PNG")
+    return out.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_thumbnails_are_fixed_size_and_content_addressed(tmp_path):
+    """Test that identical images share one cached thumbnail that survives a restart."""
+    image = png(400, 200, "red")
+    async with StubGatewayServer({"a.png": image, "copy-of-a.png": image, "broken.png": b"not an image"}) as server:
+        service = ThumbnailService(str(tmp_path), size=32)
+        first = await service.get(f"{server.url}/a.png")
+        second = await service.get(f"{server.url}/copy-of-a.png")
+        assert await service.get(f"{server.url}/broken.png") is None
+        await service.close()
+
+        with Image.open(io.BytesIO(first)) as thumbnail:
+            assert thumbnail.size == (32, 32)
+        assert second == first
+        assert len(list(tmp_path.glob("*/*.png"))) == 1
+
+        restarted = ThumbnailService(str(tmp_path), size=32)
+        assert restarted.lookup(f"{server.url}/a.png") == first
+        await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_visible_rows_first_and_scrolled_away_rows_cancelled(tmp_path):
+    """Test that visible requests jump the queue and set_visible cancels the others."""
+    images = {f"{i}.png": png(100, 100, (i * 40, 0, 0)) for i in range(4)}
+    async with StubGatewayServer(images, FaultProfile(latency=0.1)) as server:
+        service = ThumbnailService(str(tmp_path), size=16, max_downloads=1)
+        urls = [f"{server.url}/{i}.png" for i in range(4)]
+        tasks = [asyncio.ensure_future(service.get(url, priority=5)) for url in urls[:3]]
+        tasks.append(asyncio.ensure_future(service.get(urls[3], priority=VISIBLE)))
+        await asyncio.sleep(0.02)
+
+        # Rows 0 and 2 scrolled off screen; row 1 came into view
+        service.set_visible([urls[1], urls[3]])
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        await service.close()
+
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert isinstance(results[2], asyncio.CancelledError)
+    assert results[1] and results[3]
+    assert list(server.requests) == ["3.png", "1.png"]
+    assert service.stats()["cached"] == 2
@@ -0,0 +1,113 @@
+"""Tests for the local trade store."""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from src.core.trade_store import TradeStore
+
+COLLECTION = "TestCollection1111111111111111111111111111"
+
+
+def make_trade(signature, when, price):
+    """Build a trade dict shaped like TensorClient.get_recent_trades output."""
+    return {
+        "mint": "Mint" + signature[-4:],
+        "price": price,
+        "buyer": "Buyer",
+        "seller": "Seller",
+        "timestamp": when,
+        "signature": signature,
+    }
+
+
+class FakeTensorClient:
+    """Returns a fixed set of trades and records the requested window."""
+
+    def __init__(self, trades):
+        self.trades = trades
+        self.requested_hours = []
+
+    async def get_recent_trades(self, collection_address, hours=24):
+        self.requested_hours.append(hours)
+        return self.trades
+
+
+def test_append_deduplicates_by_signature(tmp_path):
+    """Test that re-appending the same signature is a no-op."""
+    store = TradeStore(tmp_path)
+    now = datetime.now().replace(microsecond=0)
+    trades = [make_trade(f"sig{i:04d}", now - timedelta(minutes=i), 1.0 + i) for i in range(10)]
+
+    assert store.append(COLLECTION, trades) == 10
+    assert store.append(COLLECTION, trades[:5]) == 0
+    assert TradeStore(tmp_path).append(COLLECTION, trades) == 0
+    assert len(store.get_trades(COLLECTION)) == 10
+
+
+def test_time_and_price_range_query(tmp_path):
+    """Test time-range and price-range scans across day partitions."""
+    store = TradeStore(tmp_path)
+    base = datetime(2024, 3, 1, 12, 0, 0)
+    trades = [make_trade(f"sig{i:04d}", base + timedelta(hours=6 * i), float(i)) for i in range(12)]
+    store.append(COLLECTION, reversed(trades))
+
+    assert len(store.days(COLLECTION)) >= 3
+
+    window = store.query(COLLECTION, start=base + timedelta(hours=6), end=base + timedelta(hours=30))
+    assert window["price"].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert (window["timestamp"][1:] >= window["timestamp"][:-1]).all()
+
+    cheap = store.query(COLLECTION, min_price=2.0, max_price=5.0, columns=["signature"])
+    assert [s.decode() for s in cheap["signature"]] == ["sig0002", "sig0003", "sig0004", "sig0005"]
+
+    assert store.last_timestamp(COLLECTION) == trades[-1]["timestamp"]
+
+
+def test_readers_never_lose_a_partition_during_rewrites(tmp_path):
+    """Test that replaced versions outlive one write and concurrent readers always see every row."""
+    store = TradeStore(tmp_path)
+    day = datetime(2024, 3, 1, 12, 0, 0)
+    store.append(COLLECTION, [make_trade("sig0000", day, 1.0)])
+    seen = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            seen.append(len(TradeStore(tmp_path).get_trades(COLLECTION)))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for i in range(1, 100):
+            store.append(COLLECTION, [make_trade(f"sig{i:04d}", day + timedelta(seconds=i), 1.0)])
+    finally:
+        done.set()
+        reader.join()
+
+    assert seen and min(seen) >= 1
+    assert seen == sorted(seen)
+    [partition] = (tmp_path / COLLECTION).iterdir()
+    assert sorted(p.name for p in partition.iterdir() if p.is_dir()) == ["v000099", "v000100"]
+
+
+def test_overlong_strings_are_rejected(tmp_path):
+    """Test that values wider than their column are skipped rather than truncated."""
+    store = TradeStore(tmp_path)
+    now = datetime.now().replace(microsecond=0)
+    trades = [make_trade("sig0001", now, 1.0), make_trade("s" * 89, now, 2.0)]
+
+    assert store.append(COLLECTION, trades) == 1
+    assert [t["signature"] for t in store.get_trades(COLLECTION)] == ["sig0001"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_ingest_uses_tensor_client(tmp_path):
+    """Test that ingest asks only for the window since the newest stored trade."""
+    store = TradeStore(tmp_path)
+    now = datetime.now().replace(microsecond=0)
+    client = FakeTensorClient([make_trade("sig0001", now - timedelta(hours=3), 2.5)])
+
+    assert await store.backfill(client, COLLECTION, hours=48) == 1
+    assert await store.ingest(client, COLLECTION) == 0
+    assert client.requested_hours == [48, 5]
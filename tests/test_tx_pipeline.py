@@ -0,0 +1,60 @@
+"""Tests for the transaction submission pipeline against the local JSON-RPC stand-in."""
+
+import asyncio
+
+import pytest
+from solana.rpc.async_api import AsyncClient
+from solders.keypair import Keypair
+from solders.system_program import TransferParams, transfer
+
+from benchmarks.stubs import StubRpcServer
+from src.trading.tx_pipeline import TransactionExpired, TransactionPipeline
+
+
+def transfers(payer, count):
+    """One single-transfer instruction list per transaction."""
+    dest = Keypair().pubkey()
+    return [[transfer(TransferParams(from_pubkey=payer.pubkey(), to_pubkey=dest, lamports=i + 1))]
+            for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_batched_confirmation_and_resign_after_expiry():
+    """Test that many signatures share status polls and dropped ones are re-signed."""
+    async with StubRpcServer(confirmation_delay=0.2, slot_time=0.005) as rpc:
+        rpc.drop_first = 3
+        client = AsyncClient(rpc.url)
+        payer = Keypair()
+        pipeline = TransactionPipeline(client, [payer], poll_interval=0.05, rebroadcast_interval=0.1,
+                                       blockhash_refresh_interval=0.1, status_batch_size=100)
+
+        results = await asyncio.gather(*await pipeline.submit_many(transfers(payer, 200)))
+        await pipeline.stop()
+        await client.close()
+
+    assert all(r.confirmation_status in ('confirmed', 'finalized') for r in results)
+    assert sorted(r.attempts for r in results)[-3:] == [2, 2, 2]
+    assert rpc.requests['getLatestBlockhash'] < 50
+    assert rpc.requests['getSignatureStatuses'] < 200 // 4
+
+
+@pytest.mark.asyncio
+async def test_expired_transaction_fails_after_retries():
+    """Test that a transaction whose every attempt is dropped reports expiry."""
+    async with StubRpcServer(slot_time=0.005) as rpc:
+        rpc.drop_first = 2
+        client = AsyncClient(rpc.url)
+        payer = Keypair()
+        pipeline = TransactionPipeline(client, [payer], max_retries=1, poll_interval=0.05,
+                                       blockhash_refresh_interval=0.1)
+
+        future = await pipeline.submit(transfers(payer, 1)[0])
+        with pytest.raises(TransactionExpired):
+            await future
+        assert await pipeline.send_and_confirm(transfers(payer, 1)[0]) is not None
+        await pipeline.stop()
+
+        # Submitting restarts a stopped pipeline, signing pool included
+        assert await pipeline.send_and_confirm(transfers(payer, 1)[0]) is not None
+        await pipeline.stop()
+        await client.close()